@@ -0,0 +1,56 @@
+import asyncio
+import json
+from typing import Dict
+
+from fastapi import HTTPException
+
+from .config import AUTOSTORE
+from .proxy import BackendPool, BufferedResponse, fetch
+
+# autostore-api answers 400 to a GET /products/?ids= with more ids than this
+MAX_BULK_PRODUCT_IDS = 100
+
+
+def _json(response: BufferedResponse):
+    return json.loads(response.body) if response.body else None
+
+
+def _raise_for(response: BufferedResponse):
+    detail = _json(response)
+    if isinstance(detail, dict) and "detail" in detail:
+        detail = detail["detail"]
+    raise HTTPException(status_code=response.status_code, detail=detail)
+
+
+async def order_detail(pool: BackendPool, order_id: int, headers: Dict[str, str]) -> Dict:
+    """Order, items with their products and payment in one document."""
+    # The order, its items and its payment do not depend on each other
+    order, items, payment = await asyncio.gather(
+        fetch(pool, AUTOSTORE, "GET", f"/orders/{order_id}", headers=headers),
+        fetch(pool, AUTOSTORE, "GET", f"/order-items/order/{order_id}", headers=headers),
+        fetch(pool, AUTOSTORE, "GET", f"/payments/order/{order_id}", headers=headers, route_class="payments"),
+    )
+    if order.status_code != 200:
+        _raise_for(order)
+
+    order_items = _json(items) if items.status_code == 200 else []
+
+    # All products for the order in bulk lookups of up to MAX_BULK_PRODUCT_IDS, fetched in parallel
+    products_by_id = {}
+    product_ids = sorted({item["product_id"] for item in order_items if item.get("product_id") is not None})
+    chunks = [product_ids[i:i + MAX_BULK_PRODUCT_IDS] for i in range(0, len(product_ids), MAX_BULK_PRODUCT_IDS)]
+    responses = await asyncio.gather(*(
+        fetch(pool, AUTOSTORE, "GET", "/products/?ids=" + ",".join(map(str, chunk)), headers=headers)
+        for chunk in chunks
+    ))
+    for products in responses:
+        if products.status_code != 200:
+            _raise_for(products)
+        products_by_id.update((product["id"], product) for product in _json(products))
+
+    document = _json(order)
+    document["items"] = [
+        {**item, "product": products_by_id.get(item.get("product_id"))} for item in order_items
+    ]
+    document["payment"] = _json(payment) if payment.status_code == 200 else None
+    return document
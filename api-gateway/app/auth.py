@@ -0,0 +1,97 @@
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from fastapi import Request
+
+from shared.jwt_utils import (
+    IDENTITY_HEADER,
+    IDENTITY_SIGNATURE_HEADER,
+    decode_access_token,
+    sign_identity,
+)
+
+CLAIMS_CACHE_SIZE = int(os.getenv("GATEWAY_CLAIMS_CACHE_SIZE", "10000"))
+# Upper bound for tokens that carry no exp claim
+CLAIMS_CACHE_MAX_TTL = float(os.getenv("GATEWAY_CLAIMS_CACHE_MAX_TTL", "300"))
+
+
+class ClaimsCache:
+    """Bounded LRU of verified JWT claims keyed by token digest, evicted at exp."""
+
+    def __init__(self, max_entries: int = CLAIMS_CACHE_SIZE, max_ttl: float = CLAIMS_CACHE_MAX_TTL):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self.entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[tuple]:
+        key = self._key(token)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] <= time.time():
+            del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, token: str, claims: Dict, headers: tuple):
+        now = time.time()
+        expires_at = min(claims.get("exp", now + self.max_ttl), now + self.max_ttl)
+        key = self._key(token)
+        self.entries[key] = (expires_at, claims, headers)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> Dict:
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+claims_cache = ClaimsCache()
+
+
+def bearer_token(request: Request) -> Optional[str]:
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token.strip()
+
+
+def verify_request(request: Request) -> Optional[tuple]:
+    """Returns (claims, identity headers) for a valid bearer token, verifying each token only once."""
+    token = bearer_token(request)
+    if token is None:
+        return None
+
+    entry = claims_cache.get(token)
+    if entry is not None:
+        return entry[1], entry[2]
+
+    claims = decode_access_token(token)
+    if not claims:
+        # Let the backend answer with its own 401 for protected routes
+        return None
+    identity = sign_identity(claims)
+    claims_cache.put(token, claims, identity)
+    return claims, identity
+
+
+def apply_identity(headers: Dict[str, str], identity: Optional[tuple]):
+    # Never trust identity headers sent by the client itself
+    headers.pop(IDENTITY_HEADER, None)
+    headers.pop(IDENTITY_SIGNATURE_HEADER, None)
+    if identity is not None:
+        headers[IDENTITY_HEADER], headers[IDENTITY_SIGNATURE_HEADER] = identity
@@ -0,0 +1,205 @@
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set, Tuple
+
+from fastapi.responses import Response
+
+RESPONSE_CACHE_TTL = float(os.getenv("GATEWAY_CACHE_TTL", "30"))
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv("GATEWAY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# GET /products/ and GET /products/{product_id}
+PRODUCT_LIST_PATH = re.compile(r"^/products/?$")
+PRODUCT_DETAIL_PATH = re.compile(r"^/products/(\d+)/?$")
+PRODUCT_IMPORT_PATH = re.compile(r"^/products/import/?$")
+
+# Writes outside /products that change cached product data: stock is taken and given back by
+# orders, checkout and payments, and reviews reorder ?sort=top_rated list pages. Which products an
+# order touched is in its body, so stock writes drop every cached product; reservations released
+# by the backend's expiry sweep are only picked up when the entry's TTL runs out.
+STOCK_WRITES = [
+    ("POST", re.compile(r"^/orders/?$")),
+    ("POST", re.compile(r"^/carts/\d+/checkout/?$")),
+    ("PUT", re.compile(r"^/orders/\d+/?$")),
+    ("DELETE", re.compile(r"^/orders/\d+/?$")),
+    ("POST", re.compile(r"^/payments/?$")),
+]
+REVIEW_WRITES = [
+    ("POST", re.compile(r"^/reviews/?$")),
+    ("PUT", re.compile(r"^/reviews/\d+/?$")),
+    ("DELETE", re.compile(r"^/reviews/\d+/?$")),
+]
+
+LIST_TAG = "products:list"
+CATALOG_TAG = "products:all"  # on every cached product response
+
+
+@dataclass
+class CachedResponse:
+    status_code: int
+    headers: Dict[str, str]
+    body: bytes
+    etag: str
+    expires_at: float
+    tags: Set[str] = field(default_factory=set)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers.items())
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as If-None-Match requires
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+
+def tags_for(path: str) -> Optional[Set[str]]:
+    """Cache tags for a cacheable product path, None if the path is not cached."""
+    if PRODUCT_LIST_PATH.match(path):
+        return {LIST_TAG, CATALOG_TAG}
+    match = PRODUCT_DETAIL_PATH.match(path)
+    if match:
+        return {f"product:{match.group(1)}", CATALOG_TAG}
+    return None
+
+
+def _matches(writes, method: str, path: str) -> bool:
+    return any(method == write_method and pattern.match(path) for write_method, pattern in writes)
+
+
+class ResponseCache:
+    """TTL + LRU response cache bounded by total body/header bytes."""
+
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL, max_bytes: int = RESPONSE_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self.by_tag: Dict[str, Set[str]] = {}
+        # Bumped on every invalidation, so a fetch that started before one can tell
+        self.generations: Dict[str, int] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+
+    def generation(self, tags: Set[str]) -> Tuple[int, ...]:
+        """Snapshot to take before fetching a response that will be cached under tags"""
+        return tuple(self.generations.get(tag, 0) for tag in sorted(tags))
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, status_code: int, headers: Dict[str, str], body: bytes, tags: Set[str],
+            generation: Optional[Tuple[int, ...]] = None) -> CachedResponse:
+        """Caches the response, unless one of its tags was invalidated since generation was taken"""
+        entry = CachedResponse(
+            status_code=status_code,
+            headers=headers,
+            body=body,
+            etag=make_etag(body),
+            expires_at=time.monotonic() + self.ttl,
+            tags=tags,
+        )
+        if entry.size > self.max_bytes:
+            return entry
+        if generation is not None and generation != self.generation(tags):
+            # A write landed while this body was being fetched; it may predate that write
+            self.stale_puts += 1
+            return entry
+        if key in self.entries:
+            self._remove(key)
+        self.entries[key] = entry
+        self.bytes += entry.size
+        for tag in tags:
+            self.by_tag.setdefault(tag, set()).add(key)
+        while self.bytes > self.max_bytes:
+            oldest = next(iter(self.entries))
+            self._remove(oldest)
+            self.evictions += 1
+        return entry
+
+    def invalidate_tag(self, tag: str):
+        self.generations[tag] = self.generations.get(tag, 0) + 1
+        for key in list(self.by_tag.get(tag, ())):
+            self._remove(key)
+            self.invalidations += 1
+
+    def invalidate_for_write(self, method: str, path: str):
+        # Writes to a single product drop that product and every list page that may contain it
+        match = PRODUCT_DETAIL_PATH.match(path)
+        if match and method in ("PUT", "PATCH", "DELETE"):
+            self.invalidate_tag(f"product:{match.group(1)}")
+            self.invalidate_tag(LIST_TAG)
+        elif (PRODUCT_LIST_PATH.match(path) or PRODUCT_IMPORT_PATH.match(path)) and method == "POST":
+            # A bulk import only inserts, so existing product pages stay valid
+            self.invalidate_tag(LIST_TAG)
+        elif _matches(STOCK_WRITES, method, path):
+            self.invalidate_tag(CATALOG_TAG)
+        elif _matches(REVIEW_WRITES, method, path):
+            self.invalidate_tag(LIST_TAG)
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        self.bytes -= entry.size
+        for tag in entry.tags:
+            keys = self.by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.by_tag[tag]
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "not_modified": self.not_modified,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "stale_puts": self.stale_puts,
+        }
+
+    def respond(self, entry: CachedResponse, if_none_match: Optional[str], cache_status: str) -> Response:
+        headers = dict(entry.headers)
+        headers["etag"] = entry.etag
+        headers["x-cache"] = cache_status
+        if etag_matches(if_none_match, entry.etag):
+            self.not_modified += 1
+            headers.pop("content-length", None)
+            headers.pop("content-type", None)
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, status_code=entry.status_code, headers=headers)
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,43 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+from .config import Route
+
+
+class SingleFlight:
+    """Collapses identical in-flight calls into one and fans the result out to every waiter."""
+
+    def __init__(self):
+        self.inflight: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        task = self.inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            # Run as its own task so a disconnecting leader does not cancel the call for the others
+            task = asyncio.ensure_future(fn())
+            self.inflight[key] = task
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict:
+        return {"inflight": len(self.inflight), "leaders": self.leaders, "coalesced": self.coalesced}
+
+
+singleflight = SingleFlight()
+
+
+def coalesce_key(route: Route, url: str, claims: Optional[dict]) -> Optional[tuple]:
+    """Key for identical GETs, or None when the request must not be coalesced."""
+    if route.user_scoped:
+        # Only ever share a response between requests made by the same user
+        if not claims or claims.get("sub") is None:
+            return None
+        scope = f"user:{claims['sub']}"
+    else:
+        scope = "auth" if claims else "anon"
+    return (route.backend, url, scope)
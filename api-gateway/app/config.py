@@ -0,0 +1,150 @@
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_bool(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in {"1", "true", "yes", "on"}
+
+
+# Connection pool and timeout settings for one upstream service
+@dataclass(frozen=True)
+class Backend:
+    name: str
+    base_url: str
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    connect_timeout: float = 3.0
+    read_timeout: float = 30.0
+    write_timeout: float = 30.0
+    pool_timeout: float = 5.0
+    http2: bool = False
+    # Load shedding: requests beyond max_in_flight wait in a bounded queue, then get a 503
+    max_in_flight: int = 100
+    max_queue: int = 200
+    queue_timeout: float = 2.0
+    # Circuit breaker: opens after this many consecutive failures, probes again after breaker_reset
+    breaker_failures: int = 5
+    breaker_reset: float = 10.0
+
+    @classmethod
+    def from_env(cls, name: str, env_prefix: str, default_url: str) -> "Backend":
+        # e.g. AUTOSTORE_API_URL, AUTOSTORE_API_MAX_CONNECTIONS, AUTOSTORE_API_READ_TIMEOUT ...
+        return cls(
+            name=name,
+            base_url=os.getenv(f"{env_prefix}_URL", default_url).rstrip("/"),
+            max_connections=_env_int(f"{env_prefix}_MAX_CONNECTIONS", cls.max_connections),
+            max_keepalive_connections=_env_int(f"{env_prefix}_MAX_KEEPALIVE", cls.max_keepalive_connections),
+            keepalive_expiry=_env_float(f"{env_prefix}_KEEPALIVE_EXPIRY", cls.keepalive_expiry),
+            connect_timeout=_env_float(f"{env_prefix}_CONNECT_TIMEOUT", cls.connect_timeout),
+            read_timeout=_env_float(f"{env_prefix}_READ_TIMEOUT", cls.read_timeout),
+            write_timeout=_env_float(f"{env_prefix}_WRITE_TIMEOUT", cls.write_timeout),
+            pool_timeout=_env_float(f"{env_prefix}_POOL_TIMEOUT", cls.pool_timeout),
+            http2=_env_bool(f"{env_prefix}_HTTP2", cls.http2),
+            max_in_flight=_env_int(f"{env_prefix}_MAX_IN_FLIGHT", cls.max_in_flight),
+            max_queue=_env_int(f"{env_prefix}_MAX_QUEUE", cls.max_queue),
+            queue_timeout=_env_float(f"{env_prefix}_QUEUE_TIMEOUT", cls.queue_timeout),
+            breaker_failures=_env_int(f"{env_prefix}_BREAKER_FAILURES", cls.breaker_failures),
+            breaker_reset=_env_float(f"{env_prefix}_BREAKER_RESET", cls.breaker_reset),
+        )
+
+
+# Concurrency limits for a class of routes, applied on top of the backend's own limits
+@dataclass(frozen=True)
+class RouteClass:
+    name: str
+    max_in_flight: int
+    max_queue: int
+    queue_timeout: float
+
+    @classmethod
+    def from_env(cls, name: str, max_in_flight: int, max_queue: int, queue_timeout: float) -> "RouteClass":
+        env_prefix = f"ROUTE_CLASS_{name.upper()}"
+        return cls(
+            name=name,
+            max_in_flight=_env_int(f"{env_prefix}_MAX_IN_FLIGHT", max_in_flight),
+            max_queue=_env_int(f"{env_prefix}_MAX_QUEUE", max_queue),
+            queue_timeout=_env_float(f"{env_prefix}_QUEUE_TIMEOUT", queue_timeout),
+        )
+
+
+DEFAULT_ROUTE_CLASS = "default"
+
+
+# A path prefix, the backend that serves it and the edge features enabled for it
+@dataclass(frozen=True)
+class Route:
+    prefix: str
+    backend: str
+    cache: bool = False  # GET responses served from the gateway response cache
+    coalesce: bool = False  # identical concurrent GETs share one upstream call
+    user_scoped: bool = False  # responses depend on the caller, only coalesce per user
+    route_class: str = DEFAULT_ROUTE_CLASS  # concurrency class, see ROUTE_CLASSES
+
+    def matches(self, path: str) -> bool:
+        # Match whole path segments so "/bookings" does not swallow "/bookings_requests"
+        return path == self.prefix or path.startswith(self.prefix + "/")
+
+
+USERS_AUTH = "users-auth-api"
+AUTOSTORE = "autostore-api"
+SERVICE_MOT = "service-mot-api"
+
+BACKENDS = {
+    USERS_AUTH: Backend.from_env(USERS_AUTH, "USERS_AUTH_API", "http://localhost:8001"),
+    SERVICE_MOT: Backend.from_env(SERVICE_MOT, "SERVICE_MOT_API", "http://localhost:8002"),
+    AUTOSTORE: Backend.from_env(AUTOSTORE, "AUTOSTORE_API", "http://localhost:8003"),
+}
+
+# Slow third-party calls (Stripe, the email Lambda) get their own small share of each backend
+ROUTE_CLASSES = {
+    DEFAULT_ROUTE_CLASS: RouteClass.from_env(DEFAULT_ROUTE_CLASS, max_in_flight=100, max_queue=200, queue_timeout=2.0),
+    "payments": RouteClass.from_env("payments", max_in_flight=20, max_queue=20, queue_timeout=1.0),
+    "email": RouteClass.from_env("email", max_in_flight=10, max_queue=10, queue_timeout=1.0),
+}
+
+# Routing table keyed by path prefix
+ROUTES: List[Route] = [
+    # users-auth-api
+    Route("/auth", USERS_AUTH),
+    Route("/admin", USERS_AUTH),
+    # autostore-api
+    Route("/products", AUTOSTORE, cache=True, coalesce=True),
+    Route("/carts", AUTOSTORE, coalesce=True, user_scoped=True),
+    Route("/cart-items", AUTOSTORE),
+    Route("/orders", AUTOSTORE, coalesce=True, user_scoped=True),
+    Route("/order-items", AUTOSTORE),
+    Route("/reviews", AUTOSTORE),
+    Route("/discount-codes", AUTOSTORE),
+    Route("/sellers", AUTOSTORE, coalesce=True, user_scoped=True),
+    Route("/payments", AUTOSTORE, route_class="payments"),
+    Route("/email", AUTOSTORE, route_class="email"),
+    Route("/exports", AUTOSTORE),
+    # service-mot-api
+    Route("/bookings", SERVICE_MOT, coalesce=True),
+    Route("/bookings_requests", SERVICE_MOT, coalesce=True),
+    Route("/quotes", SERVICE_MOT, coalesce=True),
+]
+
+
+def resolve_route(path: str) -> Optional[Route]:
+    # Longest prefix wins
+    best = None
+    for route in ROUTES:
+        if route.matches(path) and (best is None or len(route.prefix) > len(best.prefix)):
+            best = route
+    return best
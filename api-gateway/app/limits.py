@@ -0,0 +1,182 @@
+import asyncio
+import math
+import time
+from typing import Dict, Tuple
+
+from fastapi import HTTPException
+
+from .config import BACKENDS, DEFAULT_ROUTE_CLASS, ROUTE_CLASSES, Backend, RouteClass
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class Bulkhead:
+    """Caps in-flight requests; extra requests wait in a bounded queue or are shed with a 503."""
+
+    def __init__(self, name: str, max_in_flight: int, max_queue: int, queue_timeout: float):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.queued = 0
+        self.shed = 0
+
+    def _reject(self):
+        self.shed += 1
+        raise HTTPException(
+            status_code=503,
+            detail=f"{self.name} is overloaded, please retry",
+            headers={"Retry-After": str(max(1, math.ceil(self.queue_timeout)))},
+        )
+
+    async def acquire(self):
+        if self.semaphore.locked() and self.queued >= self.max_queue:
+            self._reject()
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self.semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._reject()
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self.semaphore.release()
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "shed": self.shed,
+        }
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets a single probe through once reset_timeout has passed."""
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self):
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self.probing = False
+        if self.state == CLOSED:
+            return
+        if self.state == HALF_OPEN and not self.probing:
+            self.probing = True
+            return
+        self.rejected += 1
+        retry_after = self.reset_timeout - (time.monotonic() - self.opened_at)
+        raise HTTPException(
+            status_code=503,
+            detail=f"{self.name} is unavailable, please retry",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+    def record_success(self):
+        self.failures = 0
+        self.state = CLOSED
+        self.probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != OPEN:
+                self.times_opened += 1
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self.probing = False
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+
+class Permit:
+    """A reserved slot on a backend and route class; release it exactly once."""
+
+    def __init__(self, guards: Tuple[Bulkhead, ...], breaker: CircuitBreaker):
+        self.guards = guards
+        self.breaker = breaker
+        self.released = False
+
+    def release(self, failed: bool):
+        if self.released:
+            return
+        self.released = True
+        if failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        for guard in self.guards:
+            guard.release()
+
+
+class Limiter:
+    """Bulkheads per backend and per (backend, route class), circuit breaker per (backend, route class)."""
+
+    def __init__(self, backends: Dict[str, Backend] = BACKENDS, route_classes: Dict[str, RouteClass] = ROUTE_CLASSES):
+        self.route_classes = route_classes
+        self.backends: Dict[str, Bulkhead] = {}
+        self.classes: Dict[Tuple[str, str], Bulkhead] = {}
+        self.breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+        for name, backend in backends.items():
+            self.backends[name] = Bulkhead(name, backend.max_in_flight, backend.max_queue, backend.queue_timeout)
+            for class_name, route_class in route_classes.items():
+                key = (name, class_name)
+                label = f"{name} ({class_name})"
+                self.classes[key] = Bulkhead(
+                    label, route_class.max_in_flight, route_class.max_queue, route_class.queue_timeout
+                )
+                self.breakers[key] = CircuitBreaker(label, backend.breaker_failures, backend.breaker_reset)
+
+    async def admit(self, backend: str, route_class: str = DEFAULT_ROUTE_CLASS) -> Permit:
+        key = (backend, route_class if route_class in self.route_classes else DEFAULT_ROUTE_CLASS)
+        breaker = self.breakers[key]
+        # Fail fast while the breaker is open, without taking a queue slot
+        breaker.allow()
+        acquired = []
+        try:
+            for guard in (self.classes[key], self.backends[backend]):
+                await guard.acquire()
+                acquired.append(guard)
+        except BaseException:
+            for guard in acquired:
+                guard.release()
+            # A half-open probe that never ran must not block the next one
+            breaker.probing = False
+            raise
+        return Permit(tuple(acquired), breaker)
+
+    def stats(self) -> Dict:
+        return {
+            name: {
+                **bulkhead.stats(),
+                "route_classes": {
+                    class_name: {**self.classes[(name, class_name)].stats(), "breaker": self.breakers[(name, class_name)].stats()}
+                    for class_name in self.route_classes
+                },
+            }
+            for name, bulkhead in self.backends.items()
+        }
@@ -0,0 +1,134 @@
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from .aggregate import order_detail  # noqa: E402
+from .auth import apply_identity, claims_cache, verify_request  # noqa: E402
+from .cache import response_cache, tags_for  # noqa: E402
+from .coalesce import coalesce_key, singleflight  # noqa: E402
+from .config import resolve_route  # noqa: E402
+from .proxy import BackendPool, build_upstream_headers, fetch, forward, upstream_url  # noqa: E402
+
+app = FastAPI(title="API Gateway")
+
+# CORS (adjust origins as needed)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+# Pooled keep-alive connections to every backend, shared by all requests
+pool = BackendPool()
+
+
+@app.on_event("startup")
+async def on_startup():
+    pool.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await pool.close()
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+@app.get("/gateway/metrics")
+def metrics():
+    return {
+        "response_cache": response_cache.stats(),
+        "claims_cache": claims_cache.stats(),
+        "singleflight": singleflight.stats(),
+        "backends": pool.limiter.stats() if pool.limiter else {},
+    }
+
+
+# Composite order page: order, items, products and payment in one round trip
+@app.get("/orders/{order_id}/detail")
+async def get_order_detail(order_id: int, request: Request):
+    headers = build_upstream_headers(request)
+    verified = verify_request(request)
+    apply_identity(headers, verified[1] if verified else None)
+    return await order_detail(pool, order_id, headers)
+
+
+async def fetch_cacheable(route, url: str, headers: dict, claims, tags: set):
+    """(cache generation of tags taken just before the upstream call, response)
+
+    The generation is taken inside the coalesced call, so a request that joins it after
+    a write gets the snapshot that matches the body, not a newer one.
+    """
+    async def call():
+        generation = response_cache.generation(tags)
+        return generation, await fetch(pool, route.backend, "GET", url, headers=headers, route_class=route.route_class)
+
+    key = coalesce_key(route, url, claims) if route.coalesce else None
+    if key is None:
+        return await call()
+    return await singleflight.do(key, call)
+
+
+async def cached_get(route, request: Request, headers: dict, claims, tags: set):
+    key = upstream_url(request)
+    if_none_match = request.headers.get("if-none-match")
+    entry = response_cache.get(key)
+    if entry is not None:
+        return response_cache.respond(entry, if_none_match, "HIT")
+
+    # Conditional headers are answered by the gateway, not the backend
+    headers.pop("if-none-match", None)
+    headers.pop("if-modified-since", None)
+    generation, upstream = await fetch_cacheable(route, key, headers, claims, tags)
+    if upstream.status_code != 200:
+        return Response(content=upstream.body, status_code=upstream.status_code, headers=upstream.headers)
+    # Not cached if a write invalidated any of its tags meanwhile: the body may be from before it
+    entry = response_cache.put(key, upstream.status_code, upstream.headers, upstream.body, tags, generation)
+    return response_cache.respond(entry, if_none_match, "MISS")
+
+
+# Everything else is proxied to the backend that owns the path prefix
+@app.api_route(
+    "/{path:path}",
+    methods=["GET", "POST", "PUT", "PATCH", "DELETE", "HEAD", "OPTIONS"],
+    include_in_schema=False,
+)
+async def proxy(path: str, request: Request):
+    route = resolve_route(request.url.path)
+    if route is None:
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+
+    # Verify the bearer token once here; backends trust the signed identity headers
+    headers = build_upstream_headers(request)
+    verified = verify_request(request)
+    apply_identity(headers, verified[1] if verified else None)
+    claims = verified[0] if verified else None
+
+    path = request.url.path
+    if route.cache and request.method == "GET":
+        tags = tags_for(path)
+        if tags is not None:
+            return await cached_get(route, request, headers, claims, tags)
+
+    if route.coalesce and request.method == "GET":
+        url = upstream_url(request)
+        key = coalesce_key(route, url, claims)
+        if key is not None:
+            upstream = await singleflight.do(
+                key, lambda: fetch(pool, route.backend, "GET", url, headers=headers, route_class=route.route_class)
+            )
+            return Response(content=upstream.body, status_code=upstream.status_code, headers=upstream.headers)
+
+    response = await forward(pool, route.backend, request, headers=headers, route_class=route.route_class)
+    # Not only /products writes: orders and reviews change cached product data too
+    if request.method != "GET" and response.status_code < 400:
+        response_cache.invalidate_for_write(request.method, path)
+    return response
@@ -0,0 +1,199 @@
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import httpx
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from .config import BACKENDS, DEFAULT_ROUTE_CLASS, Backend
+from .limits import Limiter, Permit
+
+# Headers that only apply to a single connection and must not be forwarded
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+}
+
+# Set again by the gateway's own server on the way out
+SERVER_HEADERS = {"date", "server"}
+
+# Upstream answers that count as a failure for the circuit breaker
+UNAVAILABLE_STATUSES = {502, 503, 504}
+
+
+class BackendPool:
+    """One pooled keep-alive client per backend, guarded by the backend's limiter."""
+
+    def __init__(self, backends: Dict[str, Backend] = BACKENDS):
+        self.backends = backends
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self.limiter: Optional[Limiter] = None
+
+    def start(self):
+        # Created here so the asyncio primitives belong to the server's event loop
+        self.limiter = Limiter(self.backends)
+        for name, backend in self.backends.items():
+            self.clients[name] = httpx.AsyncClient(
+                base_url=backend.base_url,
+                http2=backend.http2,
+                limits=httpx.Limits(
+                    max_connections=backend.max_connections,
+                    max_keepalive_connections=backend.max_keepalive_connections,
+                    keepalive_expiry=backend.keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(
+                    connect=backend.connect_timeout,
+                    read=backend.read_timeout,
+                    write=backend.write_timeout,
+                    pool=backend.pool_timeout,
+                ),
+                # Redirects are passed back to the client untouched
+                follow_redirects=False,
+            )
+
+    async def close(self):
+        for client in self.clients.values():
+            await client.aclose()
+        self.clients.clear()
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        return self.clients[name]
+
+
+def _has_body(request: Request) -> bool:
+    return "content-length" in request.headers or "transfer-encoding" in request.headers
+
+
+def upstream_url(request: Request) -> str:
+    # Keep the path exactly as the client encoded it
+    raw_path = request.scope.get("raw_path")
+    path = raw_path.decode("latin-1") if raw_path else request.url.path
+    query = request.url.query
+    return f"{path}?{query}" if query else path
+
+
+def build_upstream_headers(request: Request) -> Dict[str, str]:
+    headers = {
+        key: value
+        for key, value in request.headers.items()
+        if key.lower() not in HOP_BY_HOP_HEADERS and key.lower() != "host"
+    }
+    # Always appended: backends key per-client limits on the last entry, which only the gateway writes
+    client_host = request.client.host if request.client else "unknown"
+    forwarded_for = request.headers.get("x-forwarded-for")
+    headers["x-forwarded-for"] = f"{forwarded_for}, {client_host}" if forwarded_for else client_host
+    headers["x-forwarded-proto"] = request.url.scheme
+    if "host" in request.headers:
+        headers["x-forwarded-host"] = request.headers["host"]
+    return headers
+
+
+def build_downstream_headers(response: httpx.Response) -> Dict[str, str]:
+    return {
+        key: value
+        for key, value in response.headers.items()
+        if key.lower() not in HOP_BY_HOP_HEADERS and key.lower() not in SERVER_HEADERS
+    }
+
+
+@dataclass
+class BufferedResponse:
+    status_code: int
+    headers: Dict[str, str]
+    body: bytes
+
+
+def upstream_error(backend: str, exc: httpx.HTTPError) -> HTTPException:
+    if isinstance(exc, httpx.TimeoutException):
+        return HTTPException(status_code=504, detail=f"Upstream {backend} timed out")
+    return HTTPException(status_code=502, detail=f"Upstream {backend} unavailable")
+
+
+async def fetch(
+    pool: BackendPool,
+    backend: str,
+    method: str,
+    url: str,
+    headers: Optional[Dict[str, str]] = None,
+    route_class: str = DEFAULT_ROUTE_CLASS,
+) -> BufferedResponse:
+    """Bodyless upstream call whose response is read fully, for caching and fan-out."""
+    client = pool.client(backend)
+    permit = await pool.limiter.admit(backend, route_class)
+    failed = True
+    try:
+        upstream_response = await client.send(client.build_request(method, url, headers=headers), stream=True)
+        try:
+            body = b"".join([chunk async for chunk in upstream_response.aiter_raw()])
+        finally:
+            await upstream_response.aclose()
+        failed = upstream_response.status_code in UNAVAILABLE_STATUSES
+    except httpx.HTTPError as exc:
+        raise upstream_error(backend, exc)
+    finally:
+        permit.release(failed)
+    return BufferedResponse(
+        status_code=upstream_response.status_code,
+        headers=build_downstream_headers(upstream_response),
+        body=body,
+    )
+
+
+async def forward(
+    pool: BackendPool,
+    backend: str,
+    request: Request,
+    headers: Optional[Dict[str, str]] = None,
+    route_class: str = DEFAULT_ROUTE_CLASS,
+):
+    client = pool.client(backend)
+    upstream_request = client.build_request(
+        request.method,
+        upstream_url(request),
+        headers=headers if headers is not None else build_upstream_headers(request),
+        # Stream the request body through without buffering it
+        content=request.stream() if _has_body(request) else None,
+    )
+
+    permit = await pool.limiter.admit(backend, route_class)
+    try:
+        upstream_response = await client.send(upstream_request, stream=True)
+    except BaseException as exc:
+        permit.release(failed=isinstance(exc, httpx.HTTPError))
+        if isinstance(exc, httpx.HTTPError):
+            raise upstream_error(backend, exc)
+        raise
+
+    failed = upstream_response.status_code in UNAVAILABLE_STATUSES
+
+    async def close():
+        await upstream_response.aclose()
+        permit.release(failed)
+
+    # Stream the raw (still encoded) response body back; the slot is held until the body is done
+    return StreamingResponse(
+        _stream(upstream_response, permit, failed),
+        status_code=upstream_response.status_code,
+        headers=build_downstream_headers(upstream_response),
+        background=BackgroundTask(close),
+    )
+
+
+async def _stream(upstream_response: httpx.Response, permit: Permit, failed: bool):
+    try:
+        async for chunk in upstream_response.aiter_raw():
+            yield chunk
+    except httpx.HTTPError:
+        failed = True
+        raise
+    finally:
+        # Also runs when the client disconnects mid-body and the background task is skipped
+        await upstream_response.aclose()
+        permit.release(failed)
@@ -0,0 +1,220 @@
+# app/analytics.py
+"""Seller revenue analytics from daily rollups, so a report reads days, never orders.
+
+Triggers on orders and order_items keep seller_daily_orders and seller_daily_product_sales
+current in the writing transaction. Cancelled orders drop out when they are cancelled.
+Rebuild both tables from orders (holds the write lock while it runs):
+
+    python -m app.analytics backfill
+"""
+import sys
+import time
+from datetime import date, timedelta
+from typing import Dict, List
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models import SellerDailyOrders, SellerDailyProductSales
+
+GRANULARITIES = {
+    "day": "day",
+    "week": "date(day, 'weekday 0', '-6 days')",  # Monday of the week
+    "month": "strftime('%Y-%m-01', day)",
+}
+# Longest range a report may cover; its cost grows with days, not orders
+MAX_RANGE_DAYS = 3 * 366
+TOP_PRODUCTS = 10
+
+COUNTED = "COALESCE({ref}.status, 'CREATED') != 'CANCELLED' AND {ref}.seller_user_id IS NOT NULL"
+
+
+def _day(ref: str) -> str:
+    return f"date(COALESCE({ref}.created_at, 'now'))"
+
+
+def _order_sql(ref: str, sign: int) -> str:
+    return f"""INSERT INTO seller_daily_orders(seller_user_id, day, orders, subtotal, discount, total)
+        SELECT {ref}.seller_user_id, {_day(ref)}, {sign}, {sign} * COALESCE({ref}.subtotal, 0),
+            {sign} * COALESCE({ref}.discount_amount, 0), {sign} * COALESCE({ref}.total, 0)
+        WHERE {COUNTED.format(ref=ref)}
+        ON CONFLICT(seller_user_id, day) DO UPDATE SET
+            orders = orders + excluded.orders, subtotal = subtotal + excluded.subtotal,
+            discount = discount + excluded.discount, total = total + excluded.total;"""
+
+
+def _sales_upsert(select_sql: str) -> str:
+    return f"""INSERT INTO seller_daily_product_sales(seller_user_id, day, product_id, units, revenue)
+        {select_sql}
+        ON CONFLICT(seller_user_id, day, product_id) DO UPDATE SET
+            units = units + excluded.units, revenue = revenue + excluded.revenue;"""
+
+
+def _order_items_sql(ref: str, sign: int) -> str:
+    # Every item of one order, e.g. when it is cancelled or moves to another seller or day
+    return _sales_upsert(f"""SELECT {ref}.seller_user_id, {_day(ref)}, i.product_id, {sign} * SUM(COALESCE(i.quantity, 0)),
+            {sign} * SUM(COALESCE(i.quantity, 0) * COALESCE(i.unit_price, 0))
+        FROM order_items i WHERE i.order_id = {ref}.id AND i.product_id IS NOT NULL AND {COUNTED.format(ref=ref)}
+        GROUP BY i.product_id""")
+
+
+def _item_sql(ref: str, sign: int) -> str:
+    return _sales_upsert(f"""SELECT o.seller_user_id, {_day("o")}, {ref}.product_id, {sign} * COALESCE({ref}.quantity, 0),
+            {sign} * COALESCE({ref}.quantity, 0) * COALESCE({ref}.unit_price, 0)
+        FROM orders o WHERE o.id = {ref}.order_id AND {ref}.product_id IS NOT NULL AND {COUNTED.format(ref="o")}""")
+
+
+ROLLUP_TRIGGERS_DDL = [
+    f"""CREATE TRIGGER IF NOT EXISTS seller_rollups_orders_ai AFTER INSERT ON orders BEGIN
+        {_order_sql("new", 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS seller_rollups_orders_au
+        AFTER UPDATE OF status, seller_user_id, created_at, subtotal, discount_amount, total ON orders BEGIN
+        {_order_sql("old", -1)}
+        {_order_sql("new", 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS seller_rollups_orders_items_au
+        AFTER UPDATE OF status, seller_user_id, created_at ON orders BEGIN
+        {_order_items_sql("old", -1)}
+        {_order_items_sql("new", 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS seller_rollups_orders_ad AFTER DELETE ON orders BEGIN
+        {_order_sql("old", -1)}
+        {_order_items_sql("old", -1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS seller_rollups_items_ai AFTER INSERT ON order_items BEGIN
+        {_item_sql("new", 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS seller_rollups_items_au
+        AFTER UPDATE OF order_id, product_id, quantity, unit_price ON order_items BEGIN
+        {_item_sql("old", -1)}
+        {_item_sql("new", 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS seller_rollups_items_ad AFTER DELETE ON order_items BEGIN
+        {_item_sql("old", -1)}
+    END""",
+]
+
+BACKFILL_SQL = [
+    "DELETE FROM seller_daily_orders",
+    "DELETE FROM seller_daily_product_sales",
+    f"""INSERT INTO seller_daily_orders(seller_user_id, day, orders, subtotal, discount, total)
+        SELECT seller_user_id, {_day("orders")}, COUNT(*), SUM(COALESCE(subtotal, 0)),
+            SUM(COALESCE(discount_amount, 0)), SUM(COALESCE(total, 0))
+        FROM orders WHERE {COUNTED.format(ref="orders")} GROUP BY 1, 2""",
+    f"""INSERT INTO seller_daily_product_sales(seller_user_id, day, product_id, units, revenue)
+        SELECT o.seller_user_id, {_day("o")}, i.product_id, SUM(COALESCE(i.quantity, 0)),
+            SUM(COALESCE(i.quantity, 0) * COALESCE(i.unit_price, 0))
+        FROM order_items i JOIN orders o ON o.id = i.order_id
+        WHERE i.product_id IS NOT NULL AND {COUNTED.format(ref="o")} GROUP BY 1, 2, 3""",
+]
+
+
+def init_rollups(conn):
+    """Migration step: the rollup tables and triggers, and rollups for the orders placed before them"""
+    # Created here too: the backfill CLI never runs create_all
+    for table in (SellerDailyOrders.__table__, SellerDailyProductSales.__table__):
+        table.create(conn, checkfirst=True)
+    for statement in ROLLUP_TRIGGERS_DDL + BACKFILL_SQL:
+        conn.execute(text(statement))
+
+
+def backfill(engine) -> Dict[str, int]:
+    """Rebuilds both rollups from orders and order_items in one transaction, creating them if missing"""
+    with engine.connect() as conn:
+        if conn.dialect.name == "sqlite":
+            conn.exec_driver_sql("BEGIN IMMEDIATE")  # no order can change between the DELETE and the INSERTs
+        init_rollups(conn)
+        counts = {
+            table: conn.execute(text(f"SELECT COUNT(*) FROM {table}")).scalar()
+            for table in ("seller_daily_orders", "seller_daily_product_sales")
+        }
+        conn.commit()
+    return counts
+
+
+def periods(date_from: date, date_to: date, granularity: str) -> List[str]:
+    """Every period start in the range, so days without sales are reported as zeros"""
+    if granularity == "day":
+        start, step = date_from, lambda d: d + timedelta(days=1)
+    elif granularity == "week":
+        start, step = date_from - timedelta(days=date_from.weekday()), lambda d: d + timedelta(days=7)
+    else:
+        start = date_from.replace(day=1)
+        step = lambda d: (d.replace(day=28) + timedelta(days=4)).replace(day=1)
+    result = []
+    while start <= date_to:
+        result.append(start.isoformat())
+        start = step(start)
+    return result
+
+
+def seller_report(db: Session, seller_user_id: int, date_from: date, date_to: date, granularity: str) -> Dict:
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of: {', '.join(GRANULARITIES)}")
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    if (date_to - date_from).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_RANGE_DAYS} days")
+
+    period = GRANULARITIES[granularity]
+    params = {"seller": seller_user_id, "date_from": date_from.isoformat(), "date_to": date_to.isoformat()}
+    in_range = "seller_user_id = :seller AND day BETWEEN :date_from AND :date_to"
+    buckets = {
+        key: {"period": key, "orders": 0, "units": 0, "revenue": 0.0, "discount": 0.0, "total": 0.0}
+        for key in periods(date_from, date_to, granularity)
+    }
+    for key, orders, discount, total in db.execute(text(
+        f"SELECT {period}, SUM(orders), SUM(discount), SUM(total) FROM seller_daily_orders "
+        f"WHERE {in_range} GROUP BY 1"
+    ), params):
+        buckets[key].update(orders=orders, discount=round(discount, 2), total=round(total, 2))
+    for key, units, revenue in db.execute(text(
+        f"SELECT {period}, SUM(units), SUM(revenue) FROM seller_daily_product_sales "
+        f"WHERE {in_range} GROUP BY 1"
+    ), params):
+        buckets[key].update(units=units, revenue=round(revenue, 2))
+
+    top_products = [
+        {"product_id": product_id, "units": units, "revenue": round(revenue, 2)}
+        for product_id, units, revenue in db.execute(text(
+            "SELECT product_id, SUM(units), SUM(revenue) FROM seller_daily_product_sales "
+            f"WHERE {in_range} GROUP BY product_id HAVING SUM(units) != 0 ORDER BY 3 DESC, 1 LIMIT {TOP_PRODUCTS}"
+        ), params)
+    ]
+    rows = list(buckets.values())
+    totals = {
+        "orders": sum(row["orders"] for row in rows),
+        "units": sum(row["units"] for row in rows),
+        "revenue": round(sum(row["revenue"] for row in rows), 2),
+        "discount": round(sum(row["discount"] for row in rows), 2),
+        "total": round(sum(row["total"] for row in rows), 2),
+    }
+    return {
+        "seller_user_id": seller_user_id,
+        "date_from": date_from,
+        "date_to": date_to,
+        "granularity": granularity,
+        "periods": rows,
+        "totals": totals,
+        "top_products": top_products,
+    }
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv != ["backfill"]:
+        print("usage: python -m app.analytics backfill", file=sys.stderr)
+        return 2
+    from app.database import engine
+
+    started = time.perf_counter()
+    counts = backfill(engine)
+    print(f"Rebuilt seller rollups in {time.perf_counter() - started:.2f}s: "
+          + ", ".join(f"{table} {count} rows" for table, count in counts.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# app/async_crud.py
+"""The reads behind the busiest GET endpoints; crud keeps the writes and the product reads.
+
+They take an AsyncSession and await every query, so the endpoints using them run on
+the event loop instead of holding a threadpool worker for each request.
+"""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import CART_SORT_KEYS, ORDER_SORT_KEYS, REVIEW_SORT_KEYS
+from app.models import Cart, CartItem, Order, OrderItem, Payment, ProductRating, Review
+from shared.pagination import paginate_async
+
+
+async def _first(db: AsyncSession, statement):
+    return await db.scalar(statement.limit(1))
+
+
+async def get_cart(db: AsyncSession, cart_id: int):
+    return await db.get(Cart, cart_id)
+
+async def get_carts(db: AsyncSession, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = "id"):
+    return await paginate_async(db, select(Cart), CART_SORT_KEYS, Cart.id, sort, skip, limit, cursor)
+
+async def get_active_cart_by_user(db: AsyncSession, user_id: int):
+    return await _first(db, select(Cart).where(Cart.user_id == user_id, Cart.status == "ACTIVE"))
+
+async def get_cart_items_by_cart_id(db: AsyncSession, cart_id: int):
+    return (await db.scalars(select(CartItem).where(CartItem.cart_id == cart_id))).all()
+
+
+async def get_order(db: AsyncSession, order_id: int, options=()):
+    # options must load eagerly (selectinload): an AsyncSession cannot lazy load
+    return await _first(db, select(Order).options(*options).where(Order.id == order_id))
+
+async def get_orders(db: AsyncSession, skip: int = 0, limit: int = 10, user_id: int = None, cursor: str = None, sort: str = "id", options=()):
+    statement = select(Order).options(*options)
+    if user_id:
+        statement = statement.where(Order.user_id == user_id)
+    return await paginate_async(db, statement, ORDER_SORT_KEYS, Order.id, sort, skip, limit, cursor)
+
+
+async def get_order_item(db: AsyncSession, order_item_id: int):
+    return await db.get(OrderItem, order_item_id)
+
+async def get_order_items_by_order(db: AsyncSession, order_id: int):
+    return (await db.scalars(select(OrderItem).where(OrderItem.order_id == order_id))).all()
+
+
+async def get_payment_by_order(db: AsyncSession, order_id: int):
+    return await _first(db, select(Payment).where(Payment.order_id == order_id))
+
+
+async def get_review(db: AsyncSession, review_id: int):
+    return await db.get(Review, review_id)
+
+async def get_reviews_by_product(db: AsyncSession, product_id: int, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = "id"):
+    statement = select(Review).where(Review.product_id == product_id)
+    return await paginate_async(db, statement, REVIEW_SORT_KEYS, Review.id, sort, skip, limit, cursor)
+
+async def get_product_rating(db: AsyncSession, product_id: int):
+    return await db.get(ProductRating, product_id)
@@ -0,0 +1,178 @@
+# app/bulk_import.py
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Dict, List, Optional
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models import Product
+from app.schemas import ProductCreate
+
+CSV = "csv"
+NDJSON = "ndjson"
+
+# Rows per executemany / transaction
+BATCH_SIZE = 1000
+
+# A quoted field left open would otherwise swallow the rest of the file
+MAX_RECORD_LINES = 100
+
+# Only the first errors are reported back; the counts always cover the whole file
+MAX_REPORTED_ERRORS = 100
+
+
+def detect_format(content_type: Optional[str], requested: Optional[str]) -> str:
+    if requested:
+        if requested not in (CSV, NDJSON):
+            raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+        return requested
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return CSV
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-lines"):
+        return NDJSON
+    raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass ?format=")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    # Decodes incrementally so a multi-byte character split across chunks survives
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[tuple]:
+    """Yields (line number, fields or error message); quoted fields may span lines"""
+    record, start, number = [], 0, 0
+    async for line in lines:
+        number += 1
+        if not record:
+            start = number
+        record.append(line)
+        text = "\n".join(record)
+        # A record is complete once its quotes are balanced
+        if text.count('"') % 2:
+            if len(record) < MAX_RECORD_LINES:
+                continue
+            record = []
+            yield start, f"Unterminated quoted field spanning more than {MAX_RECORD_LINES} lines"
+            continue
+        record = []
+        if text.strip():
+            yield start, next(csv.reader([text]))
+    if record:
+        yield start, "Unterminated quoted field"
+
+
+async def iter_rows(fmt: str, chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple]:
+    """Yields (line number, dict or error message)"""
+    lines = iter_lines(chunks)
+    if fmt == NDJSON:
+        number = 0
+        async for line in lines:
+            number += 1
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield number, f"Invalid JSON: {e}"
+                continue
+            yield number, row if isinstance(row, dict) else "Each line must be a JSON object"
+        return
+
+    header = None
+    async for number, fields in iter_csv_records(lines):
+        if isinstance(fields, str):
+            yield number, fields
+            continue
+        if header is None:
+            header = [name.strip() for name in fields]
+            continue
+        if len(fields) != len(header):
+            yield number, f"Expected {len(header)} columns, got {len(fields)}"
+            continue
+        # Empty cells are missing values, not empty strings
+        yield number, {name: value for name, value in zip(header, fields) if value != ""}
+
+
+def validate(row: Dict, seller: Dict) -> Dict:
+    product = ProductCreate(**row)
+    values = product.dict(include={"name", "description", "price", "condition", "brand", "stock", "active"})
+    if values["active"] is None:
+        values["active"] = True
+    values["seller_user_id"] = seller.get("sub")
+    values["seller_username"] = seller.get("fullname")
+    return values
+
+
+def insert_batch(db: Session, batch: List[tuple]) -> List[tuple]:
+    """Inserts (line, values) pairs in one transaction; returns the rows that failed"""
+    try:
+        db.execute(insert(Product), [values for _, values in batch])
+        db.commit()
+        return []
+    except SQLAlchemyError:
+        db.rollback()
+
+    # Retry one by one so a single bad row does not sink the batch
+    failed = []
+    for line, values in batch:
+        try:
+            db.execute(insert(Product), values)
+            db.commit()
+        except SQLAlchemyError as e:
+            db.rollback()
+            failed.append((line, str(e.orig if hasattr(e, "orig") else e)))
+    return failed
+
+
+def format_error(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors())
+
+
+async def import_products(db: Session, fmt: str, chunks: AsyncIterator[bytes], seller: Dict) -> Dict:
+    result = {"inserted": 0, "failed": 0, "errors": [], "errors_truncated": False}
+
+    def record_error(line: int, message: str):
+        result["failed"] += 1
+        if len(result["errors"]) < MAX_REPORTED_ERRORS:
+            result["errors"].append({"line": line, "error": message})
+        else:
+            result["errors_truncated"] = True
+
+    async def flush(batch):
+        failed = await run_in_threadpool(insert_batch, db, batch)
+        result["inserted"] += len(batch) - len(failed)
+        for line, message in failed:
+            record_error(line, message)
+
+    batch = []
+    async for line, row in iter_rows(fmt, chunks):
+        if isinstance(row, str):
+            record_error(line, row)
+            continue
+        try:
+            batch.append((line, validate(row, seller)))
+        except ValidationError as e:
+            record_error(line, format_error(e))
+            continue
+        if len(batch) >= BATCH_SIZE:
+            await flush(batch)
+            batch = []
+    if batch:
+        await flush(batch)
+    return result
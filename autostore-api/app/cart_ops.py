@@ -0,0 +1,105 @@
+# app/cart_ops.py
+"""Cart item upserts keyed on (cart_id, product_id), one line per product per cart."""
+from typing import Dict, List
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, select, update
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from app.models import Cart, CartItem, Product
+from app.schemas import CartItemOperation
+
+# Migration step: fold duplicate lines into the oldest one, then enforce uniqueness
+DEDUPE_CART_ITEMS = [
+    """UPDATE cart_items SET quantity = (
+        SELECT SUM(d.quantity) FROM cart_items d
+        WHERE d.cart_id = cart_items.cart_id AND d.product_id = cart_items.product_id
+    ) WHERE id IN (SELECT MIN(id) FROM cart_items GROUP BY cart_id, product_id HAVING COUNT(*) > 1)""",
+    "DELETE FROM cart_items WHERE id NOT IN (SELECT MIN(id) FROM cart_items GROUP BY cart_id, product_id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ux_cart_items_cart_id_product_id ON cart_items (cart_id, product_id)",
+]
+
+
+def _upsert(add: bool):
+    stmt = insert(CartItem)
+    quantity = CartItem.quantity + stmt.excluded.quantity if add else stmt.excluded.quantity
+    return stmt.on_conflict_do_update(
+        index_elements=[CartItem.cart_id, CartItem.product_id],
+        set_={"quantity": quantity, "unit_price": stmt.excluded.unit_price},
+    )
+
+
+def add_item(db: Session, cart_id: int, product_id: int, quantity: int, unit_price: float) -> CartItem:
+    """Adds quantity to the cart's line for the product, creating it if needed"""
+    stmt = _upsert(add=True).values(cart_id=cart_id, product_id=product_id, quantity=quantity, unit_price=unit_price)
+    item = db.scalars(stmt.returning(CartItem), execution_options={"populate_existing": True}).one()
+    db.commit()
+    return item
+
+
+def fold(operations: List[CartItemOperation]) -> Dict[int, tuple]:
+    """Net effect per product of operations applied in order: ("add", n) or ("set", n); set 0 removes"""
+    net: Dict[int, tuple] = {}
+    for op in operations:
+        kind, current = net.get(op.product_id, ("add", 0))
+        if op.op == "add":
+            if not op.quantity or op.quantity <= 0:
+                raise HTTPException(status_code=400, detail=f"add for product {op.product_id} needs a positive quantity")
+            net[op.product_id] = (kind, current + op.quantity)
+        elif op.op == "set":
+            if op.quantity is None or op.quantity < 0:
+                raise HTTPException(status_code=400, detail=f"set for product {op.product_id} needs a quantity of 0 or more")
+            net[op.product_id] = ("set", op.quantity)
+        else:
+            net[op.product_id] = ("set", 0)
+    return net
+
+
+def apply_batch(db: Session, cart_id: int, operations: List[CartItemOperation]) -> Cart:
+    """Applies add / set / remove operations to an ACTIVE cart in one transaction.
+
+    Operations are folded per product first, so whatever the batch size this is one
+    cart UPDATE, one product SELECT and at most two upserts and one DELETE.
+    """
+    net = fold(operations)
+    prices = {op.product_id: op.unit_price for op in operations if op.unit_price is not None}
+    try:
+        # Taking the write lock while the cart is still ACTIVE keeps a concurrent checkout from missing these lines
+        touched = db.execute(
+            update(Cart).where(Cart.id == cart_id, Cart.status == "ACTIVE").values(version=Cart.version + 1)
+            .execution_options(synchronize_session=False)
+        )
+        if not touched.rowcount:
+            cart = db.get(Cart, cart_id)
+            if cart is None:
+                raise HTTPException(status_code=404, detail="Cart not found")
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Cart is {cart.status}, not ACTIVE")
+
+        current_prices = dict(db.execute(select(Product.id, Product.price).where(Product.id.in_(net))).all())
+        missing = sorted(set(net) - set(current_prices))
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Products not found: {', '.join(map(str, missing))}")
+
+        def row(product_id, quantity):
+            # A line is priced as given, else at the product's current price
+            return {"cart_id": cart_id, "product_id": product_id, "quantity": quantity,
+                    "unit_price": prices.get(product_id, current_prices[product_id])}
+
+        adds = [row(product_id, quantity) for product_id, (kind, quantity) in net.items() if kind == "add" and quantity]
+        sets = [row(product_id, quantity) for product_id, (kind, quantity) in net.items() if kind == "set" and quantity]
+        removed = [product_id for product_id, (kind, quantity) in net.items() if kind == "set" and not quantity]
+        if adds:
+            db.execute(_upsert(add=True), adds)
+        if sets:
+            db.execute(_upsert(add=False), sets)
+        if removed:
+            db.execute(
+                delete(CartItem).where(CartItem.cart_id == cart_id, CartItem.product_id.in_(removed))
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return db.get(Cart, cart_id, populate_existing=True)
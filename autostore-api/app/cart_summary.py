@@ -0,0 +1,107 @@
+# app/cart_summary.py
+"""Cart totals computed with one aggregate query and cached per cart.
+
+carts.version is bumped by triggers on every cart_items write, whichever code path
+makes it; a cached summary is served only while the cart is still at the version it
+was computed for, so the hot path is a primary key lookup.
+"""
+import os
+import threading
+from typing import Optional
+
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.fast_json import dumps
+from app.models import Cart, CartItem, Product
+from app.product_cache import LRU
+
+CART_SUMMARY_MAX_ENTRIES = int(os.getenv("CART_SUMMARY_MAX_ENTRIES", "10000"))
+# Idle summaries are dropped after this many seconds
+CART_SUMMARY_TTL = float(os.getenv("CART_SUMMARY_TTL", "600"))
+
+VERSION_TRIGGERS_DDL = [
+    """CREATE TRIGGER IF NOT EXISTS cart_items_version_ai AFTER INSERT ON cart_items BEGIN
+        UPDATE carts SET version = version + 1 WHERE id = new.cart_id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS cart_items_version_au AFTER UPDATE ON cart_items BEGIN
+        UPDATE carts SET version = version + 1 WHERE id IN (old.cart_id, new.cart_id);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS cart_items_version_ad AFTER DELETE ON cart_items BEGIN
+        UPDATE carts SET version = version + 1 WHERE id = old.cart_id;
+    END""",
+]
+
+
+def add_cart_versions(conn):
+    """Migration step: carts.version (create_all only adds it to new databases) and its triggers"""
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info(carts)"))}
+    if "version" not in columns:
+        conn.execute(text("ALTER TABLE carts ADD COLUMN version INTEGER NOT NULL DEFAULT 0"))
+    for statement in VERSION_TRIGGERS_DDL:
+        conn.execute(text(statement))
+
+
+def compute(db: Session, cart_id: int, version: int) -> dict:
+    """Item count, subtotal and per-seller subtotals, from the prices recorded on the cart items"""
+    rows = db.execute(
+        select(
+            Product.seller_user_id,
+            func.count(CartItem.id),
+            func.coalesce(func.sum(CartItem.quantity), 0),
+            func.coalesce(func.sum(CartItem.quantity * CartItem.unit_price), 0.0),
+        )
+        .join(Product, Product.id == CartItem.product_id, isouter=True)
+        .where(CartItem.cart_id == cart_id)
+        .group_by(Product.seller_user_id)
+        .order_by(Product.seller_user_id)
+    ).all()
+    sellers = [
+        {"seller_user_id": seller_user_id, "line_count": lines, "item_count": items, "subtotal": round(float(subtotal), 2)}
+        for seller_user_id, lines, items, subtotal in rows
+    ]
+    return {
+        "cart_id": cart_id,
+        "version": version,
+        "line_count": sum(seller["line_count"] for seller in sellers),
+        "item_count": sum(seller["item_count"] for seller in sellers),
+        "subtotal": round(float(sum(subtotal for *_, subtotal in rows)), 2),
+        "sellers": sellers,
+    }
+
+
+class CartSummaryCache:
+    """Per-worker map of cart id -> (version, serialized CartSummaryResponse)
+
+    Read from sync handlers on threadpool workers, so the LRU is only touched under the lock;
+    queries and serialization run outside it.
+    """
+
+    def __init__(self, max_entries: int = CART_SUMMARY_MAX_ENTRIES, ttl: float = CART_SUMMARY_TTL):
+        self.entries = LRU(max_entries, ttl)
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, db: Session, cart_id: int) -> Optional[bytes]:
+        """The summary body, or None if there is no such cart"""
+        version = db.scalar(select(Cart.version).where(Cart.id == cart_id))
+        if version is None:
+            with self.lock:
+                self.entries.pop(cart_id)
+            return None
+        with self.lock:
+            cached = self.entries.get(cart_id)
+            if cached is not None and cached[0] == version:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        # Version is read first: a write landing in between bumps it past what is stored here
+        body = dumps(compute(db, cart_id, version), plain=False)  # misses only; same encoder as FastAPI
+        with self.lock:
+            self.entries.set(cart_id, (version, body))
+        return body
+
+
+cart_summary_cache = CartSummaryCache()
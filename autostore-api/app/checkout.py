@@ -0,0 +1,117 @@
+# app/checkout.py
+"""Cart checkout in one transaction and a fixed number of statements, whatever the cart size.
+
+Latency against the old client-driven flow (GET cart, GET items, POST /orders/):
+
+    python -m benchmarks.checkout
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app import discounts, reservations
+from app.models import Cart, CartItem, Order, OrderItem, Product
+
+
+def checkout_cart(db: Session, cart_id: int, user_id: int, discount_code: Optional[str] = None) -> List[Order]:
+    """Turns an ACTIVE cart into one CREATED order per seller, at current product prices.
+
+    Statements: flip the cart, read its items with their prices, take stock, redeem the
+    discount code, insert the orders, their items and the stock reservations; then commit.
+    All or nothing.
+    """
+    try:
+        # Claiming the cart first takes the write lock and stops a second checkout of it
+        claimed = db.execute(
+            update(Cart)
+            .where(Cart.id == cart_id, Cart.user_id == user_id, Cart.status == "ACTIVE")
+            .values(status="CHECKED_OUT")
+            .returning(Cart.id)
+            .execution_options(synchronize_session=False)
+        ).first()
+        if claimed is None:
+            cart = db.get(Cart, cart_id)
+            if cart is None or cart.user_id != user_id:
+                raise HTTPException(status_code=404, detail="Cart not found")
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Cart is {cart.status}, not ACTIVE")
+
+        # Prices are locked here, from the products rather than whatever the cart recorded
+        lines = db.execute(
+            select(CartItem.product_id, CartItem.quantity, Product.price, Product.seller_user_id, Product.active)
+            .join(Product, Product.id == CartItem.product_id, isouter=True)
+            .where(CartItem.cart_id == cart_id)
+            .order_by(CartItem.id)
+        ).all()
+        if not lines:
+            raise HTTPException(status_code=400, detail="Cart is empty")
+        unavailable = sorted({line.product_id for line in lines if line.price is None or line.active is False})
+        if unavailable:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Products no longer available: {', '.join(map(str, unavailable))}",
+            )
+
+        # Orders are grouped by seller, so every product needs one
+        sellerless = sorted({line.product_id for line in lines if line.seller_user_id is None})
+        if sellerless:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Seller user ID is missing for products: {', '.join(map(str, sellerless))}",
+            )
+
+        quantities = reservations.requested_quantities(lines)
+        reservations.take_stock(db, quantities)
+
+        by_seller: Dict[int, list] = defaultdict(list)
+        for line in lines:
+            by_seller[line.seller_user_id].append(line)
+        sellers = sorted(by_seller)
+        subtotals = [round(sum(line.price * line.quantity for line in by_seller[seller]), 2) for seller in sellers]
+
+        code, discount = None, 0.0
+        if discount_code:
+            code, discount = discounts.apply_code(db, discount_code, round(sum(subtotals), 2))
+        shares = split_discount(discount, subtotals)
+        order_rows = []
+        for index, seller_user_id in enumerate(sellers):
+            order_rows.append({
+                "user_id": user_id, "seller_user_id": seller_user_id, "subtotal": subtotals[index], "tax": 0.0,
+                "shipping_cost": 0.0, "discount_amount": shares[index],
+                "total": round(subtotals[index] - shares[index], 2), "status": "CREATED",
+                # The one redemption is recorded on the first order, so cancelling it gives the use back
+                "discount_code": code if index == 0 else None,
+            })
+        order_ids = db.scalars(
+            insert(Order).returning(Order.id, sort_by_parameter_order=True), order_rows
+        ).all()
+
+        order_for_seller = dict(zip(sellers, order_ids))
+        db.execute(insert(OrderItem), [
+            {"order_id": order_for_seller[line.seller_user_id], "product_id": line.product_id,
+             "quantity": line.quantity, "unit_price": line.price}
+            for line in lines
+        ])
+
+        held = defaultdict(int)
+        for line in lines:
+            held[(order_for_seller[line.seller_user_id], line.product_id)] += line.quantity
+        reservations.hold_many(db, held)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return db.scalars(select(Order).where(Order.id.in_(order_ids)).order_by(Order.id)).all()
+
+
+def split_discount(discount: float, subtotals: List[float]) -> List[float]:
+    """Shares of a cart-wide discount per order, proportional to subtotals and summing to it exactly"""
+    total = sum(subtotals)
+    if not discount or not total:
+        return [0.0] * len(subtotals)
+    shares = [round(discount * subtotal / total, 2) for subtotal in subtotals[:-1]]
+    shares.append(round(discount - sum(shares), 2))
+    return shares
+
@@ -3,9 +3,17 @@ from http.client import HTTPException
 import logging
 from sqlalchemy.orm import Session
 import stripe
-from app.models import Cart, CartItem, Order, OrderItem, Payment, Product
-from app.schemas import CartItemCreate, OrderCreate, OrderItemCreate, OrderUpdate, PaymentCreate, ProductCreate, CartCreate, CartUpdate, CartResponse
+from app import cart_ops, reservations
+from app.models import Cart, CartItem, DiscountCode, Order, OrderItem, Payment, Product, Review
+from app.schemas import CartItemCreate, OrderCreate, OrderItemCreate, OrderUpdate, PaymentCreate, ProductCreate, CartCreate, CartUpdate, CartResponse, DiscountCodeCreate, DiscountCodeUpdate, ReviewCreate, ReviewUpdate
 from fastapi import HTTPException, status
+from shared.pagination import paginate
+
+# Keys list endpoints can be sorted (and cursor-paginated) by, always tie-broken by id
+PRODUCT_SORT_KEYS = {"id": Product.id, "added_at": Product.added_at, "price": Product.price}
+CART_SORT_KEYS = {"id": Cart.id, "created_at": Cart.created_at}
+ORDER_SORT_KEYS = {"id": Order.id, "created_at": Order.created_at, "total": Order.total}
+REVIEW_SORT_KEYS = {"id": Review.id}
 
 def create_product(db: Session, product: ProductCreate):
     # Extract seller_user_id explicitly
@@ -25,8 +33,12 @@ def create_product(db: Session, product: ProductCreate):
 def get_product(db: Session, product_id: int):
     return db.query(Product).filter(Product.id == product_id).first()
 
-def get_products(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(Product).offset(skip).limit(limit).all()
+def get_products(db: Session, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = "id"):
+    return paginate(db.query(Product), PRODUCT_SORT_KEYS, Product.id, sort, skip, limit, cursor)
+
+def get_products_by_ids(db: Session, product_ids: list):
+    # One IN query instead of a lookup per product
+    return db.query(Product).filter(Product.id.in_(product_ids)).order_by(Product.id).all()
 
 def update_product(db: Session, product_id: int, product: ProductCreate):
     db_product = db.query(Product).filter(Product.id == product_id).first()
@@ -52,14 +64,6 @@ def create_cart(db: Session, cart: CartCreate):
     db.refresh(db_cart)
     return db_cart
 
-# Get a cart by its ID
-def get_cart(db: Session, cart_id: int):
-    return db.query(Cart).filter(Cart.id == cart_id).first()
-
-# Get all carts with pagination
-def get_carts(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(Cart).offset(skip).limit(limit).all()
-
 # Update a cart
 def update_cart(db: Session, cart_id: int, cart: CartUpdate):
     db_cart = db.query(Cart).filter(Cart.id == cart_id).first()
@@ -79,23 +83,16 @@ def delete_cart(db: Session, cart_id: int):
     return db_cart
 
 
-def get_active_cart_by_user(db: Session, user_id: int):
-    # Query the Cart table to get the active cart by user_id
-    return db.query(Cart).filter(Cart.user_id == user_id, Cart.status == "ACTIVE").first()
-
-
 
 def create_cart_item(db: Session, cart_item: CartItemCreate):
-    db_cart_item = CartItem(
+    # Adding a product already in the cart increases that line's quantity
+    return cart_ops.add_item(
+        db,
         cart_id=cart_item.cart_id,
         product_id=cart_item.product_id,
         quantity=cart_item.quantity,
         unit_price=cart_item.unit_price
     )
-    db.add(db_cart_item)
-    db.commit()
-    db.refresh(db_cart_item)
-    return db_cart_item
 
 
 
@@ -107,20 +104,7 @@ def delete_cart_item(db: Session, cart_item_id: int):
     return db_cart_item
 
 
-def get_cart_items_by_cart_id(db: Session, cart_id: int):
-    return db.query(CartItem).filter(CartItem.cart_id == cart_id).all()
-
-
-
-
-def get_order(db: Session, order_id: int):
-    return db.query(Order).filter(Order.id == order_id).first()
 
-def get_orders(db: Session, skip: int = 0, limit: int = 10, user_id: int = None):
-    query = db.query(Order)
-    if user_id:
-        query = query.filter(Order.user_id == user_id)
-    return query.offset(skip).limit(limit).all()
 
 def create_order(db: Session, order: OrderCreate):
     db_order = Order(
@@ -141,7 +125,8 @@ def create_order(db: Session, order: OrderCreate):
 def update_order_status(db: Session, order_id: int, order: OrderUpdate):
     db_order = db.query(Order).filter(Order.id == order_id).first()
     if db_order:
-        for key, value in order.dict(exclude_unset=True).items():
+        # The redeemed code is fixed at creation; usage counts depend on it
+        for key, value in order.dict(exclude_unset=True, exclude={"discount_code"}).items():
             setattr(db_order, key, value)
         db.commit()
         db.refresh(db_order)
@@ -167,9 +152,6 @@ def create_order_item(db: Session, order_item: OrderItemCreate):
     db.refresh(db_order_item)
     return db_order_item
 
-def get_order_item(db: Session, order_item_id: int):
-    return db.query(OrderItem).filter(OrderItem.id == order_item_id).first()
-
 def delete_order_item(db: Session, order_item_id: int):
     db_order_item = db.query(OrderItem).filter(OrderItem.id == order_item_id).first()
     if db_order_item:
@@ -177,8 +159,58 @@ def delete_order_item(db: Session, order_item_id: int):
         db.commit()
     return db_order_item
 
-def get_order_items_by_order(db: Session, order_id: int):
-    return db.query(OrderItem).filter(OrderItem.order_id == order_id).all()
+
+def create_discount_code(db: Session, discount_code: DiscountCodeCreate):
+    db_code = DiscountCode(**discount_code.dict(exclude={"added_at"}))
+    db.add(db_code)
+    db.commit()
+    db.refresh(db_code)
+    return db_code
+
+def get_discount_code(db: Session, code: str):
+    return db.query(DiscountCode).filter(DiscountCode.code == code).first()
+
+def get_discount_codes(db: Session, skip: int = 0, limit: int = 10):
+    return db.query(DiscountCode).order_by(DiscountCode.code).offset(skip).limit(limit).all()
+
+def update_discount_code(db: Session, code: str, discount_code: DiscountCodeUpdate):
+    db_code = get_discount_code(db, code)
+    if db_code:
+        for key, value in discount_code.dict(exclude_unset=True, exclude={"code", "added_at"}).items():
+            setattr(db_code, key, value)
+        db.commit()  # updated_at moves, so every worker's discount engine picks the change up
+        db.refresh(db_code)
+    return db_code
+
+def delete_discount_code(db: Session, code: str):
+    db_code = get_discount_code(db, code)
+    if db_code:
+        db.delete(db_code)
+        db.commit()
+    return db_code
+
+
+def create_review(db: Session, review: ReviewCreate, user_id: int):
+    db_review = Review(product_id=review.product_id, user_id=user_id, rating=review.rating, comment=review.comment)
+    db.add(db_review)
+    db.commit()  # product_ratings is updated by trigger in this same transaction
+    db.refresh(db_review)
+    return db_review
+
+def get_review(db: Session, review_id: int):
+    return db.query(Review).filter(Review.id == review_id).first()
+
+def update_review(db: Session, db_review: Review, review: ReviewUpdate):
+    for key, value in review.dict(exclude_unset=True, exclude={"product_id", "user_id", "added_at"}).items():
+        setattr(db_review, key, value)
+    db.commit()
+    db.refresh(db_review)
+    return db_review
+
+def delete_review(db: Session, db_review: Review):
+    db.delete(db_review)
+    db.commit()
+    return db_review
 
 
 
@@ -210,6 +242,14 @@ def create_payment(db: Session, payment: PaymentCreate):
         db.add(db_payment)
         db.commit()
         db.refresh(db_payment)
+
+        # Settle the order's stock reservations with the payment outcome
+        if intent.status == "canceled":
+            reservations.release_order(db, payment.order_id)
+        elif intent.status not in reservations.FAILED_PAYMENT_STATUSES:
+            # Succeeded, or still being confirmed: either way the sweep must not give the stock back
+            if not reservations.confirm_order(db, payment.order_id):
+                logging.warning(f"Order {payment.order_id} was paid but holds no stock (reservation expired or already settled)")
         
         logging.info(f"Payment successfully created: {db_payment}")
         return db_payment  # Return the created payment record
@@ -219,6 +259,8 @@ def create_payment(db: Session, payment: PaymentCreate):
         body = e.json_body
         err = body.get('error', {})
         logging.error(f"Card Error: {err.get('message')}")
+        db.rollback()
+        reservations.release_order(db, payment.order_id)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Payment failed: {err.get('message')}"
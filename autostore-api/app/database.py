@@ -1,15 +1,21 @@
-from sqlalchemy import create_engine
+import os
+
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 
-# SQLite database URL
-SQLALCHEMY_DATABASE_URL = "sqlite:///./auto_store.db"  # Adjust if you're using another DB
+from shared.db_engine import Database
+
+# Database URL; WAL, pragmas and pool sizes come from the SQLITE_* / DB_* variables (shared/db_engine.py)
+SQLALCHEMY_DATABASE_URL = os.getenv("AUTOSTORE_DB_URL", "sqlite:///./auto_store.db")
+engines = Database(SQLALCHEMY_DATABASE_URL, os.getenv("AUTOSTORE_ASYNC_DB_URL"))
 
-# Create the SQLite engine
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+# Writes (and reads that lead to writes) share the single write connection
+engine = engines.engine
+SessionLocal = engines.SessionLocal
 
-# SessionLocal to interact with the database
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Read-only endpoints use the read pool, sync or async
+read_engine = engines.read_engine
+ReadSessionLocal = engines.ReadSessionLocal
+AsyncReadSessionLocal = engines.AsyncReadSessionLocal
 
 # Base class to create models
 Base = declarative_base()
@@ -0,0 +1,201 @@
+# app/discounts.py
+"""Discount codes, validated and priced server-side from a per-worker in-memory index.
+
+Active codes are compiled into a dict keyed by code, so evaluating one is a hash lookup
+plus a validity window check. The index reloads only codes whose updated_at moved, and
+fully every DISCOUNT_FULL_RELOAD_INTERVAL to drop deleted ones. A stale index can never
+over-redeem: redemption is one conditional UPDATE on the code's row.
+
+Benchmark and redemption race check:
+
+    python -m benchmarks.discounts
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, or_, select, text, update
+from sqlalchemy.orm import Session
+
+from app.models import DiscountCode, Order
+
+PERCENT = "PERCENT"
+FIXED = "FIXED"
+
+# Seconds between incremental refreshes on read
+DISCOUNT_REFRESH_INTERVAL = float(os.getenv("DISCOUNT_REFRESH_INTERVAL", "1.0"))
+# Seconds between full reloads, which also drop deleted codes
+DISCOUNT_FULL_RELOAD_INTERVAL = float(os.getenv("DISCOUNT_FULL_RELOAD_INTERVAL", "300"))
+# Codes stamped this long before the watermark are read again, for writers with skewed clocks or slow commits
+REFRESH_OVERLAP = timedelta(seconds=5)
+
+
+def add_discount_columns(conn):
+    """Migration step: usage limits and updated_at on codes, the redeemed code on orders"""
+    columns = {row[1] for row in conn.execute(text("PRAGMA table_info(discount_codes)"))}
+    if "max_uses" not in columns:
+        conn.execute(text("ALTER TABLE discount_codes ADD COLUMN max_uses INTEGER"))
+    if "used_count" not in columns:
+        conn.execute(text("ALTER TABLE discount_codes ADD COLUMN used_count INTEGER NOT NULL DEFAULT 0"))
+    if "updated_at" not in columns:
+        conn.execute(text("ALTER TABLE discount_codes ADD COLUMN updated_at DATETIME"))
+    conn.execute(text("UPDATE discount_codes SET updated_at = CURRENT_TIMESTAMP WHERE updated_at IS NULL"))
+    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_discount_codes_updated_at ON discount_codes (updated_at)"))
+    if "discount_code" not in {row[1] for row in conn.execute(text("PRAGMA table_info(orders)"))}:
+        conn.execute(text("ALTER TABLE orders ADD COLUMN discount_code VARCHAR"))
+
+
+class CompiledCode(NamedTuple):
+    code: str
+    percent: bool
+    value: float
+    valid_from: Optional[datetime]
+    valid_to: Optional[datetime]
+
+    def check_window(self, now: datetime):
+        if self.valid_from is not None and now < self.valid_from:
+            raise HTTPException(status_code=400, detail=f"Discount code {self.code} is not valid yet")
+        if self.valid_to is not None and now > self.valid_to:
+            raise HTTPException(status_code=400, detail=f"Discount code {self.code} has expired")
+
+    def discount(self, subtotal: float) -> float:
+        amount = subtotal * self.value / 100 if self.percent else self.value
+        return round(max(0.0, min(amount, subtotal)), 2)
+
+
+def compile_code(row) -> Optional[CompiledCode]:
+    code, kind, value, valid_from, valid_to, active, _ = row
+    if not active or kind not in (PERCENT, FIXED) or value is None:
+        return None
+    return CompiledCode(code, kind == PERCENT, float(value), valid_from, valid_to)
+
+
+def _columns():
+    return select(DiscountCode.code, DiscountCode.type, DiscountCode.value, DiscountCode.valid_from,
+                  DiscountCode.valid_to, DiscountCode.active, DiscountCode.updated_at)
+
+
+class DiscountEngine:
+    """Per-worker index of active discount codes"""
+
+    def __init__(self, refresh_interval: float = DISCOUNT_REFRESH_INTERVAL,
+                 full_reload_interval: float = DISCOUNT_FULL_RELOAD_INTERVAL):
+        self.refresh_interval = refresh_interval
+        self.full_reload_interval = full_reload_interval
+        self.codes: Dict[str, CompiledCode] = {}
+        self.watermark: Optional[datetime] = None
+        self.last_refresh = 0.0
+        self.last_full_reload = 0.0
+        self.loaded = False
+        self.lock = threading.Lock()
+
+    def refresh(self, db: Session, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self.last_refresh < self.refresh_interval:
+            return
+        # While another thread refreshes, readers keep using the current index; only the first load is waited for
+        if not self.lock.acquire(blocking=force or not self.loaded):
+            return
+        try:
+            if self.watermark is None or now - self.last_full_reload >= self.full_reload_interval:
+                self._reload(db)
+                self.last_full_reload = now
+                self.loaded = True
+            else:
+                self._apply_changes(db)
+            self.last_refresh = now
+        finally:
+            self.lock.release()
+
+    def _reload(self, db: Session):
+        codes = {}
+        stamps = []
+        for row in db.execute(_columns().where(DiscountCode.active.is_(True))):
+            compiled = compile_code(row)
+            if compiled is not None:
+                codes[row.code] = compiled
+            if row.updated_at is not None:
+                stamps.append(row.updated_at)
+        self.codes = codes  # swapped whole, readers never see a half-built index
+        self.watermark = max(stamps, default=None)  # None: reload in full until there is a code
+
+    def _apply_changes(self, db: Session):
+        changed = db.execute(
+            _columns().where(or_(DiscountCode.updated_at >= self.watermark - REFRESH_OVERLAP, DiscountCode.updated_at.is_(None)))
+        ).all()
+        for row in changed:
+            compiled = compile_code(row)
+            if compiled is None:
+                self.codes.pop(row.code, None)
+            else:
+                self.codes[row.code] = compiled
+            if row.updated_at is not None:
+                self.watermark = max(self.watermark, row.updated_at)
+
+    def forget(self, code: str):
+        self.codes.pop(code, None)
+
+    def evaluate(self, db: Session, code: str, subtotal: float, now: Optional[datetime] = None) -> Tuple[CompiledCode, float]:
+        """(compiled code, discount amount) for an order subtotal; raises when the code does not apply"""
+        self.refresh(db)
+        compiled = self.codes.get(code.strip())
+        if compiled is None:
+            raise HTTPException(status_code=404, detail="Discount code not found or inactive")
+        compiled.check_window(now or datetime.utcnow())
+        return compiled, compiled.discount(subtotal)
+
+
+discount_engine = DiscountEngine()
+
+
+def redeem(db: Session, compiled: CompiledCode, now: Optional[datetime] = None):
+    """Counts one use in the caller's transaction, or raises if the code ran out or changed meanwhile"""
+    now = now or datetime.utcnow()
+    result = db.execute(
+        update(DiscountCode)
+        .where(
+            DiscountCode.code == compiled.code,
+            DiscountCode.active.is_(True),
+            or_(DiscountCode.valid_from.is_(None), DiscountCode.valid_from <= now),
+            or_(DiscountCode.valid_to.is_(None), DiscountCode.valid_to >= now),
+            or_(DiscountCode.max_uses.is_(None), DiscountCode.used_count < DiscountCode.max_uses),
+        )
+        # Usage is not a change to the code itself; keeping updated_at spares every engine a refresh
+        .values(used_count=DiscountCode.used_count + 1, updated_at=DiscountCode.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Discount code {compiled.code} is no longer available")
+
+
+def apply_code(db: Session, code: str, subtotal: float) -> Tuple[str, float]:
+    """Evaluates and redeems a code inside the caller's transaction; returns (code, discount amount)"""
+    compiled, amount = discount_engine.evaluate(db, code, subtotal)
+    redeem(db, compiled)
+    return compiled.code, amount
+
+
+def unredeem(db: Session, order_ids: Iterable[int]):
+    """Gives back the uses of cancelled orders; the caller has just cancelled them and commits"""
+    order_ids = list(order_ids)
+    if not order_ids:
+        return
+    cancelled = (
+        select(Order.discount_code)
+        .where(Order.id.in_(order_ids), Order.status == "CANCELLED", Order.discount_code.isnot(None))
+    )
+    returned = (
+        select(func.count(Order.id))
+        .where(Order.id.in_(order_ids), Order.status == "CANCELLED", Order.discount_code == DiscountCode.code)
+        .scalar_subquery()
+    )
+    db.execute(
+        update(DiscountCode)
+        .where(DiscountCode.code.in_(cancelled))
+        .values(used_count=DiscountCode.used_count - returned, updated_at=DiscountCode.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
@@ -0,0 +1,122 @@
+# app/export.py
+"""Streams full table dumps as NDJSON or CSV.
+
+    python -m app.export products --format csv --gzip -o products.csv.gz
+    python -m app.export orders --after-id 120000 > orders.ndjson
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import zlib
+from datetime import date, datetime, time
+from typing import Iterator, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.models import Order, OrderItem, Product
+
+# Exportable tables, keyed by the name used in URLs and on the command line
+TABLES = {
+    "products": Product.__table__,
+    "orders": Order.__table__,
+    "order_items": OrderItem.__table__,
+}
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Rows fetched from the cursor and serialized per chunk
+CHUNK_ROWS = 1000
+
+
+def resolve(table_name: str, fmt: str):
+    table = TABLES.get(table_name)
+    if table is None:
+        raise HTTPException(status_code=404, detail=f"Unknown export. Use one of: {', '.join(TABLES)}")
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(FORMATS)}")
+    return table
+
+
+def _value(value):
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return value
+
+
+def iter_export(engine, table, fmt: str = "ndjson", after_id: int = 0, chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+    """Rows with id > after_id in id order, one encoded chunk at a time; never holds more than a chunk"""
+    names = [column.name for column in table.columns]
+    query = select(table).where(table.c.id > after_id).order_by(table.c.id)
+
+    # Own connection: the response outlives request-scoped sessions
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=chunk_rows).execute(query)
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            # A resumed dump continues an earlier file, which already has the header
+            if not after_id:
+                writer.writerow(names)
+            for rows in result.partitions():
+                writer.writerows([_value(value) for value in row] for row in rows)
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+            if buffer.tell():
+                yield buffer.getvalue().encode()
+            return
+
+        for rows in result.partitions():
+            yield "".join(
+                json.dumps({name: _value(value) for name, value in zip(names, row)}, separators=(",", ":")) + "\n"
+                for row in rows
+            ).encode()
+
+
+def gzipped(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    # wbits=31 writes a gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*") and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            return True
+    return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.export", description="Stream a table dump to a file or stdout")
+    parser.add_argument("table", choices=sorted(TABLES))
+    parser.add_argument("--format", choices=sorted(FORMATS), default="ndjson")
+    parser.add_argument("--after-id", type=int, default=0, help="resume after the last id already exported")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("-o", "--output", help="file to write; defaults to stdout")
+    args = parser.parse_args(argv)
+
+    from app.database import read_engine
+
+    chunks = iter_export(read_engine, TABLES[args.table], args.format, args.after_id)
+    if args.gzip:
+        chunks = gzipped(chunks)
+    # A resumed dump appends to the partial file
+    out = open(args.output, "ab" if args.after_id else "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
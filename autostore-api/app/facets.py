@@ -0,0 +1,292 @@
+# app/facets.py
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import literal_column, or_, text
+from sqlalchemy.orm import Session
+
+from app import product_changes, search
+from app.models import Product
+
+# Upper bounds of the price buckets; the last bucket is open ended
+PRICE_BUCKETS = [50, 100, 250, 500, 1000]
+
+FACETS = ["brand", "condition", "price", "availability"]
+
+
+def bucket_label(index: int) -> str:
+    low = PRICE_BUCKETS[index - 1] if index > 0 else 0
+    if index == len(PRICE_BUCKETS):
+        return f"{low}+"
+    return f"{low}-{PRICE_BUCKETS[index]}"
+
+
+BUCKET_ORDER = [bucket_label(i) for i in range(len(PRICE_BUCKETS) + 1)]
+
+
+def price_bucket(price: Optional[float]) -> Optional[str]:
+    if price is None:
+        return None
+    for index, upper in enumerate(PRICE_BUCKETS):
+        if price < upper:
+            return bucket_label(index)
+    return bucket_label(len(PRICE_BUCKETS))
+
+
+def availability(stock: Optional[int]) -> str:
+    return "in_stock" if stock is not None and stock > 0 else "out_of_stock"
+
+
+def _price_bucket_sql(ref: str) -> str:
+    cases = " ".join(f"WHEN {ref}.price < {upper} THEN '{bucket_label(i)}'" for i, upper in enumerate(PRICE_BUCKETS))
+    return f"CASE WHEN {ref}.price IS NULL THEN NULL {cases} ELSE '{bucket_label(len(PRICE_BUCKETS))}' END"
+
+
+def _delta_sql(ref: str, sign: int) -> str:
+    # Adds sign to every facet value of one (active) product row
+    return f"""INSERT INTO product_facet_counts(facet, value, count)
+        SELECT facet, value, {sign} FROM (
+            SELECT 'brand' AS facet, {ref}.brand AS value
+            UNION ALL SELECT 'condition', {ref}.condition
+            UNION ALL SELECT 'price', {_price_bucket_sql(ref)}
+            UNION ALL SELECT 'availability', CASE WHEN {ref}.stock > 0 THEN 'in_stock' ELSE 'out_of_stock' END
+        ) WHERE value IS NOT NULL AND COALESCE({ref}.active, 1) = 1
+        ON CONFLICT(facet, value) DO UPDATE SET count = count + excluded.count;"""
+
+
+# Global counts over active products, maintained incrementally by triggers
+FACET_DDL = [
+    """CREATE TABLE IF NOT EXISTS product_facet_counts (
+        facet TEXT NOT NULL,
+        value TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (facet, value)
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS product_facet_counts_ai AFTER INSERT ON products BEGIN
+        {_delta_sql("new", 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS product_facet_counts_au
+        AFTER UPDATE OF brand, condition, price, stock, active ON products BEGIN
+        {_delta_sql("old", -1)}
+        {_delta_sql("new", 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS product_facet_counts_ad AFTER DELETE ON products BEGIN
+        {_delta_sql("old", -1)}
+    END""",
+]
+
+BACKFILL_SQL = [
+    "DELETE FROM product_facet_counts",
+    f"""INSERT INTO product_facet_counts(facet, value, count)
+        SELECT facet, value, COUNT(*) FROM (
+            SELECT 'brand' AS facet, brand AS value FROM products WHERE COALESCE(active, 1) = 1
+            UNION ALL SELECT 'condition', condition FROM products WHERE COALESCE(active, 1) = 1
+            UNION ALL SELECT 'price', {_price_bucket_sql("products")} FROM products WHERE COALESCE(active, 1) = 1
+            UNION ALL SELECT 'availability', CASE WHEN stock > 0 THEN 'in_stock' ELSE 'out_of_stock' END
+                FROM products WHERE COALESCE(active, 1) = 1
+        ) WHERE value IS NOT NULL GROUP BY facet, value""",
+]
+
+
+def init_facets(engine):
+    """Creates the global counts table and its triggers, backfilling it the first time"""
+    with engine.begin() as conn:
+        exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'product_facet_counts'")).first()
+        for statement in FACET_DDL:
+            conn.execute(text(statement))
+        if not exists:
+            for statement in BACKFILL_SQL:
+                conn.execute(text(statement))
+
+
+def global_facets(db: Session) -> Dict:
+    counts = {facet: {} for facet in FACETS}
+    for facet, value, count in db.execute(text("SELECT facet, value, count FROM product_facet_counts WHERE count > 0")):
+        counts.setdefault(facet, {})[value] = count
+    total = sum(counts["availability"].values())
+    return format_facets(total, counts)
+
+
+def format_facets(total: int, counts: Dict[str, Dict[str, int]]) -> Dict:
+    result = {"total": total}
+    for facet in FACETS:
+        values = counts.get(facet, {})
+        if facet == "price":
+            ordered = [(label, values[label]) for label in BUCKET_ORDER if values.get(label)]
+        else:
+            ordered = sorted(values.items(), key=lambda item: (-item[1], item[0]))
+        result[facet] = [{"value": value, "count": count} for value, count in ordered]
+    return result
+
+
+class FacetIndex:
+    """Per-worker postings (value -> product ids) for filtered facet counts.
+
+    Kept current by replaying the product_changes log before every read, so writes
+    made by any worker are visible to the next facet request. Price ranges are answered
+    from prices / price_ids, parallel arrays sorted by price, with bisect.
+    """
+
+    def __init__(self):
+        self.docs: Dict[int, tuple] = {}  # id -> (brand, condition, price bucket, availability, active, price)
+        self.postings: Dict[str, Dict[str, Set[int]]] = {facet: {} for facet in FACETS}
+        self.active: Set[int] = set()
+        self.prices = array("d")
+        self.price_ids = array("q")
+        self.seq = -1
+        self.lock = threading.Lock()
+
+    def _add(self, product_id: int, doc: tuple, index_price: bool = True):
+        self.docs[product_id] = doc
+        for facet, value in zip(FACETS, doc):
+            if value is not None:
+                self.postings[facet].setdefault(value, set()).add(product_id)
+        if doc[4]:
+            self.active.add(product_id)
+        if index_price and doc[5] is not None:
+            position = bisect_right(self.prices, doc[5])
+            self.prices.insert(position, doc[5])
+            self.price_ids.insert(position, product_id)
+
+    def _remove(self, product_id: int):
+        doc = self.docs.pop(product_id, None)
+        if doc is None:
+            return
+        for facet, value in zip(FACETS, doc):
+            ids = self.postings[facet].get(value)
+            if ids is not None:
+                ids.discard(product_id)
+                if not ids:
+                    del self.postings[facet][value]
+        self.active.discard(product_id)
+        if doc[5] is not None:
+            position = self.price_ids.index(product_id, bisect_left(self.prices, doc[5]), bisect_right(self.prices, doc[5]))
+            del self.prices[position]
+            del self.price_ids[position]
+
+    @staticmethod
+    def _doc(row) -> tuple:
+        return (row.brand, row.condition, price_bucket(row.price), availability(row.stock), row.active is not False, row.price)
+
+    def _load(self, db: Session, product_ids: Optional[List[int]] = None):
+        query = db.query(Product.id, Product.brand, Product.condition, Product.price, Product.stock, Product.active)
+        if product_ids is not None:
+            query = query.filter(Product.id.in_(product_ids))
+        return query.all()
+
+    def _rebuild(self, db: Session):
+        self.seq = product_changes.latest_seq(db)
+        self.docs.clear()
+        self.postings = {facet: {} for facet in FACETS}
+        self.active = set()
+        priced = []
+        for row in self._load(db):
+            self._add(row.id, self._doc(row), index_price=False)
+            if row.price is not None:
+                priced.append((row.price, row.id))
+        priced.sort()
+        self.prices = array("d", (price for price, _ in priced))
+        self.price_ids = array("q", (product_id for _, product_id in priced))
+
+    def sync(self, db: Session):
+        with self.lock:
+            if self.seq < 0:
+                self._rebuild(db)
+                return
+            latest, changes = product_changes.changes_since(db, self.seq)
+            if changes is None:
+                self._rebuild(db)
+                return
+            if changes:
+                changed = sorted({product_id for _, product_id, _ in changes})
+                for chunk_start in range(0, len(changed), 500):
+                    chunk = changed[chunk_start:chunk_start + 500]
+                    rows = {row.id: row for row in self._load(db, chunk)}
+                    for product_id in chunk:
+                        self._remove(product_id)
+                        if product_id in rows:
+                            self._add(product_id, self._doc(rows[product_id]))
+                self.seq = latest
+
+    def postings_for(self, facet: str, values) -> Set[int]:
+        with self.lock:
+            return set().union(*(self.postings[facet].get(value, set()) for value in values))
+
+    def counts(self, filters: Dict[str, Optional[Set[int]]], candidates: Optional[Set[int]],
+               price_range: Optional[Tuple[Optional[float], Optional[float]]] = None) -> Dict:
+        """Disjunctive facet counts: each facet ignores its own filter but applies all the others.
+
+        price_range is (min_price, max_price), inclusive, either end open when None.
+        """
+        with self.lock:
+            if price_range is not None:
+                low, high = price_range
+                start = 0 if low is None else bisect_left(self.prices, low)
+                stop = len(self.prices) if high is None else bisect_right(self.prices, high)
+
+                def in_range(price: Optional[float]) -> bool:
+                    return price is not None and (low is None or price >= low) and (high is None or price <= high)
+
+            def restrict(exclude: Optional[str]) -> Set[int]:
+                sets = [candidates] if candidates is not None else []
+                sets += [ids for facet, ids in filters.items() if facet != exclude and ids is not None]
+                by_price = price_range is not None and exclude != "price"
+                if by_price and (not sets or stop - start <= min(map(len, sets))):
+                    # The price range is the narrowest filter: take its ids straight from the sorted array
+                    sets.append(set(self.price_ids[start:stop]))
+                    by_price = False
+                if not sets:
+                    return self.active
+                sets.sort(key=len)
+                ids = sets[0].intersection(self.active, *sets[1:])
+                if by_price:
+                    # Otherwise check the prices of the few ids the other filters left
+                    ids = {i for i in ids if in_range(self.docs[i][5])}
+                return ids
+
+            counts = {}
+            for index, facet in enumerate(FACETS):
+                ids = restrict(facet)
+                if ids is self.active:
+                    counts[facet] = {value: len(posting & ids) for value, posting in self.postings[facet].items()}
+                else:
+                    counts[facet] = Counter(self.docs[i][index] for i in ids if self.docs[i][index] is not None)
+            total = len(restrict(None))
+        return format_facets(total, counts)
+
+
+facet_index = FacetIndex()
+
+
+def filtered_facets(db: Session, q: Optional[str] = None, brand: Optional[List[str]] = None,
+                    condition: Optional[List[str]] = None, in_stock: Optional[bool] = None,
+                    min_price: Optional[float] = None, max_price: Optional[float] = None) -> Dict:
+    facet_index.sync(db)
+
+    # Full-text matches narrow every facet; resolved through the FTS index
+    candidates = None
+    if q:
+        match = search.match_expression(q)
+        query = db.query(Product.id)
+        if match and search.fts_available:
+            query = query.join(search.products_fts, search.products_fts.c.rowid == Product.id).filter(
+                literal_column("products_fts").op("MATCH")(match)
+            )
+        else:
+            pattern = f"%{q}%"
+            query = query.filter(or_(Product.name.ilike(pattern), Product.description.ilike(pattern), Product.brand.ilike(pattern)))
+        candidates = {row[0] for row in query}
+
+    filters = {facet: None for facet in FACETS}
+    if brand:
+        filters["brand"] = facet_index.postings_for("brand", brand)
+    if condition:
+        filters["condition"] = facet_index.postings_for("condition", condition)
+    if in_stock is not None:
+        filters["availability"] = facet_index.postings_for("availability", ["in_stock" if in_stock else "out_of_stock"])
+    # Price range goes through the sorted price array rather than the buckets
+    price_range = (min_price, max_price) if min_price is not None or max_price is not None else None
+    return facet_index.counts(filters, candidates, price_range)
@@ -1,19 +1,27 @@
+import asyncio
 import json
+from datetime import date, datetime, timedelta
 import boto3
 from pydantic import BaseModel, EmailStr
 from typing import List, Optional, Union
 import stripe
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response, status
 from fastapi.security import HTTPAuthorizationCredentials, OAuth2PasswordBearer, HTTPBearer
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.database import SessionLocal, engine, Base
-from app import crud, models, schemas
+from app.database import AsyncReadSessionLocal, ReadSessionLocal, SessionLocal, Base, engine, engines, read_engine
+from app import analytics, async_crud, bulk_import, cart_ops, cart_summary, checkout, crud, discounts, export, facets, migrations, models, order_expand, product_changes, ratings, reservations, schemas, search
+from app.fast_json import dump_row, json_response
+from app.product_cache import json_array, product_cache
 from app.schemas import CartCreate, CartUpdate, CartResponse, PaymentCreate, PaymentIntentRequest, PaymentIntentResponse, PaymentResponse
 from app.crud import create_payment
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from app.lambda_email import invoke_send_email
-from shared.jwt_utils import decode_access_token
+from shared.jwt_utils import decode_access_token, identity_from_headers
+from shared.pagination import NEXT_CURSOR_HEADER, next_cursor
 
 # # Ensure we can import the shared package from project root
 # sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
@@ -36,12 +44,26 @@ def get_db():
     finally:
         db.close()
 
+# Read-only endpoints use the read pool and never wait for the single write connection
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Async session for the read endpoints that await their queries instead of taking a threadpool worker
+async def get_async_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
 # Instantiate the HTTPBearer to extract the token from the Authorization header
 security = HTTPBearer()
 
 # Dependency to get current user from the decoded token
-def get_current_user(creds: HTTPAuthorizationCredentials = Depends(security)):
-    payload = decode_access_token(creds.credentials)  # Decode the token
+def get_current_user(request: Request, creds: HTTPAuthorizationCredentials = Depends(security)):
+    # Claims already verified by the api-gateway, otherwise decode the token here
+    payload = identity_from_headers(request.headers) or decode_access_token(creds.credentials)
     
     print("Decoded payload:", payload)  # Debugging line to check the decoded payload
     if not payload:
@@ -53,11 +75,32 @@ def get_current_user(creds: HTTPAuthorizationCredentials = Depends(security)):
     # Return the decoded payload, which contains the user's info (sub, fullname, email, role)
     return payload
 
+# Keyset pagination: the cursor for the next page travels in a response header
+def next_cursor_headers(rows, sort: str, limit: int) -> dict:
+    cursor = next_cursor(rows, sort, limit)
+    return {NEXT_CURSOR_HEADER: cursor} if cursor else {}
+
 # Create FastAPI instance
 app = FastAPI(title="Auto store API")
 
 # Create all tables in the database
 Base.metadata.create_all(bind=engine)
+migrations.migrate(engine)
+search.init_search(engine)
+product_changes.init_product_changes(engine)
+facets.init_facets(engine)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    # Unpaid orders give their stock back once their reservations expire
+    asyncio.create_task(reservations.sweep_expired(SessionLocal))
+    # The product change log only grows on writes, so it is pruned with a write session too
+    asyncio.create_task(product_changes.prune_periodically(SessionLocal))
+
+# Pooled aiosqlite connections each own a thread; close them with the app
+@app.on_event("shutdown")
+async def close_engines():
+    await engines.dispose()
 
 # Product Endpoints
 @app.post("/products/", response_model=schemas.ProductResponse)
@@ -78,34 +121,175 @@ def create_new_product(product: schemas.ProductCreate, db: Session = Depends(get
     db.add(db_product)
     db.commit()
     db.refresh(db_product)
+    # Our own writes are visible to this worker's cache at once; other workers catch up on their next sync
+    product_cache.sync(db, force=True)
 
     return db_product
 
 
+# Streams a CSV (header row first) or NDJSON catalog into the products table in batches
+@app.post("/products/import", response_model=schemas.ProductImportResponse)
+async def import_products(
+    request: Request,
+    format: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user),
+):
+    fmt = bulk_import.detect_format(request.headers.get("content-type"), format)
+    # Batches are written from the threadpool: waiting for the write connection must never block the event loop
+    result = await bulk_import.import_products(db, fmt, request.stream(), current_user)
+    await run_in_threadpool(product_cache.sync, db, True)
+    return result
+
+
+# Declared before /products/{product_id} so "search" is not parsed as an id
+@app.get("/products/search", response_model=List[schemas.ProductResponse])
+def search_products(
+    response: Response,
+    q: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    condition: Optional[str] = None,
+    brand: Optional[str] = None,
+    active: Optional[bool] = None,
+    in_stock: Optional[bool] = None,
+    sort: str = search.RELEVANCE,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+):
+    products, next_page = search.search_products(
+        db, crud.PRODUCT_SORT_KEYS, q=q, sort=sort, limit=limit, cursor=cursor,
+        min_price=min_price, max_price=max_price, condition=condition, brand=brand, active=active, in_stock=in_stock,
+    )
+    if next_page:
+        response.headers[NEXT_CURSOR_HEADER] = next_page
+    return products
+
+@app.get("/products/facets", response_model=schemas.ProductFacetsResponse)
+def product_facets(
+    q: Optional[str] = None,
+    brand: Optional[List[str]] = Query(None),
+    condition: Optional[List[str]] = Query(None),
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: Optional[bool] = None,
+    db: Session = Depends(get_read_db),
+):
+    # Counts over active products; unfiltered requests read the trigger-maintained totals
+    if not (q or brand or condition or in_stock is not None or min_price is not None or max_price is not None):
+        return facets.global_facets(db)
+    return facets.filtered_facets(
+        db, q=q, brand=brand, condition=condition, in_stock=in_stock, min_price=min_price, max_price=max_price
+    )
+
+# Hit/miss counts and observed staleness of this worker's product cache
+@app.get("/products/cache-stats")
+def product_cache_stats():
+    return product_cache.stats()
+
 @app.get("/products/{product_id}", response_model=schemas.ProductResponse)
-def get_product(product_id: int, db: Session = Depends(get_db)):
-    db_product = crud.get_product(db=db, product_id=product_id)
-    if db_product is None:
+def get_product(product_id: int, db: Session = Depends(get_read_db)):
+    # Served from the per-worker cache as already serialized JSON
+    body = product_cache.get_product(db, product_id, lambda: crud.get_product(db=db, product_id=product_id))
+    if body is None:
         raise HTTPException(status_code=404, detail="Product not found")
-    return db_product
+    return Response(content=body, media_type="application/json")
 
-@app.get("/products/", response_model=List[schemas.ProductResponse])
-def get_products(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    # Get the list of products
-    products = crud.get_products(db=db, skip=skip, limit=limit)
+# Products can also be fetched in bulk with ?ids=1,2,3
+MAX_BULK_PRODUCT_IDS = 100
 
-    # Ensure that seller_user_id is not None
-    for product in products:
-        if product.seller_user_id is None:
-            raise HTTPException(status_code=400, detail="Seller user ID is missing.")
+def parse_product_ids(ids: str) -> List[int]:
+    try:
+        product_ids = sorted({int(value) for value in ids.split(",") if value.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be a comma separated list of integers")
+    if len(product_ids) > MAX_BULK_PRODUCT_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_PRODUCT_IDS} ids can be requested at once")
+    return product_ids
 
-    return products
+@app.get("/products/", response_model=List[schemas.ProductResponse])
+def get_products(skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: str = "id", ids: Optional[str] = None, db: Session = Depends(get_read_db)):
+    # Get the list of products
+    headers = {}
+    if ids is not None:
+        product_ids = parse_product_ids(ids)
+        bodies = product_cache.get_products(db, product_ids, lambda missing: crud.get_products_by_ids(db=db, product_ids=missing))
+    else:
+        # Pass the returned cursor back as ?cursor= to seek to the next page
+        def load_page():
+            if sort == ratings.TOP_RATED:
+                return ratings.top_rated(db, skip=skip, limit=limit, cursor=cursor)
+            products = crud.get_products(db=db, skip=skip, limit=limit, cursor=cursor, sort=sort)
+            return products, next_cursor(products, sort, limit)
+
+        bodies, next_page = product_cache.get_page(db, (skip, limit, cursor, sort), load_page)
+        if next_page:
+            headers[NEXT_CURSOR_HEADER] = next_page
+
+    return Response(content=json_array(bodies), media_type="application/json", headers=headers)
+
+# Review endpoints
+@app.post("/reviews/", response_model=schemas.ReviewResponse)
+def create_review(review: schemas.ReviewCreate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    validate_rating(review.rating)
+    if crud.get_product(db, review.product_id) is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    db_review = crud.create_review(db, review, user_id=int(current_user.get("sub")))
+    # The rating triggers log a product change; replay it so cached top_rated pages are rebuilt
+    product_cache.sync(db, force=True)
+    return db_review
+
+@app.get("/products/{product_id}/reviews", response_model=List[schemas.ReviewResponse])
+async def get_product_reviews(product_id: int, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: str = "id", db: AsyncSession = Depends(get_async_db)):
+    reviews = await async_crud.get_reviews_by_product(db, product_id, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    return json_response(reviews, schemas.ReviewResponse, headers=next_cursor_headers(reviews, sort, limit))
+
+@app.get("/products/{product_id}/rating", response_model=schemas.ProductRatingResponse)
+async def get_product_rating(product_id: int, db: AsyncSession = Depends(get_async_db)):
+    # Read from the trigger-maintained aggregate, not from reviews
+    return ratings.summarize(product_id, await async_crud.get_product_rating(db, product_id))
+
+@app.get("/reviews/{review_id}", response_model=schemas.ReviewResponse)
+async def get_review(review_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_review = await async_crud.get_review(db, review_id)
+    if db_review is None:
+        raise HTTPException(status_code=404, detail="Review not found")
+    return db_review
+
+@app.put("/reviews/{review_id}", response_model=schemas.ReviewResponse)
+def update_review(review_id: int, review: schemas.ReviewUpdate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    db_review = owned_review(db, review_id, current_user, allow_admin=False)
+    if review.rating is not None:
+        validate_rating(review.rating)
+    db_review = crud.update_review(db, db_review, review)
+    product_cache.sync(db, force=True)
+    return db_review
+
+@app.delete("/reviews/{review_id}", response_model=schemas.ReviewResponse)
+def delete_review(review_id: int, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    db_review = crud.delete_review(db, owned_review(db, review_id, current_user, allow_admin=True))
+    product_cache.sync(db, force=True)
+    return db_review
+
+def validate_rating(rating: int):
+    if rating not in ratings.RATINGS:
+        raise HTTPException(status_code=400, detail="Rating must be between 1 and 5")
+
+def owned_review(db: Session, review_id: int, current_user: dict, allow_admin: bool):
+    db_review = crud.get_review(db, review_id)
+    if db_review is None:
+        raise HTTPException(status_code=404, detail="Review not found")
+    if str(db_review.user_id) != str(current_user.get("sub")) and not (allow_admin and current_user.get("role") == "admin"):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your review")
+    return db_review
 
 @app.put("/products/{product_id}", response_model=schemas.ProductResponse)
 def update_product(product_id: int, product: schemas.ProductUpdate, db: Session = Depends(get_db)):
     db_product = crud.update_product(db=db, product_id=product_id, product=product)
     if db_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
+    product_cache.sync(db, force=True)
     return db_product
 
 @app.delete("/products/{product_id}", response_model=schemas.ProductResponse)
@@ -113,6 +297,7 @@ def delete_product(product_id: int, db: Session = Depends(get_db)):
     db_product = crud.delete_product(db=db, product_id=product_id)
     if db_product is None:
         raise HTTPException(status_code=404, detail="Product not found")
+    product_cache.sync(db, force=True)
     return db_product
 
 
@@ -138,17 +323,17 @@ def create_cart(cart: CartCreate, db: Session = Depends(get_db), current_user: d
 
 # Get a cart by its ID
 @app.get("/carts/{cart_id}", response_model=CartResponse)
-def get_cart(cart_id: int, db: Session = Depends(get_db)):
-    db_cart = crud.get_cart(db=db, cart_id=cart_id)
+async def get_cart(cart_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_cart = await async_crud.get_cart(db=db, cart_id=cart_id)
     if db_cart is None:
         raise HTTPException(status_code=404, detail="Cart not found")
     return db_cart
 
 # Get all carts with pagination
 @app.get("/carts/", response_model=List[CartResponse])
-def get_carts(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    carts = crud.get_carts(db=db, skip=skip, limit=limit)
-    return carts
+async def get_carts(skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: str = "id", db: AsyncSession = Depends(get_async_db)):
+    carts = await async_crud.get_carts(db=db, skip=skip, limit=limit, cursor=cursor, sort=sort)
+    return json_response(carts, CartResponse, headers=next_cursor_headers(carts, sort, limit))
 
 # Update a cart by its ID
 @app.put("/carts/{cart_id}", response_model=CartResponse)
@@ -167,9 +352,9 @@ def delete_cart(cart_id: int, db: Session = Depends(get_db)):
     return db_cart
 
 @app.get("/carts/active/{user_id}", response_model=schemas.CartResponse)
-def get_active_cart_by_user(user_id: int, db: Session = Depends(get_db)):
+async def get_active_cart_by_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
     # Call the CRUD function to get the active cart for the user
-    db_cart = crud.get_active_cart_by_user(db, user_id)
+    db_cart = await async_crud.get_active_cart_by_user(db, user_id)
     
     if db_cart is None:
         raise HTTPException(status_code=404, detail="Active cart not found for this user")
@@ -192,74 +377,85 @@ def remove_cart_item(cart_item_id: int, db: Session = Depends(get_db)):
     return db_cart_item
 
 
+@app.get("/carts/{cart_id}/summary", response_model=schemas.CartSummaryResponse)
+def get_cart_summary(cart_id: int, db: Session = Depends(get_read_db)):
+    # Served from the per-worker cache while carts.version is unchanged
+    body = cart_summary.cart_summary_cache.get(db, cart_id)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Cart not found")
+    return Response(content=body, media_type="application/json")
+
+
+@app.post("/carts/{cart_id}/items/batch", response_model=schemas.CartDetailResponse)
+def batch_cart_items(cart_id: int, batch: schemas.CartItemBatch, db: Session = Depends(get_db)):
+    # All operations commit together, one line per product; returns the cart with its lines
+    return cart_ops.apply_batch(db, cart_id, batch.operations)
+
+
 @app.get("/carts/{cart_id}/items", response_model=List[schemas.CartItemResponse])
-def get_cart_items(cart_id: int, db: Session = Depends(get_db)):
+async def get_cart_items(cart_id: int, db: AsyncSession = Depends(get_async_db)):
     # Retrieve the cart items for the given cart_id
-    cart_items = crud.get_cart_items_by_cart_id(db=db, cart_id=cart_id)
+    cart_items = await async_crud.get_cart_items_by_cart_id(db=db, cart_id=cart_id)
     if not cart_items:
         raise HTTPException(status_code=404, detail="No items found in this cart")
-    return cart_items
+    return json_response(cart_items, schemas.CartItemResponse)
+
+
+@app.post("/carts/{cart_id}/checkout", response_model=List[schemas.OrderResponse])
+def checkout_cart(cart_id: int, checkout_request: Optional[schemas.CheckoutRequest] = None, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    # One order per seller, priced from the products and with stock reserved, in one transaction
+    discount_code = checkout_request.discount_code if checkout_request else None
+    orders = checkout.checkout_cart(db, cart_id, user_id=int(current_user.get("sub")), discount_code=discount_code)
+    product_cache.sync(db, force=True)
+    return json_response(orders, schemas.OrderResponse)
 
 
 # Order endpoints 
 @app.post("/orders/", response_model=schemas.OrderResponse)
 def create_order(order: schemas.OrderCreate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
     try:
-        # Create an order based on the current user and provided order details
-        db_order = models.Order(
-            user_id=current_user.get("sub"),  # Get current user id from JWT token
-            seller_user_id=order.seller_user_id,
-            subtotal=order.subtotal,
-            tax=order.tax,
-            shipping_cost=order.shipping_cost,
-            discount_amount=order.discount_amount,
-            total=order.total,
-            status=order.status,
-        )
-
-        db.add(db_order)
-        db.commit()
-        db.refresh(db_order)
-        
-        # Create order items for the order
-        for item in order.items:
-            db_order_item = models.OrderItem(
-                order_id=db_order.id,
-                product_id=item.product_id,
-                quantity=item.quantity,
-                unit_price=item.unit_price,
-            )
-            db.add(db_order_item)
-        db.commit()
-
-        return db_order
+        # Order, items and stock reservations commit together; 409 if any line is out of stock
+        db_order = reservations.place_order(db, order, user_id=current_user.get("sub"))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=422, detail=f"Validation Error: {str(e)}")
+    product_cache.sync(db, force=True)
+    return db_order
 
 
-@app.get("/orders/{order_id}", response_model=schemas.OrderResponse)
-def get_order(order_id: int, db: Session = Depends(get_db)):
-    db_order = crud.get_order(db, order_id)
+@app.get("/orders/{order_id}", response_model=schemas.OrderDetailResponse)
+async def get_order(order_id: int, expand: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    # expand=items,payment,shipment embeds those relationships, one extra query each
+    names = order_expand.parse(expand)
+    db_order = await async_crud.get_order(db, order_id, options=order_expand.loader_options(names))
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
-    return db_order
+    return Response(content=dump_row(db_order, schemas.OrderResponse, order_expand.relations(names)), media_type="application/json")
 
 
 
-@app.get("/orders/", response_model=List[schemas.OrderResponse])
-def get_orders(skip: int = 0, limit: int = 10, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
-    orders = crud.get_orders(db, skip, limit, user_id=current_user.get("sub"))
-    return orders
+@app.get("/orders/", response_model=List[schemas.OrderDetailResponse])
+async def get_orders(skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: str = "id", expand: Optional[str] = None, db: AsyncSession = Depends(get_async_db), current_user: dict = Depends(get_current_user)):
+    names = order_expand.parse(expand)
+    orders = await async_crud.get_orders(db, skip, limit, user_id=current_user.get("sub"), cursor=cursor, sort=sort,
+                             options=order_expand.loader_options(names))
+    return json_response(orders, schemas.OrderResponse, headers=next_cursor_headers(orders, sort, limit),
+                         relations=order_expand.relations(names))
 
 @app.put("/orders/{order_id}", response_model=schemas.OrderResponse)
 def update_order_status(order_id: int, order: schemas.OrderUpdate, db: Session = Depends(get_db)):
     db_order = crud.update_order_status(db, order_id, order)
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
+    # A cancelled order gives back any stock it still holds; a paid one keeps it for good
+    if reservations.settle_order(db, db_order):
+        product_cache.sync(db, force=True)
     return db_order
 
 @app.delete("/orders/{order_id}", response_model=schemas.OrderResponse)
 def delete_order(order_id: int, db: Session = Depends(get_db)):
+    reservations.release_order(db, order_id, cancel=False)
     db_order = crud.delete_order(db, order_id)
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
@@ -279,8 +475,8 @@ def create_order_item(order_item: schemas.OrderItemCreate, db: Session = Depends
     return db_order_item
 
 @app.get("/order-items/{order_item_id}", response_model=schemas.OrderItemResponse)
-def get_order_item(order_item_id: int, db: Session = Depends(get_db)):
-    db_order_item = crud.get_order_item(db, order_item_id)
+async def get_order_item(order_item_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_order_item = await async_crud.get_order_item(db, order_item_id)
     if db_order_item is None:
         raise HTTPException(status_code=404, detail="Order Item not found")
     return db_order_item
@@ -294,11 +490,11 @@ def delete_order_item(order_item_id: int, db: Session = Depends(get_db)):
 
 
 @app.get("/order-items/order/{order_id}", response_model=List[schemas.OrderItemResponse])
-def get_order_items_by_order(order_id: int, db: Session = Depends(get_db)):
-    db_order_items = crud.get_order_items_by_order(db, order_id)
+async def get_order_items_by_order(order_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_order_items = await async_crud.get_order_items_by_order(db, order_id)
     if db_order_items is None:
         raise HTTPException(status_code=404, detail="Order items not found")
-    return db_order_items
+    return json_response(db_order_items, schemas.OrderItemResponse)
 
 
 #payments
@@ -307,6 +503,13 @@ stripe.api_key = "sk_test_51SkogIDTy0PGqlf1EOTNAoaX6Pl2cXfcmO7bWzB66BcAlMekEArbV
 def create_payment_endpoint(payment: PaymentCreate, db: Session = Depends(get_db)):
     return create_payment(db=db, payment=payment)
 
+@app.get("/payments/order/{order_id}", response_model=PaymentResponse)
+async def get_payment_by_order(order_id: int, db: AsyncSession = Depends(get_async_db)):
+    db_payment = await async_crud.get_payment_by_order(db, order_id)
+    if db_payment is None:
+        raise HTTPException(status_code=404, detail="Payment not found")
+    return db_payment
+
 
 stripe_secret_key = "sk_test_51SkogIDTy0PGqlf1EOTNAoaX6Pl2cXfcmO7bWzB66BcAlMekEArbVRKmCUs17KwiY6xT6LE0sz6UZ60CihN148Gf00nnIRBW9w"
 if not stripe_secret_key:
@@ -328,6 +531,117 @@ async def create_payment_intent(payment: PaymentIntentRequest):
     except stripe.error.StripeError as e:
         raise HTTPException(status_code=400, detail=str(e.user_message))
 
+# Seller analytics, read from the daily rollups; defaults to the last 30 days
+@app.get("/sellers/me/analytics", response_model=schemas.SellerAnalyticsResponse)
+def get_seller_analytics(
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+    granularity: str = "day",
+    db: Session = Depends(get_read_db),
+    current_user: dict = Depends(get_current_user),
+):
+    date_to = date_to or datetime.utcnow().date()
+    date_from = date_from or date_to - timedelta(days=29)
+    return analytics.seller_report(db, int(current_user.get("sub")), date_from, date_to, granularity)
+
+
+# Discount code endpoints
+@app.post("/discount-codes/validate", response_model=schemas.DiscountValidateResponse)
+def validate_discount_code(validation: schemas.DiscountValidateRequest, db: Session = Depends(get_read_db)):
+    # Priced from the in-memory engine; the code is only counted as used when an order redeems it
+    compiled, amount = discounts.discount_engine.evaluate(db, validation.code, validation.subtotal)
+    db_code = crud.get_discount_code(db, compiled.code)
+    if db_code is None or (db_code.max_uses is not None and db_code.used_count >= db_code.max_uses):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Discount code {compiled.code} is no longer available")
+    return {
+        "code": compiled.code,
+        "type": discounts.PERCENT if compiled.percent else discounts.FIXED,
+        "value": compiled.value,
+        "subtotal": validation.subtotal,
+        "discount_amount": amount,
+        "subtotal_after_discount": round(validation.subtotal - amount, 2),
+    }
+
+@app.post("/discount-codes/", response_model=schemas.DiscountCodeResponse)
+def create_discount_code(discount_code: schemas.DiscountCodeCreate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    require_admin(current_user)
+    validate_discount_code_fields(discount_code)
+    if crud.get_discount_code(db, discount_code.code) is not None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Discount code already exists")
+    db_code = crud.create_discount_code(db, discount_code)
+    discounts.discount_engine.refresh(db, force=True)
+    return db_code
+
+@app.get("/discount-codes/", response_model=List[schemas.DiscountCodeResponse])
+def get_discount_codes(skip: int = 0, limit: int = 10, db: Session = Depends(get_read_db), current_user: dict = Depends(get_current_user)):
+    require_admin(current_user)
+    return crud.get_discount_codes(db, skip=skip, limit=limit)
+
+@app.get("/discount-codes/{code}", response_model=schemas.DiscountCodeResponse)
+def get_discount_code(code: str, db: Session = Depends(get_read_db), current_user: dict = Depends(get_current_user)):
+    require_admin(current_user)
+    db_code = crud.get_discount_code(db, code)
+    if db_code is None:
+        raise HTTPException(status_code=404, detail="Discount code not found")
+    return db_code
+
+@app.put("/discount-codes/{code}", response_model=schemas.DiscountCodeResponse)
+def update_discount_code(code: str, discount_code: schemas.DiscountCodeUpdate, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    require_admin(current_user)
+    validate_discount_code_fields(discount_code)
+    db_code = crud.update_discount_code(db, code, discount_code)
+    if db_code is None:
+        raise HTTPException(status_code=404, detail="Discount code not found")
+    discounts.discount_engine.refresh(db, force=True)
+    return db_code
+
+@app.delete("/discount-codes/{code}", response_model=schemas.DiscountCodeResponse)
+def delete_discount_code(code: str, db: Session = Depends(get_db), current_user: dict = Depends(get_current_user)):
+    require_admin(current_user)
+    db_code = crud.delete_discount_code(db, code)
+    if db_code is None:
+        raise HTTPException(status_code=404, detail="Discount code not found")
+    # Other workers drop it on their next full reload; until then redeeming it fails on the missing row
+    discounts.discount_engine.forget(code)
+    return db_code
+
+def require_admin(current_user: dict):
+    if current_user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
+
+def validate_discount_code_fields(discount_code: schemas.DiscountCodeBase):
+    if discount_code.type is not None and discount_code.type not in (discounts.PERCENT, discounts.FIXED):
+        raise HTTPException(status_code=400, detail="type must be PERCENT or FIXED")
+    if discount_code.value is not None and discount_code.value <= 0:
+        raise HTTPException(status_code=400, detail="value must be positive")
+    if discount_code.type == discounts.PERCENT and discount_code.value is not None and discount_code.value > 100:
+        raise HTTPException(status_code=400, detail="A PERCENT discount cannot exceed 100")
+    if discount_code.valid_from and discount_code.valid_to and discount_code.valid_from >= discount_code.valid_to:
+        raise HTTPException(status_code=400, detail="valid_from must be before valid_to")
+    if discount_code.max_uses is not None and discount_code.max_uses < 0:
+        raise HTTPException(status_code=400, detail="max_uses cannot be negative")
+
+
+# Full table dumps for partners and BI, streamed from a server-side cursor
+@app.get("/exports/{table_name}")
+def export_table(
+    request: Request,
+    table_name: str,
+    format: str = "ndjson",
+    after_id: int = 0,
+    current_user: dict = Depends(get_current_user),
+):
+    require_admin(current_user)
+    table = export.resolve(table_name, format)
+    chunks = export.iter_export(read_engine, table, format, after_id)
+    headers = {"Content-Disposition": f'attachment; filename="{table_name}.{format}"'}
+    if export.accepts_gzip(request.headers.get("accept-encoding")):
+        chunks = export.gzipped(chunks)
+        headers["Content-Encoding"] = "gzip"
+    headers["Vary"] = "Accept-Encoding"
+    return StreamingResponse(chunks, media_type=export.FORMATS[format], headers=headers)
+
+
 # This is to test if the server is up
 @app.get("/")
 async def read_root():
@@ -390,5 +704,6 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
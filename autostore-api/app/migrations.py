@@ -0,0 +1,77 @@
+# app/migrations.py
+"""Versioned schema migrations for auto_store.db.
+
+Applied at startup; run by hand to migrate and print the index advisor report:
+
+    python -m app.migrations
+"""
+import sys
+
+from sqlalchemy import select
+
+from app.analytics import init_rollups
+from app.cart_ops import DEDUPE_CART_ITEMS
+from app.cart_summary import add_cart_versions
+from app.discounts import add_discount_columns
+from app.models import Cart, CartItem, Order, OrderItem, Payment, Product, ProductRating, Review, SellerDailyOrders, SellerDailyProductSales
+from app.ratings import init_ratings
+from shared.migrations import Migration, advise, print_advice, run_migrations
+
+# Append only: never edit a migration once it has shipped
+MIGRATIONS = [
+    Migration(1, "secondary indexes for foreign keys and per-user lookups", [
+        "CREATE INDEX IF NOT EXISTS ix_cart_items_cart_id ON cart_items (cart_id)",
+        "CREATE INDEX IF NOT EXISTS ix_order_items_order_id ON order_items (order_id)",
+        "CREATE INDEX IF NOT EXISTS ix_orders_user_id ON orders (user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_orders_seller_user_id ON orders (seller_user_id)",
+        "CREATE INDEX IF NOT EXISTS ix_carts_user_id_status ON carts (user_id, status)",
+        "CREATE INDEX IF NOT EXISTS ix_payments_order_id ON payments (order_id)",
+        "CREATE INDEX IF NOT EXISTS ix_shipments_order_id ON shipments (order_id)",
+    ]),
+    Migration(2, "carts.version, bumped by cart_items triggers", apply=add_cart_versions),
+    Migration(3, "merge duplicate cart lines, unique (cart_id, product_id)", DEDUPE_CART_ITEMS),
+    Migration(4, "product_ratings maintained by triggers on reviews", apply=init_ratings),
+    Migration(5, "discount code usage limits and updated_at, orders.discount_code", apply=add_discount_columns),
+    Migration(6, "seller analytics rollups maintained by triggers on orders and order_items", apply=init_rollups),
+]
+
+
+def migrate(engine):
+    from app.database import Base
+
+    return run_migrations(engine, MIGRATIONS, Base.metadata)
+
+
+# The statements behind the busiest crud functions, with representative parameters
+HOT_QUERIES = {
+    "get_product": select(Product).where(Product.id == 1),
+    "get_products (id)": select(Product).order_by(Product.id).limit(10),
+    "get_products (-price, cursor)": select(Product).where(Product.price < 100).order_by(Product.price.desc(), Product.id.desc()).limit(10),
+    "get_products (added_at)": select(Product).order_by(Product.added_at, Product.id).limit(10),
+    "get_carts (created_at)": select(Cart).order_by(Cart.created_at, Cart.id).limit(10),
+    "get_active_cart_by_user": select(Cart).where(Cart.user_id == 1, Cart.status == "ACTIVE").limit(1),
+    "get_cart_items_by_cart_id": select(CartItem).where(CartItem.cart_id == 1),
+    "cart_summary (version)": select(Cart.version).where(Cart.id == 1),
+    "get_orders (user_id)": select(Order).where(Order.user_id == 1).order_by(Order.id).limit(10),
+    "get_orders (seller_user_id)": select(Order).where(Order.seller_user_id == 1).order_by(Order.id).limit(10),
+    "get_order_items_by_order": select(OrderItem).where(OrderItem.order_id == 1),
+    "get_payment_by_order": select(Payment).where(Payment.order_id == 1).limit(1),
+    "get_reviews_by_product": select(Review).where(Review.product_id == 1).order_by(Review.id).limit(10),
+    "seller analytics (orders)": select(SellerDailyOrders)
+    .where(SellerDailyOrders.seller_user_id == 1, SellerDailyOrders.day.between("2024-01-01", "2024-12-31")),
+    "seller analytics (products)": select(SellerDailyProductSales)
+    .where(SellerDailyProductSales.seller_user_id == 1, SellerDailyProductSales.day.between("2024-01-01", "2024-12-31")),
+    "top_rated": select(Product).join(ProductRating, ProductRating.product_id == Product.id)
+    .where(ProductRating.rating_avg.isnot(None))
+    .order_by(ProductRating.rating_avg.desc(), ProductRating.product_id.desc()).limit(10),
+}
+
+# Rowid-order walks that stop at the LIMIT
+EXPECTED_SCANS = ["get_products (id)"]
+
+
+if __name__ == "__main__":
+    from app.database import engine
+
+    print(f"Applied migrations: {migrate(engine) or 'none pending'}")
+    sys.exit(0 if print_advice(advise(engine, HOT_QUERIES, EXPECTED_SCANS)) else 1)
@@ -1,5 +1,6 @@
 # app/models.py
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.database import Base
@@ -27,6 +28,12 @@ class Product(Base):
     order_items = relationship("OrderItem", back_populates="product")  # Relationship to OrderItem
     reviews = relationship("Review", back_populates="product")  # Relationship to Review
 
+    # (sort key, id) indexes backing keyset pagination
+    __table_args__ = (
+        Index("ix_products_added_at_id", "added_at", "id"),
+        Index("ix_products_price_id", "price", "id"),
+    )
+
 # Cart Model
 class Cart(Base):
     __tablename__ = "carts"
@@ -35,10 +42,16 @@ class Cart(Base):
     user_id = Column(Integer)
     status = Column(String, default="ACTIVE")  # ACTIVE / CHECKED_OUT
     created_at = Column(DateTime, default=func.now())
+    version = Column(Integer, nullable=False, default=0, server_default="0")  # bumped by cart_items triggers
 
     # Relationships
     items = relationship("CartItem", back_populates="cart")
 
+    __table_args__ = (
+        Index("ix_carts_created_at_id", "created_at", "id"),
+        Index("ix_carts_user_id_status", "user_id", "status"),
+    )
+
 # CartItem Model
 class CartItem(Base):
     __tablename__ = "cart_items"
@@ -53,6 +66,12 @@ class CartItem(Base):
     cart = relationship("Cart", back_populates="items")
     product = relationship("Product", back_populates="cart_items")  # Added back_populates to Product
 
+    __table_args__ = (
+        Index("ix_cart_items_cart_id", "cart_id"),
+        # One line per product per cart; cart item writes upsert on it
+        Index("ux_cart_items_cart_id_product_id", "cart_id", "product_id", unique=True),
+    )
+
 # Order Model
 class Order(Base):
     __tablename__ = "orders"
@@ -67,12 +86,20 @@ class Order(Base):
     total = Column(Float)
     status = Column(String, default="CREATED")  # CREATED / PAID / SHIPPED / DELIVERED / CANCELLED
     created_at = Column(DateTime, default=func.now())
+    discount_code = Column(String)  # redeemed code, if any
 
     # Relationships
     items = relationship("OrderItem", back_populates="order")
     payment = relationship("Payment", back_populates="order", uselist=False)  # One payment per order
     shipment = relationship("Shipment", back_populates="order", uselist=False)  # One shipment per order
 
+    __table_args__ = (
+        Index("ix_orders_created_at_id", "created_at", "id"),
+        Index("ix_orders_total_id", "total", "id"),
+        Index("ix_orders_user_id", "user_id"),
+        Index("ix_orders_seller_user_id", "seller_user_id"),
+    )
+
 # OrderItem Model
 class OrderItem(Base):
     __tablename__ = "order_items"
@@ -87,6 +114,8 @@ class OrderItem(Base):
     order = relationship("Order", back_populates="items")
     product = relationship("Product", back_populates="order_items")  # Added back_populates to Product
 
+    __table_args__ = (Index("ix_order_items_order_id", "order_id"),)
+
 # Payment Model
 class Payment(Base):
     __tablename__ = "payments"
@@ -101,6 +130,8 @@ class Payment(Base):
     # Relationships
     order = relationship("Order", back_populates="payment")
 
+    __table_args__ = (Index("ix_payments_order_id", "order_id"),)
+
 # Shipment Model
 class Shipment(Base):
     __tablename__ = "shipments"
@@ -115,6 +146,25 @@ class Shipment(Base):
     # Relationships
     order = relationship("Order", back_populates="shipment")
 
+    __table_args__ = (Index("ix_shipments_order_id", "order_id"),)
+
+# StockReservation Model: stock taken off a product for an order until it is paid for
+class StockReservation(Base):
+    __tablename__ = "stock_reservations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    status = Column(String, default="HELD")  # HELD / COMMITTED / RELEASED
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=func.now())
+
+    __table_args__ = (
+        Index("ix_stock_reservations_order_id", "order_id"),
+        Index("ix_stock_reservations_status_expires_at", "status", "expires_at"),
+    )
+
 # DiscountCode Model
 class DiscountCode(Base):
     __tablename__ = "discount_codes"
@@ -125,6 +175,12 @@ class DiscountCode(Base):
     valid_from = Column(DateTime)
     valid_to = Column(DateTime)
     active = Column(Boolean, default=True)
+    max_uses = Column(Integer)  # None: unlimited
+    used_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Set on every change to the code; discount engines refresh from it
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (Index("ix_discount_codes_updated_at", "updated_at"),)
 
 # Review Model
 class Review(Base):
@@ -139,3 +195,43 @@ class Review(Base):
 
     # Relationships
     product = relationship("Product", back_populates="reviews")  # Added back_populates to Product
+
+    __table_args__ = (Index("ix_reviews_product_id_id", "product_id", "id"),)
+
+# Per-product rating aggregate, maintained by triggers on reviews (app/ratings.py)
+class ProductRating(Base):
+    __tablename__ = "product_ratings"
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    rating_count = Column(Integer, nullable=False, default=0)
+    rating_sum = Column(Integer, nullable=False, default=0)
+    rating_avg = Column(Float)
+    # Histogram: number of reviews with each rating
+    rating_1 = Column(Integer, nullable=False, default=0)
+    rating_2 = Column(Integer, nullable=False, default=0)
+    rating_3 = Column(Integer, nullable=False, default=0)
+    rating_4 = Column(Integer, nullable=False, default=0)
+    rating_5 = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_product_ratings_avg_product_id", "rating_avg", "product_id"),)
+
+# Seller analytics rollups, maintained by triggers on orders and order_items (app/analytics.py).
+# Cancelled orders are not counted; day is the order's created_at date (UTC)
+class SellerDailyOrders(Base):
+    __tablename__ = "seller_daily_orders"
+
+    seller_user_id = Column(Integer, primary_key=True)
+    day = Column(String, primary_key=True)  # YYYY-MM-DD
+    orders = Column(Integer, nullable=False, default=0)
+    subtotal = Column(Float, nullable=False, default=0)
+    discount = Column(Float, nullable=False, default=0)
+    total = Column(Float, nullable=False, default=0)
+
+class SellerDailyProductSales(Base):
+    __tablename__ = "seller_daily_product_sales"
+
+    seller_user_id = Column(Integer, primary_key=True)
+    day = Column(String, primary_key=True)  # YYYY-MM-DD
+    product_id = Column(Integer, primary_key=True)
+    units = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0)  # sum of quantity * unit_price
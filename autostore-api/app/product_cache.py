@@ -0,0 +1,219 @@
+# app/product_cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app import product_changes
+from app.fast_json import dump_row
+from app.schemas import ProductResponse
+
+PRODUCT_CACHE_TTL = float(os.getenv("PRODUCT_CACHE_TTL", "60"))
+PRODUCT_CACHE_MAX_ENTRIES = int(os.getenv("PRODUCT_CACHE_MAX_ENTRIES", "10000"))
+PRODUCT_CACHE_MAX_PAGES = int(os.getenv("PRODUCT_CACHE_MAX_PAGES", "1000"))
+# How often each worker replays the change log; the bound on reading another worker's stale write
+PRODUCT_CACHE_SYNC_INTERVAL = float(os.getenv("PRODUCT_CACHE_SYNC_INTERVAL", "1.0"))
+
+
+def render(product) -> bytes:
+    """Serializes a product exactly as the ProductResponse endpoints do"""
+    # Ensure that seller_user_id is not None; nothing that fails is cached
+    if product.seller_user_id is None:
+        raise HTTPException(status_code=400, detail="Seller user ID is missing.")
+    return dump_row(product, ProductResponse)
+
+
+class LRU:
+    """TTL + LRU map bounded by entry count"""
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: "OrderedDict[object, Tuple[float, object]]" = OrderedDict()
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key, value):
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def pop(self, key) -> bool:
+        return self.entries.pop(key, None) is not None
+
+    def clear(self):
+        self.entries.clear()
+
+
+class ProductCache:
+    """Per-worker product read cache in two tiers.
+
+    Bodies: product id -> serialized ProductResponse, dropped one by one as products change.
+    Pages: list query -> (product ids, next cursor), dropped whenever any product changes,
+    since an insert, delete or price change can move rows between pages.
+
+    Every write to products lands in the trigger-written product_changes log, whichever
+    worker or code path made it. A read replays the log first whenever sync_interval has
+    passed since the last replay, and writers replay right after committing, so no read
+    returns a value more than sync_interval older than the latest write.
+    stats() reports the staleness actually observed.
+    """
+
+    def __init__(self, max_entries: int = PRODUCT_CACHE_MAX_ENTRIES, max_pages: int = PRODUCT_CACHE_MAX_PAGES,
+                 ttl: float = PRODUCT_CACHE_TTL, sync_interval: float = PRODUCT_CACHE_SYNC_INTERVAL):
+        self.bodies = LRU(max_entries, ttl)
+        self.pages = LRU(max_pages, ttl)
+        self.sync_interval = sync_interval
+        self.lock = threading.Lock()
+        self.seq = -1
+        self.last_sync = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.page_hits = 0
+        self.page_misses = 0
+        self.invalidations = 0
+        self.full_flushes = 0
+        self.changes_applied = 0
+        self.max_staleness = 0.0
+        self.last_staleness = 0.0
+
+    def sync(self, db: Session, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self.last_sync < self.sync_interval:
+            return
+        with self.lock:
+            self.last_sync = now
+            if self.seq < 0:
+                self.seq = product_changes.latest_seq(db)
+                return
+            latest, changes = product_changes.changes_since(db, self.seq)
+            if changes is None:
+                # Fell behind the pruned log: nothing cached can be trusted
+                self.bodies.clear()
+                self.pages.clear()
+                self.full_flushes += 1
+                self.seq = latest
+                return
+            if not changes:
+                return
+            wall_clock = time.time()
+            for _, product_id, changed_at in changes:
+                if self.bodies.pop(product_id):
+                    self.invalidations += 1
+                    # How long the old value stayed servable here after the write (idle time included)
+                    self.last_staleness = max(0.0, wall_clock - changed_at)
+                    self.max_staleness = max(self.max_staleness, self.last_staleness)
+            self.changes_applied += len(changes)
+            self.pages.clear()
+            self.seq = latest
+
+    def _store(self, generation: int, bodies: Dict[int, bytes]):
+        # A change synced while we were loading may predate what we read; skip rather than risk caching it
+        with self.lock:
+            if generation != self.seq:
+                return
+            for product_id, body in bodies.items():
+                self.bodies.set(product_id, body)
+
+    def get_product(self, db: Session, product_id: int, load: Callable) -> Optional[bytes]:
+        """Serialized product, or None if it does not exist"""
+        self.sync(db)
+        with self.lock:
+            body = self.bodies.get(product_id)
+            if body is not None:
+                self.hits += 1
+                return body
+            self.misses += 1
+            generation = self.seq
+        product = load()
+        if product is None:
+            return None
+        body = render(product)
+        self._store(generation, {product_id: body})
+        return body
+
+    def get_products(self, db: Session, product_ids: List[int], load: Callable) -> List[bytes]:
+        """Serialized products in the given order; load(missing ids) fetches the uncached ones"""
+        self.sync(db)
+        bodies: Dict[int, bytes] = {}
+        with self.lock:
+            for product_id in product_ids:
+                body = self.bodies.get(product_id)
+                if body is not None:
+                    bodies[product_id] = body
+            self.hits += len(bodies)
+            self.misses += len(product_ids) - len(bodies)
+            generation = self.seq
+        missing = [product_id for product_id in product_ids if product_id not in bodies]
+        if missing:
+            loaded = {product.id: render(product) for product in load(missing)}
+            self._store(generation, loaded)
+            bodies.update(loaded)
+        return [bodies[product_id] for product_id in product_ids if product_id in bodies]
+
+    def get_page(self, db: Session, key: tuple, load: Callable) -> Tuple[List[bytes], Optional[str]]:
+        """(serialized products, next cursor) for a list query; load() returns (products, next cursor)"""
+        self.sync(db)
+        with self.lock:
+            page = self.pages.get(key)
+            if page is not None:
+                self.page_hits += 1
+            else:
+                self.page_misses += 1
+            generation = self.seq
+        if page is not None:
+            product_ids, cursor = page
+            return self.get_products(db, product_ids, lambda missing: load_missing(db, missing)), cursor
+
+        products, cursor = load()
+        bodies = {product.id: render(product) for product in products}
+        self._store(generation, bodies)
+        with self.lock:
+            if generation == self.seq:
+                self.pages.set(key, ([product.id for product in products], cursor))
+        return [bodies[product.id] for product in products], cursor
+
+    def stats(self) -> Dict:
+        with self.lock:
+            return {
+                "entries": len(self.bodies.entries),
+                "pages": len(self.pages.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "page_hits": self.page_hits,
+                "page_misses": self.page_misses,
+                "invalidations": self.invalidations,
+                "full_flushes": self.full_flushes,
+                "changes_applied": self.changes_applied,
+                "seq": self.seq,
+                "sync_interval_seconds": self.sync_interval,
+                "seconds_since_sync": round(time.monotonic() - self.last_sync, 3),
+                "last_staleness_seconds": round(self.last_staleness, 3),
+                "max_staleness_seconds": round(self.max_staleness, 3),
+            }
+
+
+def load_missing(db: Session, product_ids: List[int]):
+    from app import crud
+
+    return crud.get_products_by_ids(db, product_ids)
+
+
+def json_array(bodies: List[bytes]) -> bytes:
+    return b"[" + b",".join(bodies) + b"]"
+
+
+product_cache = ProductCache()
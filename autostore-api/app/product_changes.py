@@ -0,0 +1,80 @@
+# app/product_changes.py
+import asyncio
+import logging
+import time
+
+from fastapi.concurrency import run_in_threadpool
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+# Append-only log of changed product ids, written by triggers so every write path
+# (any worker, any statement) is recorded. Readers keep the last seq they applied.
+CHANGE_LOG_DDL = [
+    """CREATE TABLE IF NOT EXISTS product_changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        product_id INTEGER NOT NULL,
+        changed_at REAL NOT NULL
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS product_changes_ai AFTER INSERT ON products BEGIN
+        INSERT INTO product_changes(product_id, changed_at) VALUES (new.id, (julianday('now') - 2440587.5) * 86400.0);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_changes_au AFTER UPDATE ON products BEGIN
+        INSERT INTO product_changes(product_id, changed_at) VALUES (new.id, (julianday('now') - 2440587.5) * 86400.0);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_changes_ad AFTER DELETE ON products BEGIN
+        INSERT INTO product_changes(product_id, changed_at) VALUES (old.id, (julianday('now') - 2440587.5) * 86400.0);
+    END""",
+]
+
+# How long entries are kept; readers that fall further behind rebuild from scratch
+RETENTION_SECONDS = 3600
+PRUNE_INTERVAL = 60
+
+
+def init_product_changes(engine):
+    with engine.begin() as conn:
+        for statement in CHANGE_LOG_DDL:
+            conn.execute(text(statement))
+
+
+def latest_seq(db: Session) -> int:
+    row = db.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'product_changes'")).first()
+    return row[0] if row else 0
+
+
+def changes_since(db: Session, seq: int):
+    """Returns (latest seq, [(seq, product_id, changed_at)]), or (latest seq, None) if entries after seq were pruned"""
+    rows = db.execute(
+        text("SELECT seq, product_id, changed_at FROM product_changes WHERE seq > :seq ORDER BY seq"),
+        {"seq": seq},
+    ).all()
+    if rows:
+        if rows[0][0] != seq + 1:
+            return latest_seq(db), None
+        return rows[-1][0], rows
+
+    latest = latest_seq(db)
+    return (latest, None) if latest > seq else (seq, [])
+
+
+def prune(db: Session, retention: float = RETENTION_SECONDS):
+    db.execute(text("DELETE FROM product_changes WHERE changed_at < :cutoff"), {"cutoff": time.time() - retention})
+    db.commit()
+
+
+async def prune_periodically(session_factory, interval: float = PRUNE_INTERVAL):
+    """Background loop keeping the change log bounded; runs on a write session, readers never prune"""
+    def run():
+        db = session_factory()
+        try:
+            prune(db)
+        finally:
+            db.close()
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(run)
+        except Exception as e:
+            logging.error(f"Product change log prune failed: {e}")
@@ -0,0 +1,98 @@
+# app/ratings.py
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import text, tuple_
+from sqlalchemy.orm import Session
+
+from app import product_changes
+from app.models import Product, ProductRating
+from shared.pagination import decode_cursor, encode_cursor
+
+RATINGS = range(1, 6)
+TOP_RATED = "top_rated"
+
+
+def _delta_sql(ref: str, sign: int) -> str:
+    # Adds sign times one review to its product's aggregate; rows left with no reviews are dropped
+    histogram = ", ".join(f"rating_{r}" for r in RATINGS)
+    histogram_values = ", ".join(f"{sign} * ({ref}.rating = {r})" for r in RATINGS)
+    histogram_updates = ", ".join(f"rating_{r} = rating_{r} + excluded.rating_{r}" for r in RATINGS)
+    sql = f"""INSERT INTO product_ratings(product_id, rating_count, rating_sum, rating_avg, {histogram})
+        SELECT {ref}.product_id, {sign}, {sign} * {ref}.rating, {ref}.rating, {histogram_values}
+        WHERE {ref}.product_id IS NOT NULL AND {ref}.rating BETWEEN 1 AND 5
+        ON CONFLICT(product_id) DO UPDATE SET
+            rating_count = rating_count + excluded.rating_count,
+            rating_sum = rating_sum + excluded.rating_sum,
+            rating_avg = CASE WHEN rating_count + excluded.rating_count > 0
+                THEN (rating_sum + excluded.rating_sum) * 1.0 / (rating_count + excluded.rating_count) END,
+            {histogram_updates};"""
+    if sign < 0:
+        sql += f"\n        DELETE FROM product_ratings WHERE product_id = {ref}.product_id AND rating_count <= 0;"
+    # Logged as a product change so cached product pages (e.g. sort=top_rated) are rebuilt
+    sql += f"""
+        INSERT INTO product_changes(product_id, changed_at)
+        SELECT {ref}.product_id, (julianday('now') - 2440587.5) * 86400.0 WHERE {ref}.product_id IS NOT NULL;"""
+    return sql
+
+
+# The aggregate changes in the same transaction as the review write, whichever code path makes it
+RATING_TRIGGERS_DDL = [
+    f"""CREATE TRIGGER IF NOT EXISTS product_ratings_ai AFTER INSERT ON reviews BEGIN
+        {_delta_sql("new", 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS product_ratings_au AFTER UPDATE OF product_id, rating ON reviews BEGIN
+        {_delta_sql("old", -1)}
+        {_delta_sql("new", 1)}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS product_ratings_ad AFTER DELETE ON reviews BEGIN
+        {_delta_sql("old", -1)}
+    END""",
+]
+
+BACKFILL_SQL = [
+    "DELETE FROM product_ratings",
+    f"""INSERT INTO product_ratings(product_id, rating_count, rating_sum, rating_avg, {", ".join(f"rating_{r}" for r in RATINGS)})
+        SELECT product_id, COUNT(*), SUM(rating), AVG(rating), {", ".join(f"SUM(rating = {r})" for r in RATINGS)}
+        FROM reviews WHERE product_id IS NOT NULL AND rating BETWEEN 1 AND 5 GROUP BY product_id""",
+]
+
+
+def init_ratings(conn):
+    """Migration step: the review triggers, and the aggregate for reviews written before them"""
+    # Created here too, so the step does not depend on create_all having run first
+    ProductRating.__table__.create(conn, checkfirst=True)
+    for statement in product_changes.CHANGE_LOG_DDL + RATING_TRIGGERS_DDL + BACKFILL_SQL:
+        conn.execute(text(statement))
+
+
+def summarize(product_id: int, row: Optional[ProductRating]) -> Dict:
+    return {
+        "product_id": product_id,
+        "rating_count": row.rating_count if row else 0,
+        "rating_sum": row.rating_sum if row else 0,
+        "rating_avg": round(row.rating_avg, 2) if row and row.rating_avg is not None else None,
+        "histogram": {str(r): getattr(row, f"rating_{r}") if row else 0 for r in RATINGS},
+    }
+
+
+def top_rated(db: Session, skip: int = 0, limit: int = 10, cursor: Optional[str] = None) -> Tuple[List[Product], Optional[str]]:
+    """Reviewed products, best average first (ties: newest product first), and the next cursor.
+
+    Walks ix_product_ratings_avg_product_id backwards; reviews are never read.
+    """
+    query = (
+        db.query(Product, ProductRating.rating_avg)
+        .join(ProductRating, ProductRating.product_id == Product.id)
+        .filter(ProductRating.rating_avg.isnot(None))
+    )
+    if cursor:
+        value, last_id = decode_cursor(cursor, TOP_RATED, ProductRating.rating_avg)
+        query = query.filter(tuple_(ProductRating.rating_avg, ProductRating.product_id) < tuple_(value, last_id))
+    elif skip:
+        query = query.offset(skip)
+    rows = query.order_by(ProductRating.rating_avg.desc(), ProductRating.product_id.desc()).limit(limit).all()
+    next_page = None
+    if rows and len(rows) == limit:
+        last, rating_avg = rows[-1]
+        next_page = encode_cursor(TOP_RATED, rating_avg, last.id)
+    return [product for product, _ in rows], next_page
@@ -0,0 +1,238 @@
+# app/reservations.py
+"""Stock reservations: placing an order takes its stock atomically, payment settles it.
+
+A reservation is HELD from order creation until a payment is recorded or the order
+moves on to PAID, SHIPPED or DELIVERED (COMMITTED). If the payment fails, or the order
+is still CREATED after STOCK_RESERVATION_TTL, the stock goes back to the products and
+the order is cancelled (RELEASED).
+
+Concurrency checks against a scratch database:
+
+    python -m benchmarks.reservations
+"""
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.orm import Session
+
+from app import discounts
+from app.models import Order, OrderItem, Product, StockReservation
+from app.schemas import OrderCreate
+
+HELD = "HELD"
+COMMITTED = "COMMITTED"
+RELEASED = "RELEASED"
+
+# Orders in these states have been paid for, so their stock is sold
+PAID_ORDER_STATUSES = ("PAID", "SHIPPED", "DELIVERED")
+# Payment intent states that mean the payment did not go through
+FAILED_PAYMENT_STATUSES = ("canceled", "requires_payment_method")
+
+# Seconds an unpaid order keeps its stock
+STOCK_RESERVATION_TTL = int(os.getenv("STOCK_RESERVATION_TTL", "900"))
+# Seconds between sweeps for expired reservations
+STOCK_RESERVATION_SWEEP_INTERVAL = int(os.getenv("STOCK_RESERVATION_SWEEP_INTERVAL", "60"))
+
+
+def requested_quantities(items: Iterable) -> Dict[int, int]:
+    """Total quantity per product; an order may list a product more than once"""
+    quantities: Dict[int, int] = defaultdict(int)
+    for item in items:
+        if item.quantity is None or item.quantity <= 0:
+            raise HTTPException(status_code=400, detail=f"Quantity for product {item.product_id} must be positive")
+        quantities[item.product_id] += item.quantity
+    return dict(quantities)
+
+
+def _stock_change(quantities: Dict[int, int]):
+    return case(quantities, value=Product.id)
+
+
+def take_stock(db: Session, quantities: Dict[int, int]):
+    """Decrements stock for every product in one conditional UPDATE, or raises and takes nothing.
+
+    Runs inside the caller's transaction and should be its first write, so on SQLite the
+    write lock is taken before anything else is done.
+    """
+    if not quantities:
+        return
+    needed = _stock_change(quantities)
+    result = db.execute(
+        update(Product)
+        .where(Product.id.in_(quantities), Product.stock >= needed)
+        .values(stock=Product.stock - needed)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == len(quantities):
+        return
+
+    db.rollback()
+    stock = dict(db.query(Product.id, Product.stock).filter(Product.id.in_(quantities)).all())
+    missing = sorted(set(quantities) - set(stock))
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Products not found: {', '.join(map(str, missing))}")
+    short = sorted(product_id for product_id, quantity in quantities.items() if (stock[product_id] or 0) < quantity)
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Insufficient stock for products: {', '.join(map(str, short))}",
+    )
+
+
+def hold(db: Session, order_id: int, quantities: Dict[int, int], ttl: int = STOCK_RESERVATION_TTL):
+    hold_many(db, {(order_id, product_id): quantity for product_id, quantity in quantities.items()}, ttl)
+
+
+def hold_many(db: Session, quantities: Dict[tuple, int], ttl: int = STOCK_RESERVATION_TTL):
+    """Records HELD reservations keyed by (order_id, product_id), for several orders in one statement"""
+    expires_at = datetime.utcnow() + timedelta(seconds=ttl)
+    db.execute(insert(StockReservation), [
+        {"order_id": order_id, "product_id": product_id, "quantity": quantity, "status": HELD, "expires_at": expires_at}
+        for (order_id, product_id), quantity in quantities.items()
+    ])
+
+
+def place_order(db: Session, order: OrderCreate, user_id) -> Order:
+    """Creates the order, its items, its stock reservations and any discount redemption in one transaction"""
+    quantities = requested_quantities(order.items)
+    try:
+        take_stock(db, quantities)
+        # Discount and total are worked out here, never taken from the client
+        code, discount_amount = None, 0.0
+        if order.discount_code:
+            code, discount_amount = discounts.apply_code(db, order.discount_code, order.subtotal)
+        db_order = Order(
+            user_id=user_id,
+            seller_user_id=order.seller_user_id,
+            subtotal=order.subtotal,
+            tax=order.tax,
+            shipping_cost=order.shipping_cost,
+            discount_amount=discount_amount,
+            total=round(order.subtotal + order.tax + order.shipping_cost - discount_amount, 2),
+            status=order.status,
+            discount_code=code,
+        )
+        db.add(db_order)
+        db.flush()
+        for item in order.items:
+            db.add(OrderItem(order_id=db_order.id, product_id=item.product_id, quantity=item.quantity, unit_price=item.unit_price))
+        hold(db, db_order.id, quantities)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    db.refresh(db_order)
+    return db_order
+
+
+def _restock(db: Session, released: List) -> int:
+    quantities: Dict[int, int] = defaultdict(int)
+    for product_id, quantity in released:
+        quantities[product_id] += quantity
+    if quantities:
+        db.execute(
+            update(Product)
+            .where(Product.id.in_(quantities))
+            .values(stock=Product.stock + _stock_change(dict(quantities)))
+            .execution_options(synchronize_session=False)
+        )
+    return len(released)
+
+
+def release_order(db: Session, order_id: int, cancel: bool = True) -> int:
+    """Returns held stock of an order to the products; with cancel, an unpaid order becomes CANCELLED"""
+    # Flipping HELD -> RELEASED first makes a concurrent release (sweeper vs payment failure) a no-op
+    released = db.execute(
+        update(StockReservation)
+        .where(StockReservation.order_id == order_id, StockReservation.status == HELD)
+        .values(status=RELEASED)
+        .returning(StockReservation.product_id, StockReservation.quantity)
+        .execution_options(synchronize_session=False)
+    ).all()
+    count = _restock(db, released)
+    if cancel and count:
+        db.execute(
+            update(Order).where(Order.id == order_id, Order.status == "CREATED").values(status="CANCELLED")
+            .execution_options(synchronize_session=False)
+        )
+    if count:
+        # Stock is released once per order, so is its discount code use
+        discounts.unredeem(db, [order_id])
+    db.commit()
+    return count
+
+
+def confirm_order(db: Session, order_id: int) -> int:
+    """Marks an order's held stock as sold once it is paid; returns how many reservations it settled"""
+    result = db.execute(
+        update(StockReservation)
+        .where(StockReservation.order_id == order_id, StockReservation.status == HELD)
+        .values(status=COMMITTED)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def settle_order(db: Session, order: Order) -> int:
+    """Settles an order's reservations after a status change; returns how many gave their stock back"""
+    if order.status == "CANCELLED":
+        return release_order(db, order.id, cancel=False)
+    if order.status in PAID_ORDER_STATUSES:
+        confirm_order(db, order.id)
+    return 0
+
+
+def release_expired(db: Session, now: Optional[datetime] = None) -> int:
+    """Releases HELD reservations past their expiry and cancels those orders; returns how many.
+
+    Only orders still CREATED are swept: a paid order keeps its stock even if nothing confirmed it.
+    """
+    unpaid = select(Order.id).where(Order.status == "CREATED")
+    released = db.execute(
+        update(StockReservation)
+        .where(
+            StockReservation.status == HELD,
+            StockReservation.expires_at < (now or datetime.utcnow()),
+            StockReservation.order_id.in_(unpaid),
+        )
+        .values(status=RELEASED)
+        .returning(StockReservation.order_id, StockReservation.product_id, StockReservation.quantity)
+        .execution_options(synchronize_session=False)
+    ).all()
+    count = _restock(db, [(product_id, quantity) for _, product_id, quantity in released])
+    order_ids = {order_id for order_id, _, _ in released}
+    if order_ids:
+        db.execute(
+            update(Order).where(Order.id.in_(order_ids), Order.status == "CREATED").values(status="CANCELLED")
+            .execution_options(synchronize_session=False)
+        )
+        discounts.unredeem(db, order_ids)
+    db.commit()
+    return count
+
+
+async def sweep_expired(session_factory, interval: int = STOCK_RESERVATION_SWEEP_INTERVAL):
+    """Background loop releasing expired reservations"""
+    def sweep():
+        db = session_factory()
+        try:
+            return release_expired(db)
+        finally:
+            db.close()
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            released = await run_in_threadpool(sweep)
+            if released:
+                logging.info(f"Released {released} expired stock reservations")
+        except Exception as e:
+            logging.error(f"Stock reservation sweep failed: {e}")
+
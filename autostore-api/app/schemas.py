@@ -1,7 +1,7 @@
 from typing import List   
 from pydantic import BaseModel, validator
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import Dict, Literal, Optional
 
 
 # ==================== Base Schema ====================
@@ -59,6 +59,31 @@ class ProductResponse(ProductBase):
         return obj
 
 
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class ProductFacetsResponse(BaseModel):
+    total: int
+    brand: List[FacetCount]
+    condition: List[FacetCount]
+    price: List[FacetCount]  # buckets, e.g. "50-100", "1000+"
+    availability: List[FacetCount]  # in_stock / out_of_stock
+
+
+class ImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class ProductImportResponse(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[ImportRowError]  # first errors only
+    errors_truncated: bool
+
+
 # Cart Schema
 class CartBase(BaseSchema):
     user_id: Optional[int] = None
@@ -82,6 +107,22 @@ class CartResponse(BaseModel):
         orm_mode = True
 
 
+class CartSellerSubtotal(BaseModel):
+    seller_user_id: Optional[int] = None
+    line_count: int
+    item_count: int
+    subtotal: float
+
+
+class CartSummaryResponse(BaseModel):
+    cart_id: int
+    version: int  # changes whenever the cart's items do
+    line_count: int
+    item_count: int  # sum of quantities
+    subtotal: float
+    sellers: List[CartSellerSubtotal]
+
+
 # ==================== CartItem Schemas ====================
 
 class CartItemBase(BaseSchema):
@@ -111,6 +152,25 @@ class CartItemResponse(CartItemBase):
         return obj
 
 
+class CartItemOperation(BaseModel):
+    op: Literal["add", "set", "remove"]
+    product_id: int
+    quantity: Optional[int] = None  # add: positive; set: 0 or more (0 removes)
+    unit_price: Optional[float] = None  # defaults to the product's current price
+
+
+class CartItemBatch(BaseModel):
+    operations: List[CartItemOperation]
+
+
+class CartDetailResponse(CartResponse):
+    items: List[CartItemResponse]
+
+
+class CheckoutRequest(BaseModel):
+    discount_code: Optional[str] = None
+
+
 # ==================== Order Schemas ====================
 
 class OrderBase(BaseSchema):
@@ -122,6 +182,7 @@ class OrderBase(BaseSchema):
     discount_amount: Optional[float] = None
     total: Optional[float] = None
     status: Optional[str] = "CREATED"  # CREATED / PAID / SHIPPED / DELIVERED / CANCELLED
+    discount_code: Optional[str] = None
 
 
 
@@ -135,8 +196,9 @@ class OrderCreate(BaseModel):
     subtotal: float
     tax: float
     shipping_cost: float
-    discount_amount: float
-    total: float
+    discount_amount: Optional[float] = None  # ignored: computed server-side from discount_code
+    total: Optional[float] = None  # ignored: subtotal + tax + shipping_cost - discount_amount
+    discount_code: Optional[str] = None
     status: Optional[str] = "CREATED"  # Default to "CREATED" if not provided
     items: List[OrderItemCreate]  # List of items in the order
 
@@ -238,6 +300,13 @@ class ShipmentResponse(ShipmentBase):
         return obj
 
 
+class OrderDetailResponse(OrderResponse):
+    # Present only when named in ?expand=
+    items: Optional[List[OrderItemResponse]] = None
+    payment: Optional[PaymentResponse] = None
+    shipment: Optional[ShipmentResponse] = None
+
+
 # ==================== DiscountCode Schemas ====================
 
 class DiscountCodeBase(BaseSchema):
@@ -247,6 +316,7 @@ class DiscountCodeBase(BaseSchema):
     valid_from: Optional[datetime] = None
     valid_to: Optional[datetime] = None
     active: Optional[bool] = True
+    max_uses: Optional[int] = None  # None: unlimited
 
 
 class DiscountCodeCreate(DiscountCodeBase):
@@ -263,6 +333,7 @@ class DiscountCodeUpdate(DiscountCodeBase):
 
 class DiscountCodeResponse(DiscountCodeBase):
     code: str
+    used_count: int = 0
 
     @classmethod
     def from_orm(cls, obj):
@@ -270,6 +341,20 @@ class DiscountCodeResponse(DiscountCodeBase):
         return obj
 
 
+class DiscountValidateRequest(BaseModel):
+    code: str
+    subtotal: float
+
+
+class DiscountValidateResponse(BaseModel):
+    code: str
+    type: str  # PERCENT / FIXED
+    value: float
+    subtotal: float
+    discount_amount: float
+    subtotal_after_discount: float
+
+
 # ==================== Review Schemas ====================
 
 class ReviewBase(BaseSchema):
@@ -281,8 +366,7 @@ class ReviewBase(BaseSchema):
 
 class ReviewCreate(ReviewBase):
     product_id: int
-    user_id: int
-    rating: int
+    rating: int  # 1-5
     comment: str
 
 
@@ -297,3 +381,42 @@ class ReviewResponse(ReviewBase):
     def from_orm(cls, obj):
         obj = super().from_orm(obj)
         return obj
+
+
+class ProductRatingResponse(BaseModel):
+    product_id: int
+    rating_count: int
+    rating_sum: int
+    rating_avg: Optional[float] = None  # None until the product has a review
+    histogram: Dict[str, int]  # "1".."5" -> number of reviews
+
+
+# ==================== Seller Analytics Schemas ====================
+
+class AnalyticsTotals(BaseModel):
+    orders: int
+    units: int
+    revenue: float  # sum of quantity * unit_price over order items
+    discount: float
+    total: float  # order totals, including tax and shipping
+
+
+class AnalyticsPeriod(AnalyticsTotals):
+    period: str  # first day of the day / week (Monday) / month
+
+
+class ProductSales(BaseModel):
+    product_id: int
+    units: int
+    revenue: float
+
+
+class SellerAnalyticsResponse(BaseModel):
+    seller_user_id: int
+    date_from: date
+    date_to: date
+    granularity: str  # day / week / month
+    periods: List[AnalyticsPeriod]
+    totals: AnalyticsTotals
+    top_products: List[ProductSales]
+
@@ -0,0 +1,114 @@
+# app/search.py
+import logging
+import re
+from typing import Optional
+
+from sqlalchemy import Float, column, func, literal_column, or_, table, text, type_coerce
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.models import Product
+from shared.pagination import decode_cursor, encode_cursor, next_cursor, paginate
+
+# External-content FTS5 index over products(name, description, brand), kept in sync by triggers
+FTS_DDL = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, brand, content='products', content_rowid='id'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description, brand)
+        VALUES (new.id, new.name, new.description, new.brand);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, brand)
+        VALUES ('delete', old.id, old.name, old.description, old.brand);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description, brand ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, brand)
+        VALUES ('delete', old.id, old.name, old.description, old.brand);
+        INSERT INTO products_fts(rowid, name, description, brand)
+        VALUES (new.id, new.name, new.description, new.brand);
+    END""",
+]
+
+# bm25 column weights: name, description, brand
+RANK_WEIGHTS = (10.0, 1.0, 5.0)
+
+RELEVANCE = "relevance"
+
+fts_available = False
+
+products_fts = table("products_fts", column("rowid"))
+
+
+def init_search(engine):
+    """Creates the FTS index and its triggers, backfilling it the first time"""
+    global fts_available
+    try:
+        with engine.begin() as conn:
+            exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = 'products_fts'")).first()
+            for statement in FTS_DDL:
+                conn.execute(text(statement))
+            if not exists:
+                conn.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+        fts_available = True
+    except OperationalError as e:
+        # SQLite built without FTS5: search still works with LIKE, just slower
+        logging.warning(f"FTS5 unavailable, product search falls back to LIKE: {e}")
+
+
+def match_expression(q: str) -> Optional[str]:
+    # Every word must match, as a prefix; quoting keeps FTS5 syntax out of user input
+    words = re.findall(r"\w+", q)
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def apply_filters(query, min_price=None, max_price=None, condition=None, brand=None, active=None, in_stock=None):
+    if min_price is not None:
+        query = query.filter(Product.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Product.price <= max_price)
+    if condition is not None:
+        query = query.filter(Product.condition == condition)
+    if brand is not None:
+        query = query.filter(Product.brand == brand)
+    if active is not None:
+        query = query.filter(Product.active == active)
+    if in_stock is not None:
+        query = query.filter(Product.stock > 0 if in_stock else or_(Product.stock <= 0, Product.stock.is_(None)))
+    return query
+
+
+def search_products(db: Session, sort_keys: dict, q: Optional[str] = None, sort: str = RELEVANCE,
+                    limit: int = 10, cursor: Optional[str] = None, **filters):
+    """Returns (products, next_cursor)"""
+    match = match_expression(q) if q else None
+    if match is None or sort != RELEVANCE or not fts_available:
+        query = apply_filters(db.query(Product), **filters)
+        if match is not None and fts_available:
+            query = query.join(products_fts, products_fts.c.rowid == Product.id).filter(
+                literal_column("products_fts").op("MATCH")(match)
+            )
+        elif q:
+            pattern = f"%{q}%"
+            query = query.filter(or_(Product.name.ilike(pattern), Product.description.ilike(pattern), Product.brand.ilike(pattern)))
+        key = "id" if sort == RELEVANCE else sort
+        rows = paginate(query, sort_keys, Product.id, key, 0, limit, cursor)
+        return rows, next_cursor(rows, key, limit)
+
+    # Ranked full-text match, paged by (rank, id)
+    rank = type_coerce(func.bm25(literal_column("products_fts"), *RANK_WEIGHTS), Float).label("rank")
+    query = (
+        db.query(Product, rank)
+        .join(products_fts, products_fts.c.rowid == Product.id)
+        .filter(literal_column("products_fts").op("MATCH")(match))
+    )
+    query = apply_filters(query, **filters)
+    if cursor:
+        last_rank, last_id = decode_cursor(cursor, RELEVANCE, rank)
+        query = query.filter(or_(rank > last_rank, (rank == last_rank) & (Product.id > last_id)))
+    rows = query.order_by(rank, Product.id).limit(limit).all()
+    next_page = encode_cursor(RELEVANCE, rows[-1][1], rows[-1][0].id) if rows and len(rows) == limit else None
+    return [product for product, _ in rows], next_page
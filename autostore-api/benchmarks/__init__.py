@@ -0,0 +1,8 @@
+"""Benchmarks and concurrency checks for autostore-api, run from autostore-api/:
+
+    python -m benchmarks.reservations
+
+Importing the package points the app at a scratch database (see fixtures), so nothing
+here ever touches auto_store.db.
+"""
+from benchmarks import fixtures  # noqa: F401
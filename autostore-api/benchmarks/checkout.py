@@ -0,0 +1,74 @@
+# benchmarks/checkout.py
+"""Checkout latency: the old client-driven flow (GET cart, GET items, POST /orders/ per seller)
+against POST /carts/{id}/checkout, through the real app.
+
+    python -m benchmarks.checkout
+"""
+import statistics
+import time
+import warnings
+from collections import defaultdict
+
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+from app.models import Cart, CartItem, Product
+from shared.jwt_utils import create_access_token
+
+
+def benchmark(items: int = 10, rounds: int = 50):
+    warnings.filterwarnings("ignore")
+    client = TestClient(app)
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": "1", "fullname": "Bench"})}
+
+    # Sessions are closed before any request runs: the app has a single write connection
+    with SessionLocal() as db:
+        products = [Product(seller_user_id=100 + i % 3, name=f"Part {i}", price=10.0 + i, stock=10 ** 6) for i in range(items)]
+        db.add_all(products)
+        db.flush()
+        product_ids = [product.id for product in products]
+        db.commit()
+
+    def fill_cart():
+        with SessionLocal() as db:
+            cart = Cart(user_id=1, status="ACTIVE")
+            db.add(cart)
+            db.flush()
+            cart_id = cart.id
+            db.add_all(CartItem(cart_id=cart_id, product_id=pid, quantity=2, unit_price=10.0) for pid in product_ids)
+            db.commit()
+        return cart_id
+
+    def old_flow(cart_id):
+        client.get(f"/carts/{cart_id}", headers=headers)
+        cart_items = client.get(f"/carts/{cart_id}/items", headers=headers).json()
+        by_seller = defaultdict(list)
+        for item in cart_items:
+            by_seller[100 + product_ids.index(item["product_id"]) % 3].append(item)
+        for seller, seller_items in by_seller.items():
+            subtotal = sum(item["unit_price"] * item["quantity"] for item in seller_items)
+            client.post("/orders/", headers=headers, json={
+                "seller_user_id": seller, "subtotal": subtotal, "tax": 0, "shipping_cost": 0,
+                "discount_amount": 0, "total": subtotal,
+                "items": [{"product_id": i["product_id"], "quantity": i["quantity"], "unit_price": i["unit_price"]} for i in seller_items],
+            })
+        client.put(f"/carts/{cart_id}", headers=headers, json={"status": "CHECKED_OUT"})
+
+    def new_flow(cart_id):
+        response = client.post(f"/carts/{cart_id}/checkout", headers=headers)
+        assert response.status_code == 200, response.text
+
+    for name, flow in (("client-driven", old_flow), ("POST /carts/{id}/checkout", new_flow)):
+        timings = []
+        for _ in range(rounds):
+            cart_id = fill_cart()
+            started = time.perf_counter()
+            flow(cart_id)
+            timings.append((time.perf_counter() - started) * 1000)
+        print(f"{name:28} {items} items: median {statistics.median(timings):.1f}ms, "
+              f"p95 {sorted(timings)[int(rounds * 0.95) - 1]:.1f}ms")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,74 @@
+# benchmarks/db_engine.py
+"""Concurrent writers and readers on one file: the old default engine against shared.db_engine.Database.
+
+    python -m benchmarks.db_engine
+"""
+import threading
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.fixtures import scratch_url
+from shared.db_engine import Database, SQLiteProfile
+
+
+def stress(writers: int = 8, readers: int = 8, transactions: int = 100):
+    def run(label, write_session, read_session):
+        with write_session() as db:
+            db.execute(text("CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY, payload TEXT)"))
+            db.execute(text("CREATE TABLE IF NOT EXISTS totals (id INTEGER PRIMARY KEY, n INTEGER)"))
+            db.execute(text("INSERT INTO totals VALUES (1, 0)"))
+            db.commit()
+        counts = {"committed": 0, "locked": 0, "reads": 0}
+        lock = threading.Lock()
+        done = threading.Event()
+
+        def writer():
+            for _ in range(transactions):
+                try:
+                    with write_session() as db:
+                        # Read-modify-write, like placing an order: the read lock must be upgraded
+                        n = db.execute(text("SELECT n FROM totals WHERE id = 1")).scalar()
+                        db.execute(text("INSERT INTO events (payload) VALUES (:p)"), {"p": "x" * 200})
+                        db.execute(text("UPDATE totals SET n = :n WHERE id = 1"), {"n": n + 1})
+                        db.commit()
+                    outcome = "committed"
+                except OperationalError:
+                    outcome = "locked"
+                with lock:
+                    counts[outcome] += 1
+
+        def reader():
+            while not done.is_set():
+                with read_session() as db:
+                    db.execute(text("SELECT COUNT(*), MAX(id) FROM events")).all()
+                with lock:
+                    counts["reads"] += 1
+
+        threads = [threading.Thread(target=writer) for _ in range(writers)]
+        background = [threading.Thread(target=reader) for _ in range(readers)]
+        started = time.perf_counter()
+        for thread in threads + background:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        for thread in background:
+            thread.join()
+        with read_session() as db:
+            total = db.execute(text("SELECT n FROM totals WHERE id = 1")).scalar()
+        print(f"{label:>16}: {counts['committed'] / elapsed:6.0f} commits/s, {counts['locked']} failed with "
+              f"'database is locked', {counts['reads'] / elapsed:6.0f} reads/s, lost updates {counts['committed'] - total}")
+
+    legacy = create_engine(scratch_url("legacy.db"), connect_args={"check_same_thread": False})
+    legacy_session = sessionmaker(bind=legacy)
+    run("default engine", legacy_session, legacy_session)
+    database = Database(scratch_url("tuned.db"), profile=SQLiteProfile())
+    run("Database", database.SessionLocal, database.ReadSessionLocal)
+
+
+if __name__ == "__main__":
+    stress()
@@ -0,0 +1,78 @@
+# benchmarks/discounts.py
+"""Discount index load, lookup and refresh costs, and a redemption race on a limited-use code.
+
+    python -m benchmarks.discounts
+"""
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+from sqlalchemy import insert, update
+
+from app.discounts import FIXED, PERCENT, DiscountEngine, redeem
+from app.models import DiscountCode
+from benchmarks.fixtures import scratch_db
+
+
+def benchmark(codes: int = 100_000, lookups: int = 1_000_000):
+    _, Session = scratch_db("discounts.db")
+    start, end = datetime.utcnow() - timedelta(days=1), datetime.utcnow() + timedelta(days=30)
+    with Session() as db:
+        db.execute(insert(DiscountCode), [
+            {"code": f"CODE{i:06d}", "type": PERCENT if i % 2 else FIXED, "value": 10.0, "valid_from": start,
+             "valid_to": end, "active": True, "max_uses": None, "updated_at": start - timedelta(seconds=codes - i)}
+            for i in range(codes)
+        ])
+        db.commit()
+
+    engine_under_test = DiscountEngine(refresh_interval=3600)
+    with Session() as db:
+        started = time.perf_counter()
+        engine_under_test.refresh(db, force=True)
+        print(f"full load of {len(engine_under_test.codes)} active codes: {(time.perf_counter() - started) * 1000:.0f}ms")
+
+        names = [f"CODE{random.randrange(codes):06d}" for _ in range(lookups)]
+        now = datetime.utcnow()
+        started = time.perf_counter()
+        for name in names:
+            engine_under_test.evaluate(db, name, 120.0, now)
+        print(f"evaluate: {(time.perf_counter() - started) / lookups * 1e9:.0f}ns per code")
+
+        db.execute(update(DiscountCode).where(DiscountCode.code.in_(names[:1000])).values(value=20.0, updated_at=datetime.utcnow()))
+        db.commit()
+        started = time.perf_counter()
+        engine_under_test.refresh(db, force=True)
+        print(f"incremental refresh after 1000 changed codes: {(time.perf_counter() - started) * 1000:.1f}ms")
+        assert engine_under_test.codes[names[0]].value == 20.0
+
+        db.execute(insert(DiscountCode).values(code="LIMITED", type=FIXED, value=5.0, active=True, max_uses=100, updated_at=now))
+        db.commit()
+    with Session() as db:
+        engine_under_test.refresh(db, force=True)
+
+    def buyer(_):
+        redeemed = 0
+        with Session() as db:
+            for _ in range(20):
+                try:
+                    compiled, _ = engine_under_test.evaluate(db, "LIMITED", 50.0)
+                    redeem(db, compiled)
+                    db.commit()
+                    redeemed += 1
+                except HTTPException as e:
+                    db.rollback()
+                    assert e.status_code == 409, e.detail
+        return redeemed
+
+    with ThreadPoolExecutor(16) as pool:
+        redeemed = sum(pool.map(buyer, range(16)))
+    with Session() as db:
+        used = db.get(DiscountCode, "LIMITED").used_count
+    print(f"16 threads x 20 redemptions of a 100-use code: redeemed {redeemed}, used_count {used}")
+    assert redeemed == used == 100
+
+
+if __name__ == "__main__":
+    benchmark()
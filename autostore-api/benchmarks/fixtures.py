@@ -0,0 +1,29 @@
+# benchmarks/fixtures.py
+"""Scratch databases for the benchmarks: a fresh SQLite file (or memory) with the app's tables."""
+import os
+import tempfile
+
+from shared.db_engine import Database
+
+
+def scratch_url(name: str) -> str:
+    """URL of a new, empty SQLite file in its own temporary directory"""
+    return f"sqlite:///{os.path.join(tempfile.mkdtemp(), name)}"
+
+
+# Before anything imports app.database, which builds its engines from the environment
+os.environ["AUTOSTORE_DB_URL"] = scratch_url("auto_store.db")
+os.environ.pop("AUTOSTORE_ASYNC_DB_URL", None)
+
+
+def scratch_db(name: str = None):
+    """(engine, sessionmaker) on a new database with every app table; in memory unless named.
+
+    Built by shared.db_engine.Database like the service's own, so a file database runs with the
+    same PRAGMAs (WAL, busy_timeout) and the same single write connection.
+    """
+    from app.database import Base
+
+    database = Database(scratch_url(name) if name else "sqlite://")
+    Base.metadata.create_all(database.engine)
+    return database.engine, database.SessionLocal
@@ -0,0 +1,49 @@
+# benchmarks/pagination.py
+"""Page latency by depth on a large products table: ?skip= against ?cursor=.
+
+    python -m benchmarks.pagination
+"""
+import statistics
+import time
+
+from sqlalchemy import insert
+
+from app import crud
+from app.models import Product
+from benchmarks.fixtures import scratch_db
+from shared.pagination import next_cursor
+
+
+def benchmark(rows: int = 1_000_000, limit: int = 20, depths=(0, 1_000, 10_000, 100_000, 500_000, 999_000), rounds: int = 5):
+    engine, Session = scratch_db("pagination.db")
+    with engine.begin() as conn:
+        for start in range(0, rows, 50_000):
+            conn.execute(insert(Product), [
+                {"seller_user_id": 1 + i % 50, "name": f"Part {i}", "price": round(5 + (i * 7919) % 100_000 / 100, 2),
+                 "condition": "NEW", "brand": "Bosch", "stock": 10, "active": True}
+                for i in range(start, min(start + 50_000, rows))
+            ])
+
+    def timed(fetch):
+        timings = []
+        for _ in range(rounds):
+            with Session() as db:
+                started = time.perf_counter()
+                page = fetch(db)
+                timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings), [product.id for product in page]
+
+    for sort in ("id", "price"):
+        print(f"sort={sort}, {rows} products, pages of {limit}")
+        for depth in depths:
+            with Session() as db:
+                # The cursor a client holds after paging down to this depth
+                cursor = next_cursor(crud.get_products(db, skip=depth - 1, limit=1, sort=sort), sort, 1) if depth else None
+            offset_ms, offset_ids = timed(lambda db: crud.get_products(db, skip=depth, limit=limit, sort=sort))
+            cursor_ms, cursor_ids = timed(lambda db: crud.get_products(db, limit=limit, cursor=cursor, sort=sort))
+            assert offset_ids == cursor_ids, f"pages differ at depth {depth}"
+            print(f"  depth {depth:>9}: skip {offset_ms:8.2f}ms, cursor {cursor_ms:6.2f}ms")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,81 @@
+# benchmarks/reservations.py
+"""Stock reservations: a paid order keeps its stock past expiry, and concurrent buyers never oversell.
+
+    python -m benchmarks.reservations
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException
+
+from app import crud
+from app.models import Order, Product, StockReservation
+from app.reservations import HELD, place_order, release_expired, settle_order
+from app.schemas import OrderCreate, OrderItemCreate, OrderUpdate
+from benchmarks.fixtures import scratch_db
+
+
+def check_paid_orders_keep_stock():
+    """The last unit, ordered and marked PAID, must stay sold when its reservation expires"""
+    _, Session = scratch_db("paid.db")
+    with Session() as db:
+        db.add_all([Product(id=1, seller_user_id=1, name="Last unit", price=10.0, stock=1),
+                    Product(id=2, seller_user_id=1, name="Unpaid", price=10.0, stock=1)])
+        db.commit()
+        items = lambda product_id: [OrderItemCreate(product_id=product_id, quantity=1, unit_price=10.0)]
+        paid = place_order(db, OrderCreate(seller_user_id=1, subtotal=10, tax=0, shipping_cost=0, items=items(1)), 1)
+        unpaid = place_order(db, OrderCreate(seller_user_id=1, subtotal=10, tax=0, shipping_cost=0, items=items(2)), 1)
+        settle_order(db, crud.update_order_status(db, paid.id, OrderUpdate(status="PAID")))  # PUT /orders/{id}
+
+        released = release_expired(db, now=datetime.utcnow() + timedelta(hours=1))
+        db.expire_all()
+        stock = {product.id: product.stock for product in db.query(Product)}
+        statuses = {order.id: order.status for order in db.query(Order)}
+    print(f"expired sweep: released {released}, stock {stock}, orders {statuses}")
+    assert released == 1 and stock == {1: 0, 2: 1}
+    assert statuses == {paid.id: "PAID", unpaid.id: "CANCELLED"}
+
+
+def stress(threads: int = 32, attempts: int = 20, stock: int = 100):
+    """Buyers racing for one SKU: exactly `stock` orders are placed, the rest get 409"""
+    _, Session = scratch_db("stress.db")
+    with Session() as db:
+        db.add(Product(id=1, seller_user_id=1, name="Hot SKU", price=10.0, stock=stock))
+        db.commit()
+
+    order = OrderCreate(seller_user_id=1, subtotal=10, tax=0, shipping_cost=0, discount_amount=0, total=10,
+                        items=[OrderItemCreate(product_id=1, quantity=1, unit_price=10.0)])
+
+    def buyer(user_id):
+        placed = rejected = 0
+        with Session() as db:
+            for _ in range(attempts):
+                try:
+                    place_order(db, order, user_id)
+                    placed += 1
+                except HTTPException as e:
+                    assert e.status_code == 409, e.detail
+                    rejected += 1
+        return placed, rejected
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        results = list(pool.map(buyer, range(threads)))
+    elapsed = time.perf_counter() - started
+
+    placed = sum(p for p, _ in results)
+    rejected = sum(r for _, r in results)
+    with Session() as db:
+        left = db.get(Product, 1).stock
+        held = sum(r.quantity for r in db.query(StockReservation).filter(StockReservation.status == HELD))
+    oversold = placed - stock
+    print(f"{threads} buyers x {attempts} attempts on stock {stock}: placed {placed}, rejected {rejected}, "
+          f"stock left {left}, held {held}, oversold {max(oversold, 0)}, "
+          f"{threads * attempts / elapsed:.0f} checkouts/s")
+    assert placed == stock and left == 0 and held == stock
+
+
+if __name__ == "__main__":
+    check_paid_orders_keep_stock()
+    stress()
@@ -0,0 +1,143 @@
+import os
+from dataclasses import dataclass
+from typing import List, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+
+JOURNAL_MODES = {"WAL", "DELETE", "TRUNCATE", "PERSIST", "MEMORY", "OFF"}
+SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_choice(name: str, default: str, choices: set) -> str:
+    value = (os.getenv(name) or default).strip().upper()
+    if value not in choices:
+        raise ValueError(f"{name} must be one of: {', '.join(sorted(choices))}")
+    return value
+
+
+@dataclass(frozen=True)
+class SQLiteProfile:
+    """PRAGMAs run on every new connection, and the pool sizes of the read and write engines"""
+    journal_mode: str = "WAL"  # readers never block the writer, nor the writer readers
+    synchronous: str = "NORMAL"  # in WAL mode: no fsync per commit, still never corrupts
+    mmap_size: int = 256 * 1024 * 1024  # bytes of the file read through memory mapping
+    cache_size_kib: int = 64 * 1024  # page cache per connection
+    busy_timeout_ms: int = 5000  # how long a locked database is waited for before "database is locked"
+    read_pool_size: int = 8
+    write_pool_timeout: int = 30  # seconds a session waits for the write connection
+
+    @classmethod
+    def from_env(cls) -> "SQLiteProfile":
+        return cls(
+            journal_mode=_env_choice("SQLITE_JOURNAL_MODE", cls.journal_mode, JOURNAL_MODES),
+            synchronous=_env_choice("SQLITE_SYNCHRONOUS", cls.synchronous, SYNCHRONOUS_MODES),
+            mmap_size=_env_int("SQLITE_MMAP_SIZE", cls.mmap_size),
+            cache_size_kib=_env_int("SQLITE_CACHE_SIZE_KIB", cls.cache_size_kib),
+            busy_timeout_ms=_env_int("SQLITE_BUSY_TIMEOUT_MS", cls.busy_timeout_ms),
+            read_pool_size=_env_int("DB_READ_POOL_SIZE", cls.read_pool_size),
+            write_pool_timeout=_env_int("DB_WRITE_POOL_TIMEOUT", cls.write_pool_timeout),
+        )
+
+    def pragmas(self, read_only: bool) -> List[str]:
+        statements = [
+            f"PRAGMA busy_timeout = {self.busy_timeout_ms}",  # first, so switching to WAL waits for the lock
+            f"PRAGMA journal_mode = {self.journal_mode}",
+            f"PRAGMA synchronous = {self.synchronous}",
+            f"PRAGMA mmap_size = {self.mmap_size}",
+            f"PRAGMA cache_size = -{self.cache_size_kib}",
+        ]
+        if read_only:
+            statements.append("PRAGMA query_only = ON")  # a write through the read pool fails loudly
+        return statements
+
+
+def is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def is_memory(url: str) -> bool:
+    database = make_url(url).database
+    return not database or database == ":memory:" or "mode=memory" in url
+
+
+def async_url(url: str) -> str:
+    """The same SQLite database through aiosqlite; other backends need their async URL given"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return url
+    return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+
+
+def _on_connect(engine, pragmas: List[str]):
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        for statement in pragmas:
+            cursor.execute(statement)
+        cursor.close()
+
+
+class Database:
+    """Engines and session factories for one database, chosen by what a session will do.
+
+    On SQLite only one connection can write at a time, so the write engines hold a single
+    connection: concurrent writers queue for it in the pool instead of failing with
+    "database is locked". Read-only work uses the read engines, a pool of query_only
+    connections that run alongside the writer under WAL. A session that reads and then
+    writes must be a write session, so its reads see its own transaction.
+    """
+
+    def __init__(self, url: str, async_database_url: Optional[str] = None, profile: Optional[SQLiteProfile] = None):
+        self.url = url
+        self.async_url = async_database_url or async_url(url)
+        self.profile = profile or SQLiteProfile.from_env()
+
+        self.engine = self._engine(self.url, read_only=False, asynchronous=False)
+        self.async_engine = self._engine(self.async_url, read_only=False, asynchronous=True)
+        if is_sqlite(url) and is_memory(url):
+            # Every connection to :memory: is a database of its own, so there is nothing to split
+            self.read_engine, self.async_read_engine = self.engine, self.async_engine
+        else:
+            self.read_engine = self._engine(self.url, read_only=True, asynchronous=False)
+            self.async_read_engine = self._engine(self.async_url, read_only=True, asynchronous=True)
+
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.read_engine)
+        # Objects stay readable after commit, so async handlers can return them without another query
+        self.AsyncSessionLocal = async_sessionmaker(self.async_engine, expire_on_commit=False, autoflush=False)
+        self.AsyncReadSessionLocal = async_sessionmaker(self.async_read_engine, expire_on_commit=False, autoflush=False)
+
+    def _engine(self, url: str, read_only: bool, asynchronous: bool):
+        factory = create_async_engine if asynchronous else create_engine
+        if not is_sqlite(url):
+            return factory(url)
+
+        connect_args = {} if asynchronous else {"check_same_thread": False}
+        if is_memory(url):
+            engine = factory(url, poolclass=StaticPool, connect_args=connect_args)
+        else:
+            # Pooled explicitly: aiosqlite would otherwise open a connection (and a thread) per session
+            poolclass = AsyncAdaptedQueuePool if asynchronous else QueuePool
+            if read_only:
+                sizing = {"pool_size": self.profile.read_pool_size}
+            else:
+                sizing = {"pool_size": 1, "max_overflow": 0, "pool_timeout": self.profile.write_pool_timeout}
+            engine = factory(url, poolclass=poolclass, connect_args=connect_args, **sizing)
+        _on_connect(engine.sync_engine if asynchronous else engine, self.profile.pragmas(read_only and not is_memory(url)))
+        return engine
+
+    async def dispose(self):
+        """Closes every pooled connection; pooled aiosqlite connections each own a thread"""
+        for engine in {self.async_engine, self.async_read_engine}:
+            await engine.dispose()
+        for engine in {self.engine, self.read_engine}:
+            engine.dispose()
@@ -0,0 +1,14 @@
+# tests/conftest.py
+import pytest
+from fastapi.testclient import TestClient
+
+# Points the app at a scratch database before anything imports app.database
+from benchmarks import fixtures  # noqa: F401
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
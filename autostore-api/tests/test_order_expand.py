@@ -0,0 +1,52 @@
+# tests/test_order_expand.py
+"""GET /orders/?expand=... costs the same number of queries whatever the page size."""
+import pytest
+from sqlalchemy import event
+
+from app.database import SessionLocal, engines
+from app.models import Order, OrderItem, Payment, Shipment
+from app.order_expand import EXPANDABLE
+from shared.jwt_utils import create_access_token
+
+
+def seed_orders(user_id: int, count: int):
+    with SessionLocal() as db:
+        for i in range(count):
+            order = Order(user_id=user_id, seller_user_id=2, subtotal=10.0, tax=0, shipping_cost=0, discount_amount=0, total=10.0)
+            db.add(order)
+            db.flush()
+            db.add_all(OrderItem(order_id=order.id, product_id=n, quantity=1, unit_price=5.0) for n in range(2))
+            db.add(Payment(order_id=order.id, transaction_id=f"pi_{user_id}_{i}", amount=10.0, status="SUCCESS"))
+            if i % 2:
+                db.add(Shipment(order_id=order.id, carrier="DPD", tracking_number=f"T{user_id}_{i}", status="IN_TRANSIT"))
+        db.commit()
+
+
+@pytest.fixture
+def statements():
+    """SQL run through the read engine GET /orders/ uses"""
+    executed = []
+    engine = engines.async_read_engine.sync_engine
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield executed
+    event.remove(engine, "before_cursor_execute", record)
+
+
+def test_expand_query_count_is_independent_of_page_size(client, statements):
+    expand = ",".join(EXPANDABLE)
+    counts = {}
+    for user_id, orders in ((101, 1), (102, 40)):
+        seed_orders(user_id, orders)
+        headers = {"Authorization": "Bearer " + create_access_token({"sub": str(user_id)})}
+        statements.clear()
+        response = client.get(f"/orders/?expand={expand}&limit=50", headers=headers)
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert len(body) == orders
+        assert all(len(order["items"]) == 2 and order["payment"] for order in body)
+        counts[orders] = len(statements)
+    assert counts[1] == counts[40] == 1 + len(EXPANDABLE), counts
@@ -1,77 +1,84 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from shared.pagination import paginate_async
 from . import models, schemas
 
+# Keys booking lists can be sorted (and cursor-paginated) by, always tie-broken by id
+BOOKING_SORT_KEYS = {"id": models.Booking.id, "date": models.Booking.date}
+
 # Booking CRUD
-def create_booking(db: Session, booking: schemas.BookingCreate):
+async def create_booking(db: AsyncSession, booking: schemas.BookingCreate):
     db_booking = models.Booking(**booking.dict())
     db.add(db_booking)
-    db.commit()
-    db.refresh(db_booking)
+    await db.commit()
+    await db.refresh(db_booking)
     return db_booking
 
-def get_bookings(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(models.Booking).offset(skip).limit(limit).all()
+async def get_bookings(db: AsyncSession, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = "id"):
+    statement = select(models.Booking)
+    return await paginate_async(db, statement, BOOKING_SORT_KEYS, models.Booking.id, sort, skip, limit, cursor)
 
-def get_bookings_by_status(db: Session, skip: int = 0, limit: int = 10, status: str = "Pending"):
-    return db.query(models.Booking).filter(models.Booking.status == status).offset(skip).limit(limit).all()
+async def get_bookings_by_status(db: AsyncSession, skip: int = 0, limit: int = 10, status: str = "Pending", cursor: str = None, sort: str = "id"):
+    statement = select(models.Booking).where(models.Booking.status == status)
+    return await paginate_async(db, statement, BOOKING_SORT_KEYS, models.Booking.id, sort, skip, limit, cursor)
 
-def get_booking_by_registration_number(db: Session, registration_number: str):
-    return db.query(models.Booking).filter(models.Booking.vehicle_reg_number == registration_number).first()
+async def get_booking_by_registration_number(db: AsyncSession, registration_number: str):
+    return await db.scalar(select(models.Booking).where(models.Booking.vehicle_reg_number == registration_number).limit(1))
 
-def update_booking(db: Session, registration_number: str, updated_booking: schemas.BookingUpdate):
-    db_booking = db.query(models.Booking).filter(models.Booking.vehicle_reg_number == registration_number).first()
+async def update_booking(db: AsyncSession, registration_number: str, updated_booking: schemas.BookingUpdate):
+    db_booking = await get_booking_by_registration_number(db, registration_number)
     if db_booking:
         for key, value in updated_booking.dict(exclude_unset=True).items():
             setattr(db_booking, key, value)
-        db.commit()
-        db.refresh(db_booking)
+        await db.commit()
+        await db.refresh(db_booking)
         return db_booking
     return None
 
-def delete_booking(db: Session, registration_number: str):
-    db_booking = db.query(models.Booking).filter(models.Booking.vehicle_reg_number == registration_number).first()
+async def delete_booking(db: AsyncSession, registration_number: str):
+    db_booking = await get_booking_by_registration_number(db, registration_number)
     if db_booking:
-        db.delete(db_booking)
-        db.commit()
+        await db.delete(db_booking)
+        await db.commit()
         return {"msg": "Booking deleted"}
     return {"msg": "Booking not found"}
 
-def update_booking_status(db: Session, booking_id: int, status: str):
-    booking = db.query(models.Booking).filter(models.Booking.id == booking_id).first()
+async def update_booking_status(db: AsyncSession, booking_id: int, status: str):
+    booking = await db.get(models.Booking, booking_id)
     if not booking:
         return None
 
     booking.status = status
-    db.commit()
-    db.refresh(booking)
+    await db.commit()
+    await db.refresh(booking)
     return booking
 
 
 # Quote CRUD
-def create_quote(db: Session, quote: schemas.QuoteCreate, booking_id: int):
+async def create_quote(db: AsyncSession, quote: schemas.QuoteCreate, booking_id: int):
     db_quote = models.Quote(**quote.dict(), booking_id=booking_id)
     db.add(db_quote)
-    db.commit()
-    db.refresh(db_quote)
+    await db.commit()
+    await db.refresh(db_quote)
     return db_quote
 
-def get_quote_by_booking_id(db: Session, booking_id: int):
-    return db.query(models.Quote).filter(models.Quote.booking_id == booking_id).first()
+async def get_quote_by_booking_id(db: AsyncSession, booking_id: int):
+    return await db.scalar(select(models.Quote).where(models.Quote.booking_id == booking_id).limit(1))
 
-def update_quote(db: Session, booking_id: int, updated_quote: schemas.QuoteUpdate):
-    db_quote = db.query(models.Quote).filter(models.Quote.booking_id == booking_id).first()
+async def update_quote(db: AsyncSession, booking_id: int, updated_quote: schemas.QuoteUpdate):
+    db_quote = await get_quote_by_booking_id(db, booking_id)
     if db_quote:
         for key, value in updated_quote.dict(exclude_unset=True).items():
             setattr(db_quote, key, value)
-        db.commit()
-        db.refresh(db_quote)
+        await db.commit()
+        await db.refresh(db_quote)
         return db_quote
     return None
 
-def delete_quote(db: Session, booking_id: int):
-    db_quote = db.query(models.Quote).filter(models.Quote.booking_id == booking_id).first()
+async def delete_quote(db: AsyncSession, booking_id: int):
+    db_quote = await get_quote_by_booking_id(db, booking_id)
     if db_quote:
-        db.delete(db_quote)
-        db.commit()
+        await db.delete(db_quote)
+        await db.commit()
         return {"msg": "Quote deleted"}
     return {"msg": "Quote not found"}
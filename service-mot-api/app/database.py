@@ -1,18 +1,21 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import declarative_base
+from shared.db_engine import Database
 
 # Prefer env; fall back to local SQLite for MOT and Services
 DATABASE_URL = os.getenv("MOT_SERVICES_DB_URL", "sqlite:///./mot_services.db")
 
-# SQLite thread-safety setup for FastAPI
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+# WAL, pragmas and pool sizes come from the SQLITE_* / DB_* variables (shared/db_engine.py)
+engines = Database(DATABASE_URL, os.getenv("MOT_SERVICES_ASYNC_DB_URL"))
 
-# Create engine for the MOT and Services database
-engine = create_engine(DATABASE_URL, echo=False, future=True, connect_args=connect_args)
+# Sync engine for schema setup and migrations
+engine = engines.engine
+SessionLocal = engines.SessionLocal
 
-# Create a session local for managing the DB session
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Routes await their queries: writes through the single write connection, reads through the read pool
+async_engine = engines.async_engine
+AsyncSessionLocal = engines.AsyncSessionLocal
+AsyncReadSessionLocal = engines.AsyncReadSessionLocal
 
 # Base class for all models in the MOT and Services API
 Base = declarative_base()
@@ -20,4 +23,14 @@ Base = declarative_base()
 # Initialize the database (create tables)
 def init_db():
     from . import models  # noqa: F401
+    from .migrations import migrate
     Base.metadata.create_all(bind=engine)
+    migrate(engine)
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -1,5 +1,7 @@
-from fastapi import FastAPI, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import Optional
+from fastapi import FastAPI, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from shared.pagination import NEXT_CURSOR_HEADER, next_cursor
 from . import models, schemas, crud, database, services
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -13,17 +15,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 
 database.init_db()
 
-def get_db():
-    db = database.SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Every route awaits its queries on an AsyncSession, so none of them blocks the event loop.
+# GET routes only read, so they use the read pool and never wait for the write connection.
+get_db = database.get_db
+get_read_db = database.get_read_db
+
+# Pooled aiosqlite connections each own a thread; close them with the app
+@app.on_event("shutdown")
+async def close_engines():
+    await database.engines.dispose()
 
 # Booking and Quote Service instances
 from .services.booking_service import BookingService  # Corrected import
@@ -32,44 +38,54 @@ from .services.booking_service import QuoteService    # Corrected import
 booking_service = BookingService
 quote_service = QuoteService
 
+# Keyset pagination: the cursor for the next page travels in a response header
+def set_next_cursor(response: Response, rows, sort: str, limit: int):
+    cursor = next_cursor(rows, sort, limit)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
 # Routes for Booking
 @app.post("/bookings/", response_model=schemas.Booking)
-async def create_booking(booking: schemas.BookingCreate, db: Session = Depends(get_db)):
-    return booking_service(db).create_booking(booking)
+async def create_booking(booking: schemas.BookingCreate, db: AsyncSession = Depends(get_db)):
+    return await booking_service(db).create_booking(booking)
 
 @app.get("/bookings/", response_model=list[schemas.Booking])
-async def get_bookings(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    return booking_service(db).get_bookings(skip=skip, limit=limit)
+async def get_bookings(response: Response, skip: int = 0, limit: int = 10, cursor: Optional[str] = None, sort: str = "id", db: AsyncSession = Depends(get_read_db)):
+    bookings = await booking_service(db).get_bookings(skip=skip, limit=limit, cursor=cursor, sort=sort)
+    set_next_cursor(response, bookings, sort, limit)
+    return bookings
 
 @app.get("/bookings_requests/", response_model=list[schemas.Booking])
-async def get_bookings_by_status(skip: int = 0, limit: int = 10, status: str = "Pending", db: Session = Depends(get_db)):
-    return booking_service(db).get_bookings_by_status(skip=skip, limit=limit, status=status)
+async def get_bookings_by_status(response: Response, skip: int = 0, limit: int = 10, status: str = "Pending", cursor: Optional[str] = None, sort: str = "id", db: AsyncSession = Depends(get_read_db)):
+    bookings = await booking_service(db).get_bookings_by_status(skip=skip, limit=limit, status=status, cursor=cursor, sort=sort)
+    set_next_cursor(response, bookings, sort, limit)
+    return bookings
 
 @app.get("/bookings/{registration_number}", response_model=schemas.Booking)
-async def get_booking_by_registration_number(registration_number: str, db: Session = Depends(get_db)):
-    db_booking = booking_service(db).get_booking_by_registration(registration_number)
+async def get_booking_by_registration_number(registration_number: str, db: AsyncSession = Depends(get_read_db)):
+    db_booking = await booking_service(db).get_booking_by_registration(registration_number)
     if db_booking is None:
         raise HTTPException(status_code=404, detail="Booking not found")
     return db_booking
 
 @app.put("/bookings/{registration_number}", response_model=schemas.Booking)
-async def update_booking(registration_number: str, updated_booking: schemas.BookingUpdate, db: Session = Depends(get_db)):
-    db_booking = booking_service(db).update_booking(registration_number, updated_booking)
+async def update_booking(registration_number: str, updated_booking: schemas.BookingUpdate, db: AsyncSession = Depends(get_db)):
+    db_booking = await booking_service(db).update_booking(registration_number, updated_booking)
     if db_booking is None:
         raise HTTPException(status_code=404, detail="Booking not found")
     return db_booking
 
 @app.delete("/bookings/{registration_number}")
-async def delete_booking(registration_number: str, db: Session = Depends(get_db)):
-    return booking_service(db).delete_booking(registration_number)
+async def delete_booking(registration_number: str, db: AsyncSession = Depends(get_db)):
+    return await booking_service(db).delete_booking(registration_number)
 
 @app.put("/bookings/{booking_id}/status", response_model=schemas.Booking)
 async def update_booking_status(
     booking_id: int,
     status_update: schemas.BookingStatusUpdate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    updated_booking = booking_service(db).update_status(booking_id, status_update.status)
+    updated_booking = await booking_service(db).update_status(booking_id, status_update.status)
 
     if not updated_booking:
         raise HTTPException(status_code=404, detail="Booking not found")
@@ -79,23 +95,23 @@ async def update_booking_status(
 
 # Routes for Quote
 @app.post("/quotes/", response_model=schemas.Quote)
-async def create_quote(quote: schemas.QuoteCreate, booking_id: int, db: Session = Depends(get_db)):
-    return quote_service(db).create_quote(quote, booking_id)
+async def create_quote(quote: schemas.QuoteCreate, booking_id: int, db: AsyncSession = Depends(get_db)):
+    return await quote_service(db).create_quote(quote, booking_id)
 
 @app.get("/quotes/{booking_id}", response_model=schemas.Quote)
-async def get_quote_by_booking_id(booking_id: int, db: Session = Depends(get_db)):
-    db_quote = quote_service(db).get_quote_by_booking_id(booking_id)
+async def get_quote_by_booking_id(booking_id: int, db: AsyncSession = Depends(get_read_db)):
+    db_quote = await quote_service(db).get_quote_by_booking_id(booking_id)
     if db_quote is None:
         raise HTTPException(status_code=404, detail="Quote not found")
     return db_quote
 
 @app.put("/quotes/{booking_id}", response_model=schemas.Quote)
-async def update_quote(booking_id: int, updated_quote: schemas.QuoteUpdate, db: Session = Depends(get_db)):
-    db_quote = quote_service(db).update_quote(booking_id, updated_quote)
+async def update_quote(booking_id: int, updated_quote: schemas.QuoteUpdate, db: AsyncSession = Depends(get_db)):
+    db_quote = await quote_service(db).update_quote(booking_id, updated_quote)
     if db_quote is None:
         raise HTTPException(status_code=404, detail="Quote not found")
     return db_quote
 
 @app.delete("/quotes/{booking_id}")
-async def delete_quote(booking_id: int, db: Session = Depends(get_db)):
-    return quote_service(db).delete_quote(booking_id)
+async def delete_quote(booking_id: int, db: AsyncSession = Depends(get_db)):
+    return await quote_service(db).delete_quote(booking_id)
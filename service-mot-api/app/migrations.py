@@ -0,0 +1,43 @@
+# app/migrations.py
+"""Versioned schema migrations for mot_services.db.
+
+Applied at startup by init_db; run by hand to migrate and print the index advisor report:
+
+    python -m app.migrations
+"""
+import sys
+
+from sqlalchemy import select
+
+from shared.migrations import Migration, advise, print_advice, run_migrations
+from .models import Booking, BookingStatus, Quote
+
+# Append only: never edit a migration once it has shipped
+MIGRATIONS = [
+    Migration(1, "secondary indexes for status and quote lookups", [
+        "CREATE INDEX IF NOT EXISTS ix_bookings_status ON bookings (status)",
+        "CREATE INDEX IF NOT EXISTS ix_quotes_booking_id ON quotes (booking_id)",
+    ]),
+]
+
+
+def migrate(engine):
+    from .database import Base
+
+    return run_migrations(engine, MIGRATIONS, Base.metadata)
+
+
+# The statements behind the busiest crud functions, with representative parameters
+HOT_QUERIES = {
+    "get_bookings (date)": select(Booking).order_by(Booking.date, Booking.id).limit(10),
+    "get_bookings_by_status": select(Booking).where(Booking.status == BookingStatus.Pending).order_by(Booking.id).limit(10),
+    "get_booking_by_registration_number": select(Booking).where(Booking.vehicle_reg_number == "AB12CDE").limit(1),
+    "get_quote_by_booking_id": select(Quote).where(Quote.booking_id == 1).limit(1),
+}
+
+
+if __name__ == "__main__":
+    from .database import engine
+
+    print(f"Applied migrations: {migrate(engine) or 'none pending'}")
+    sys.exit(0 if print_advice(advise(engine, HOT_QUERIES)) else 1)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Date, Time, Enum
+from sqlalchemy import Column, ForeignKey, Integer, String, Date, Time, Enum, Index
 from sqlalchemy.orm import relationship
 from enum import Enum as PyEnum
 from .database import Base
@@ -32,6 +32,12 @@ class Booking(Base):
     # Relationship with Quote
     quote = relationship("Quote", back_populates="booking", uselist=False)
 
+    # (sort key, id) index backing keyset pagination
+    __table_args__ = (
+        Index("ix_bookings_date_id", "date", "id"),
+        Index("ix_bookings_status", "status"),
+    )
+
 
 class Quote(Base):
     __tablename__ = "quotes"
@@ -43,3 +49,5 @@ class Quote(Base):
 
     # Back relationship to Booking
     booking = relationship("Booking", back_populates="quote")
+
+    __table_args__ = (Index("ix_quotes_booking_id", "booking_id"),)
@@ -1,47 +1,47 @@
 # app/services/booking_service.py
 
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from .. import crud, schemas
 
 class BookingService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create_booking(self, booking: schemas.BookingCreate):
-        return crud.create_booking(self.db, booking)
+    async def create_booking(self, booking: schemas.BookingCreate):
+        return await crud.create_booking(self.db, booking)
 
-    def get_bookings(self, skip: int = 0, limit: int = 10):
-        return crud.get_bookings(self.db, skip, limit)
+    async def get_bookings(self, skip: int = 0, limit: int = 10, cursor: str = None, sort: str = "id"):
+        return await crud.get_bookings(self.db, skip, limit, cursor, sort)
     
-    def get_bookings_by_status(self, skip: int, limit: int, status: str):
-        return crud.get_bookings_by_status(self.db, skip, limit, status)
+    async def get_bookings_by_status(self, skip: int, limit: int, status: str, cursor: str = None, sort: str = "id"):
+        return await crud.get_bookings_by_status(self.db, skip, limit, status, cursor, sort)
 
-    def get_booking_by_registration(self, registration_number: str):
-        return crud.get_booking_by_registration_number(self.db, registration_number)
+    async def get_booking_by_registration(self, registration_number: str):
+        return await crud.get_booking_by_registration_number(self.db, registration_number)
 
-    def update_booking(self, registration_number: str, updated_booking: schemas.BookingUpdate):
-        return crud.update_booking(self.db, registration_number, updated_booking)
+    async def update_booking(self, registration_number: str, updated_booking: schemas.BookingUpdate):
+        return await crud.update_booking(self.db, registration_number, updated_booking)
 
-    def delete_booking(self, registration_number: str):
-        return crud.delete_booking(self.db, registration_number)
+    async def delete_booking(self, registration_number: str):
+        return await crud.delete_booking(self.db, registration_number)
     
-    def update_status(self, booking_id: int, status: str):
-        return crud.update_booking_status(self.db, booking_id, status)
+    async def update_status(self, booking_id: int, status: str):
+        return await crud.update_booking_status(self.db, booking_id, status)
 
 
 
 class QuoteService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create_quote(self, quote: schemas.QuoteCreate, booking_id: int):
-        return crud.create_quote(self.db, quote, booking_id)
+    async def create_quote(self, quote: schemas.QuoteCreate, booking_id: int):
+        return await crud.create_quote(self.db, quote, booking_id)
 
-    def get_quote_by_booking_id(self, booking_id: int):
-        return crud.get_quote_by_booking_id(self.db, booking_id)
+    async def get_quote_by_booking_id(self, booking_id: int):
+        return await crud.get_quote_by_booking_id(self.db, booking_id)
 
-    def update_quote(self, booking_id: int, updated_quote: schemas.QuoteUpdate):
-        return crud.update_quote(self.db, booking_id, updated_quote)
+    async def update_quote(self, booking_id: int, updated_quote: schemas.QuoteUpdate):
+        return await crud.update_quote(self.db, booking_id, updated_quote)
 
-    def delete_quote(self, booking_id: int):
-        return crud.delete_quote(self.db, booking_id)
+    async def delete_quote(self, booking_id: int):
+        return await crud.delete_quote(self.db, booking_id)
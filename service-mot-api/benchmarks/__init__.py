@@ -0,0 +1,8 @@
+"""Benchmarks for service-mot-api, run from service-mot-api/:
+
+    python -m benchmarks.bookings
+
+Importing the package points the app at a scratch database (see fixtures), so nothing
+here ever touches mot_services.db.
+"""
+from benchmarks import fixtures  # noqa: F401
@@ -0,0 +1,78 @@
+# benchmarks/bookings.py
+"""Booking list pages served concurrently: a sync Session inside async def against AsyncSession.
+
+    python -m benchmarks.bookings
+"""
+import asyncio
+import time
+from datetime import date, time as time_of_day, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app import models
+from app.crud import get_bookings
+from benchmarks.fixtures import scratch_db
+from shared.db_engine import async_url
+
+
+def load_test(bookings: int = 20_000, requests: int = 2_000, concurrency: int = 50):
+    url, engine, Session = scratch_db("load.db")
+    with engine.begin() as conn:
+        conn.execute(insert(models.Booking), [
+            {"name": f"Client {i}", "vehicle": "Car", "vehicle_make": "Ford", "vehicle_model": "Focus",
+             "vehicle_year": 2015, "vehicle_reg_number": f"REG{i:06d}", "engine_size": "1.6", "fuel_type": "Petrol",
+             "transmission": "Manual", "mileage": 50_000, "additional_notes": "", "selected_garage": "Main",
+             "date": date(2026, 1, 1) + timedelta(days=i % 365), "time": time_of_day(9), "status": "Pending"}
+            for i in range(bookings)
+        ])
+    async_engine = create_async_engine(async_url(url), poolclass=AsyncAdaptedQueuePool, pool_size=5)
+    AsyncSession_ = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def blocking_page(skip):
+        with Session() as db:  # the old route body: a sync query inside async def
+            return db.query(models.Booking).order_by(models.Booking.date, models.Booking.id).offset(skip).limit(10).all()
+
+    async def async_page(skip):
+        async with AsyncSession_() as db:
+            return await get_bookings(db, skip=skip, limit=10, sort="date")
+
+    async def run(page):
+        gate = asyncio.Semaphore(concurrency)
+        lag = [0.0]
+        done = asyncio.Event()
+
+        async def probe():
+            # How late a 1ms timer fires: the time any other request would wait for the loop
+            while not done.is_set():
+                started = time.perf_counter()
+                await asyncio.sleep(0.001)
+                lag[0] = max(lag[0], time.perf_counter() - started - 0.001)
+
+        async def request(i):
+            async with gate:
+                rows = await page(bookings // 2 + (i * 37) % (bookings // 2 - 10))
+                assert len(rows) == 10
+
+        prober = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(request(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await prober
+        return requests / elapsed, lag[0] * 1000
+
+    async def main():
+        for name, page in (("sync Session", blocking_page), ("AsyncSession", async_page)):
+            await page(0)  # warm the pool and the page cache
+            throughput, lag = await run(page)
+            print(f"{name:>12}: {throughput:6.0f} pages/s, worst event loop stall {lag:6.1f}ms "
+                  f"({requests} requests, {concurrency} concurrent)")
+        await async_engine.dispose()
+
+    asyncio.run(main())
+
+
+if __name__ == "__main__":
+    load_test()
@@ -0,0 +1,27 @@
+# benchmarks/fixtures.py
+"""Scratch databases for the benchmarks: a fresh SQLite file with the app's tables."""
+import os
+import tempfile
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+def scratch_url(name: str) -> str:
+    """URL of a new, empty SQLite file in its own temporary directory"""
+    return f"sqlite:///{os.path.join(tempfile.mkdtemp(), name)}"
+
+
+# Before anything imports app.database, which builds its engines from the environment
+os.environ["MOT_SERVICES_DB_URL"] = scratch_url("mot_services.db")
+os.environ.pop("MOT_SERVICES_ASYNC_DB_URL", None)
+
+
+def scratch_db(name: str):
+    """(url, engine, sessionmaker) on a new database file with every app table"""
+    from app.database import Base
+
+    url = scratch_url(name)
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    return url, engine, sessionmaker(bind=engine)
@@ -1,10 +1,20 @@
 import os
 import jwt
+import hmac
+import json
+import time
+import base64
+import hashlib
 from datetime import datetime, timedelta
 
 JWT_SECRET = os.getenv("JWT_SECRET", "supersecretkey")
 ALGORITHM = "HS256"
 
+# Identity headers set by the api-gateway once it has verified the bearer token
+IDENTITY_HEADER = "x-identity"
+IDENTITY_SIGNATURE_HEADER = "x-identity-signature"
+GATEWAY_SECRET = os.getenv("GATEWAY_SECRET", JWT_SECRET)
+
 def create_access_token(data: dict, expires_delta: int = 60):
     """Generates a JWT token"""
     to_encode = data.copy()
@@ -20,3 +30,30 @@ def decode_access_token(token: str):
         return None
     except jwt.InvalidTokenError:
         return None
+
+def _identity_signature(encoded: str) -> str:
+    return hmac.new(GATEWAY_SECRET.encode(), encoded.encode(), hashlib.sha256).hexdigest()
+
+def sign_identity(claims: dict):
+    """Encodes verified claims as (identity, signature) header values"""
+    encoded = base64.urlsafe_b64encode(json.dumps(claims, separators=(",", ":")).encode()).decode()
+    return encoded, _identity_signature(encoded)
+
+def verify_identity(encoded: str, signature: str):
+    """Verifies identity headers signed by the gateway"""
+    if not encoded or not signature:
+        return None
+    if not hmac.compare_digest(_identity_signature(encoded), signature):
+        return None
+    try:
+        claims = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+    except ValueError:
+        return None
+    exp = claims.get("exp")
+    if exp is not None and exp <= time.time():
+        return None
+    return claims
+
+def identity_from_headers(headers):
+    """Returns the gateway-verified claims carried by the request headers, if any"""
+    return verify_identity(headers.get(IDENTITY_HEADER), headers.get(IDENTITY_SIGNATURE_HEADER))
@@ -0,0 +1,138 @@
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+VERSION_TABLE = "schema_migrations"
+
+VERSION_TABLE_DDL = f"""CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (
+    version INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+)"""
+
+
+@dataclass
+class Migration:
+    """One schema step: SQL statements, or apply(conn) for anything that needs code"""
+    version: int
+    name: str
+    statements: Sequence[str] = ()
+    apply: Optional[Callable] = None
+
+
+def applied_versions(conn) -> set:
+    return {row[0] for row in conn.execute(text(f"SELECT version FROM {VERSION_TABLE}"))}
+
+
+def _begin(conn):
+    # On SQLite take the write lock up front, so workers starting together apply each step once
+    if conn.dialect.name == "sqlite":
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def run_migrations(engine, migrations: List[Migration], metadata=None) -> List[int]:
+    """Applies pending migrations in version order, each in its own transaction; returns the versions applied.
+
+    With metadata, first creates the tables the models declare that the database lacks, as
+    app startup does, so a migration CLI works on an empty or old database too; afterwards
+    creates any declared index still missing, since create_all never alters existing tables.
+    """
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError("Duplicate migration version")
+
+    if metadata is not None:
+        metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text(VERSION_TABLE_DDL))
+
+    applied = []
+    for migration in sorted(migrations, key=lambda m: m.version):
+        with engine.connect() as conn:
+            _begin(conn)
+            if migration.version in applied_versions(conn):
+                conn.rollback()
+                continue
+            for statement in migration.statements:
+                conn.execute(text(statement))
+            if migration.apply is not None:
+                migration.apply(conn)
+            conn.execute(
+                text(f"INSERT INTO {VERSION_TABLE} (version, name) VALUES (:version, :name)"),
+                {"version": migration.version, "name": migration.name},
+            )
+            conn.commit()
+        logger.info("Applied migration %s %s", migration.version, migration.name)
+        applied.append(migration.version)
+
+    if metadata is not None:
+        create_declared_indexes(engine, metadata)
+    return applied
+
+
+def create_declared_indexes(engine, metadata):
+    with engine.begin() as conn:
+        for table in metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+
+# ==================== Index advisor ====================
+
+FULL_SCAN = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+
+
+@dataclass
+class PlanReport:
+    name: str
+    sql: str
+    plan: List[str]
+    full_scans: List[str] = field(default_factory=list)
+    temp_sorts: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.full_scans
+
+
+def explain(conn, statement) -> List[str]:
+    """EXPLAIN QUERY PLAN detail lines for a SQLAlchemy statement"""
+    # Parameters are inlined as literals so their column types (enums, dates) are applied
+    sql = statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}).string
+    return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}").all()]
+
+
+def advise(engine, queries: Dict[str, object], expected_scans: Sequence[str] = ()) -> List[PlanReport]:
+    """Runs EXPLAIN QUERY PLAN on each named statement and flags full table scans and temp B-tree sorts.
+
+    expected_scans names queries that walk a table on purpose, e.g. the first page in id order.
+    """
+    reports = []
+    with engine.connect() as conn:
+        for name, statement in queries.items():
+            plan = explain(conn, statement)
+            report = PlanReport(name, str(statement.compile(dialect=conn.dialect)), plan)
+            for detail in plan:
+                if FULL_SCAN.match(detail) and name not in expected_scans:
+                    report.full_scans.append(detail)
+                elif "USE TEMP B-TREE" in detail:
+                    report.temp_sorts.append(detail)
+            reports.append(report)
+    return reports
+
+
+def print_advice(reports: List[PlanReport]) -> bool:
+    """Prints one line per query (and the plan for flagged ones); True when nothing does a full scan"""
+    for report in reports:
+        status = "OK  " if report.ok else "SCAN"
+        notes = f"  ({'; '.join(report.temp_sorts)})" if report.temp_sorts else ""
+        print(f"{status} {report.name}{notes}")
+        if not report.ok:
+            for detail in report.plan:
+                print(f"       {detail}")
+    return all(report.ok for report in reports)
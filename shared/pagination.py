@@ -0,0 +1,134 @@
+import base64
+import json
+from datetime import date, datetime, time
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import String, literal, tuple_
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _dump(value):
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    if hasattr(value, "value"):  # Enum
+        return value.value
+    return value
+
+
+def _load(column, value):
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if python_type in (date, datetime, time):
+        return python_type.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(sort: str, value, row_id: int) -> str:
+    """Opaque cursor pointing just after (value, id) in (sort key, id) order"""
+    raw = json.dumps({"s": sort, "v": _dump(value), "id": row_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, column):
+    """Returns (value, id) from a cursor made for the same sort key"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if payload["s"] != sort:
+            raise ValueError("cursor was issued for another sort key")
+        return _load(column, payload["v"]), int(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def resolve_sort(sort: str, sort_keys: Dict):
+    """Splits "-price" into (column, descending)"""
+    descending = sort.startswith("-")
+    column = sort_keys.get(sort.lstrip("-"))
+    if column is None:
+        allowed = ", ".join(sorted(sort_keys))
+        raise HTTPException(status_code=400, detail=f"Invalid sort key. Use one of: {allowed} (prefix with - for descending)")
+    return column, descending
+
+
+def _bound(value):
+    # SQLite keeps DATETIME as text: CURRENT_TIMESTAMP defaults have no fraction while
+    # SQLAlchemy binds ".ffffff", so compare against the text exactly as it is stored
+    if isinstance(value, datetime):
+        fmt = "%Y-%m-%d %H:%M:%S.%f" if value.microsecond else "%Y-%m-%d %H:%M:%S"
+        return literal(value.strftime(fmt), String)
+    return value
+
+
+def _ordered(query, column, id_column, descending: bool):
+    if column is id_column:
+        return query.order_by(id_column.desc() if descending else id_column.asc())
+    if descending:
+        return query.order_by(column.desc(), id_column.desc())
+    return query.order_by(column.asc(), id_column.asc())
+
+
+def page_statements(query, sort_keys: Dict, id_column, sort: str = "id", skip: int = 0, limit: int = 10, cursor: Optional[str] = None) -> Tuple:
+    """(first, rest): first is the limited page; rest, when given, tops it up if first comes back short.
+
+    Works on a Query or a select(), so sync and async sessions share one seek.
+    """
+    column, descending = resolve_sort(sort, sort_keys)
+
+    if not cursor:
+        page = _ordered(query, column, id_column, descending)
+        return (page.offset(skip) if skip else page).limit(limit), None
+
+    value, last_id = decode_cursor(cursor, sort, column)
+    if column is id_column:
+        seek = query.filter(id_column < last_id if descending else id_column > last_id)
+        return _ordered(seek, column, id_column, descending).limit(limit), None
+
+    # SQLite sorts NULLs first ascending and last descending, so a page may run from
+    # the NULL run into the non-NULL run (ascending) or the other way round (descending).
+    # Each part is its own index seek; row-value comparisons keep the seek on (sort key, id).
+    if value is None:
+        seek = query.filter(column.is_(None), id_column < last_id if descending else id_column > last_id)
+        first = _ordered(seek, column, id_column, descending).limit(limit)
+        if descending:
+            return first, None
+        return first, _ordered(query.filter(column.isnot(None)), column, id_column, descending)
+
+    if descending:
+        seek = query.filter(tuple_(column, id_column) < tuple_(_bound(value), last_id))
+    else:
+        seek = query.filter(tuple_(column, id_column) > tuple_(_bound(value), last_id))
+    first = _ordered(seek, column, id_column, descending).limit(limit)
+    if not descending:
+        return first, None
+    return first, _ordered(query.filter(column.is_(None)), column, id_column, descending)
+
+
+def paginate(query, sort_keys: Dict, id_column, sort: str = "id", skip: int = 0, limit: int = 10, cursor: Optional[str] = None) -> List:
+    """Orders by (sort key, id); seeks past the cursor when given, otherwise falls back to offset paging"""
+    first, rest = page_statements(query, sort_keys, id_column, sort, skip, limit, cursor)
+    rows = first.all()
+    if rest is not None and len(rows) < limit:
+        rows += rest.limit(limit - len(rows)).all()
+    return rows
+
+
+async def paginate_async(db, statement, sort_keys: Dict, id_column, sort: str = "id", skip: int = 0, limit: int = 10, cursor: Optional[str] = None) -> List:
+    """paginate for an AsyncSession and a select() of one entity"""
+    first, rest = page_statements(statement, sort_keys, id_column, sort, skip, limit, cursor)
+    rows = list((await db.scalars(first)).all())
+    if rest is not None and len(rows) < limit:
+        rows += (await db.scalars(rest.limit(limit - len(rows)))).all()
+    return rows
+
+
+def next_cursor(rows: List, sort: str, limit: int, id_attr: str = "id") -> Optional[str]:
+    """Cursor for the page after rows, or None when this was the last page"""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    key = sort.lstrip("-")
+    return encode_cursor(sort, getattr(last, key), getattr(last, id_attr))
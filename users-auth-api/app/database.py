@@ -1,17 +1,31 @@
 import os
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import declarative_base
+from shared.db_engine import Database
 
 # Prefer env; fall back to local sqlite
 DATABASE_URL = os.getenv("USERS_DB_URL", "sqlite:///./users.db")
 
-# Needed for SQLite thread-safety with FastAPI
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
+# WAL, pragmas and pool sizes come from the SQLITE_* / DB_* variables (shared/db_engine.py)
+engines = Database(DATABASE_URL, os.getenv("USERS_ASYNC_DB_URL"))
 
-engine = create_engine(DATABASE_URL, echo=False, future=True, connect_args=connect_args)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+engine = engines.engine
+SessionLocal = engines.SessionLocal
+# Routes use the async engines: one write connection, and a read pool for lookups
+async_engine = engines.async_engine
+AsyncSessionLocal = engines.AsyncSessionLocal
+AsyncReadSessionLocal = engines.AsyncReadSessionLocal
 Base = declarative_base()
 
 def init_db():
     from . import models  # noqa: F401
+    from .migrations import migrate
     Base.metadata.create_all(bind=engine)
+    migrate(engine)
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -1,16 +1,17 @@
 import os, sys
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from shared.jwt_utils import decode_access_token  # noqa: E402
+from shared.jwt_utils import decode_access_token, identity_from_headers  # noqa: E402
 
 # # Ensure we can import the shared package from project root
 # sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
-# from shared.jwt_utils import decode_access_token  # noqa: E402
+# from shared.jwt_utils import decode_access_token, identity_from_headers  # noqa: E402
 
 security = HTTPBearer()
 
-def get_current_user(creds: HTTPAuthorizationCredentials = Depends(security)):
-    payload = decode_access_token(creds.credentials)
+def get_current_user(request: Request, creds: HTTPAuthorizationCredentials = Depends(security)):
+    # Claims already verified by the api-gateway, otherwise decode the token here
+    payload = identity_from_headers(request.headers) or decode_access_token(creds.credentials)
     if not payload:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
     return payload  # contains sub, email, role
@@ -6,7 +6,7 @@ from dotenv import load_dotenv
 # Allow importing shared/ from project root when running directly
 # sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 
-from .database import init_db  # noqa: E402
+from .database import engines, init_db  # noqa: E402
 from .routers import auth as auth_router  # noqa: E402
 from .routers import admin as admin_router  # noqa: E402
 
@@ -27,6 +27,11 @@ app.add_middleware(
 def on_startup():
     init_db()
 
+# Pooled aiosqlite connections each own a thread; close them with the app
+@app.on_event("shutdown")
+async def close_engines():
+    await engines.dispose()
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
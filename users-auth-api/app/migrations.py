@@ -0,0 +1,37 @@
+# app/migrations.py
+"""Versioned schema migrations for users.db.
+
+Applied at startup by init_db; run by hand to migrate and print the index advisor report:
+
+    python -m app.migrations
+"""
+import sys
+
+from sqlalchemy import select
+
+from shared.migrations import Migration, advise, print_advice, run_migrations
+from .models import User
+
+# Append only: never edit a migration once it has shipped. The users table is
+# fully indexed by its model (email is unique), so nothing is pending yet.
+MIGRATIONS: list[Migration] = []
+
+
+def migrate(engine):
+    from .database import Base
+
+    return run_migrations(engine, MIGRATIONS, Base.metadata)
+
+
+# The statements behind login, registration and the admin endpoints
+HOT_QUERIES = {
+    "login / register (email)": select(User).where(User.email == "driver@example.com").limit(1),
+    "get user (id)": select(User).where(User.id == 1),
+}
+
+
+if __name__ == "__main__":
+    from .database import engine
+
+    print(f"Applied migrations: {migrate(engine) or 'none pending'}")
+    sys.exit(0 if print_advice(advise(engine, HOT_QUERIES)) else 1)
@@ -0,0 +1,117 @@
+import ipaddress
+import math
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request
+
+# Peers whose X-Forwarded-For is believed: the api-gateway's address or network, as a comma
+# separated list of IPs / CIDRs. The default covers loopback and the private ranges a gateway
+# container or host shares with this service; a peer outside it is keyed by its own address.
+TRUSTED_PROXIES = [
+    ipaddress.ip_network(network.strip(), strict=False)
+    for network in os.getenv("TRUSTED_PROXIES", "127.0.0.0/8,::1/128,10.0.0.0/8,172.16.0.0/12,192.168.0.0/16").split(",")
+    if network.strip()
+]
+SWEEP_INTERVAL = float(os.getenv("RATE_LIMIT_SWEEP_INTERVAL", "60"))
+
+
+def parse_quota(value: str):
+    """"10/60" -> 10 requests per 60 seconds"""
+    requests, _, seconds = value.partition("/")
+    return int(requests), float(seconds or 60)
+
+
+class TokenBucketLimiter:
+    """Token bucket per key; each key only stores its token count and last refill time."""
+
+    def __init__(self, capacity: int, period: float, sweep_interval: float = SWEEP_INTERVAL):
+        self.capacity = capacity
+        self.rate = capacity / period  # tokens per second
+        self.sweep_interval = sweep_interval
+        self.buckets: Dict[str, list] = {}
+        self.last_sweep = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, key: str) -> float:
+        """Takes a token for key; returns 0 if allowed, otherwise seconds until one is available."""
+        now = time.monotonic()
+        with self.lock:
+            if now - self.last_sweep >= self.sweep_interval:
+                self._sweep(now)
+
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                self.buckets[key] = [self.capacity - 1.0, now]
+                return 0.0
+
+            tokens = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens >= 1.0:
+                bucket[0] = tokens - 1.0
+                return 0.0
+            bucket[0] = tokens
+            return (1.0 - tokens) / self.rate
+
+    def _sweep(self, now: float):
+        # A bucket that has refilled completely holds no information and can be dropped
+        full_after = self.capacity / self.rate
+        idle = [key for key, (_, updated) in self.buckets.items() if now - updated >= full_after]
+        for key in idle:
+            del self.buckets[key]
+        self.last_sweep = now
+
+
+class RouteQuota:
+    """Per-IP and per-email limits for one route."""
+
+    def __init__(self, name: str, per_ip: str, per_email: str):
+        self.name = name
+        self.by_ip = TokenBucketLimiter(*parse_quota(per_ip))
+        self.by_email = TokenBucketLimiter(*parse_quota(per_email))
+
+    def check(self, request: Request, email: Optional[str] = None):
+        retry_after = self.by_ip.acquire(client_ip(request))
+        if not retry_after and email:
+            retry_after = self.by_email.acquire(email.strip().lower())
+        if retry_after:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
+
+
+def is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> str:
+    peer = request.client.host if request.client else None
+    if peer is None:
+        return "unknown"
+    if is_trusted_proxy(peer):
+        # The api-gateway appends the address it was connected from; anything left of it is client-supplied
+        forwarded_for = request.headers.get("x-forwarded-for")
+        if forwarded_for and forwarded_for.split(",")[-1].strip():
+            return forwarded_for.split(",")[-1].strip()
+    return peer
+
+
+# Quotas are "<requests>/<seconds>"
+login_quota = RouteQuota(
+    "login",
+    per_ip=os.getenv("LOGIN_RATE_LIMIT_PER_IP", "20/60"),
+    per_email=os.getenv("LOGIN_RATE_LIMIT_PER_EMAIL", "5/60"),
+)
+register_quota = RouteQuota(
+    "register",
+    per_ip=os.getenv("REGISTER_RATE_LIMIT_PER_IP", "5/60"),
+    per_email=os.getenv("REGISTER_RATE_LIMIT_PER_EMAIL", "3/300"),
+)
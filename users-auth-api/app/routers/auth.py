@@ -1,28 +1,30 @@
 import os, sys
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from passlib.hash import argon2
 
 # Make shared importable
 # sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 from shared.jwt_utils import create_access_token  # noqa: E402
 
-from ..database import SessionLocal
+from ..database import get_db, get_read_db
 from ..models import User
 from ..schemas import RegisterIn, LoginIn, TokenOut, UserOut
 from ..deps import get_current_user
+from ..ratelimit import login_quota, register_quota
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+async def get_user_by_email(db: AsyncSession, email: str):
+    return await db.scalar(select(User).where(User.email == email).limit(1))
 
 @router.post("/register", response_model=TokenOut, status_code=201)
-def register(payload: RegisterIn, db: Session = Depends(get_db)):
+async def register(payload: RegisterIn, request: Request, db: AsyncSession = Depends(get_db)):
+    # Shed load before any argon2 hashing happens
+    register_quota.check(request, payload.email)
+
     role = payload.role.lower().strip()
     
     if role not in {"buyer", "seller", "admin"}:
@@ -33,22 +35,22 @@ def register(payload: RegisterIn, db: Session = Depends(get_db)):
     if len(payload.password) > 72:
         raise HTTPException(status_code=400, detail="Password cannot be longer than 72 characters")
 
-    existing = db.query(User).filter(User.email == payload.email).first()
+    existing = await get_user_by_email(db, payload.email)
     if existing:
         raise HTTPException(status_code=409, detail="Email already registered.")
 
     user = User(
         fullname=payload.fullname, 
         email=payload.email,
-        password_hash=argon2.hash(payload.password),
+        password_hash=await run_in_threadpool(argon2.hash, payload.password),
         role=role,
         is_active=True,            
         is_verified=False          
     )
 
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
     token = create_access_token(
         {"sub": str(user.id), "email": user.email, "role": user.role},
@@ -65,12 +67,16 @@ def register(payload: RegisterIn, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=TokenOut)
-def login(payload: LoginIn, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == payload.email).first()
+async def login(payload: LoginIn, request: Request, db: AsyncSession = Depends(get_read_db)):
+    # Shed load before any argon2 verification happens
+    login_quota.check(request, payload.email)
+
+    user = await get_user_by_email(db, payload.email)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
 
-    if not argon2.verify(payload.password, user.password_hash):
+    # argon2 is deliberately slow; run it on the threadpool so the event loop keeps serving
+    if not await run_in_threadpool(argon2.verify, payload.password, user.password_hash):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
 
     if not user.is_active:
@@ -87,8 +93,8 @@ def login(payload: LoginIn, db: Session = Depends(get_db)):
     }
 
 @router.get("/me", response_model=UserOut)
-def me(user=Depends(get_current_user), db: Session = Depends(get_db)):
-    db_user = db.query(User).get(int(user["sub"]))
+async def me(user=Depends(get_current_user), db: AsyncSession = Depends(get_read_db)):
+    db_user = await db.get(User, int(user["sub"]))
     if not db_user:
         raise HTTPException(404, detail="User not found")
     return db_user
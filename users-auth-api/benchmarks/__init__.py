@@ -0,0 +1,8 @@
+"""Benchmarks for users-auth-api, run from users-auth-api/:
+
+    python -m benchmarks.auth
+
+Importing the package points the app at a scratch database (see fixtures), so nothing
+here ever touches users.db.
+"""
+from benchmarks import fixtures  # noqa: F401
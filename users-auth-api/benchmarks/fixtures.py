@@ -0,0 +1,14 @@
+# benchmarks/fixtures.py
+"""Scratch databases for the benchmarks: a fresh SQLite file per run."""
+import os
+import tempfile
+
+
+def scratch_url(name: str) -> str:
+    """URL of a new, empty SQLite file in its own temporary directory"""
+    return f"sqlite:///{os.path.join(tempfile.mkdtemp(), name)}"
+
+
+# Before anything imports app.database, which builds its engines from the environment
+os.environ["USERS_DB_URL"] = scratch_url("users.db")
+os.environ.pop("USERS_ASYNC_DB_URL", None)